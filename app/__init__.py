@@ -18,7 +18,12 @@ login_manager.login_message = "Você precisa fazer login para acessar essa pági
 login_manager.login_message_category = "warning"
 
 
-def create_app(config_object=None):
+def create_app(config_object=None, scheduler: bool = None):
+    """
+    Cria a aplicação. scheduler define se este processo inicia o agendador
+    de jobs (padrão: variável SCHEDULER_ENABLED, "True" se ausente); com
+    vários workers do gunicorn, desative-o nos workers e rode scheduler.py.
+    """
     app = Flask(__name__,
                 static_folder='static',
                 template_folder='templates')
@@ -49,11 +54,20 @@ def create_app(config_object=None):
     
     from .logging_config import setup_logging
     from .logging_config import register_audit_listeners
+    from .logging_config import register_dashboard_cache_listeners
+    from .request_metrics import register_request_metrics
+
+    if scheduler is None:
+        scheduler = os.getenv('SCHEDULER_ENABLED', 'True') == 'True'
 
     if os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug:
         setup_logging(app)
-        iniciar_scheduler(app)
+        if scheduler:
+            iniciar_scheduler(app)
         register_audit_listeners()
+        register_dashboard_cache_listeners()
+
+    register_request_metrics(app)
     
     from .service.user_service import UserService
     from .routes.login import login_bp
@@ -64,6 +78,16 @@ def create_app(config_object=None):
     app.register_blueprint(login_bp, url_prefix='/login')
     app.register_blueprint(admin_bp, url_prefix='/admin')
 
+    from .commands import (
+        backfill_os_command, limpar_cache_os_command, manutencao_auditoria_command, manutencao_os_command,
+        reprocessar_os_command
+    )
+    app.cli.add_command(backfill_os_command)
+    app.cli.add_command(reprocessar_os_command)
+    app.cli.add_command(manutencao_os_command)
+    app.cli.add_command(manutencao_auditoria_command)
+    app.cli.add_command(limpar_cache_os_command)
+
     @login_manager.user_loader
     def load_user(user_id):
         """Carrega o usuário pelo ID armazenado na sessão."""
@@ -0,0 +1,106 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.tasks.backfill_os import BACKFILL_RATE_LIMIT, BACKFILL_WORKERS, executar_backfill
+from app.tasks.manutencao_auditoria import AUDIT_RETENTION_MONTHS, manter_auditoria
+from app.tasks.manutencao_os import OS_ARCHIVE_MONTHS, manter_service_orders
+from app.tasks.reprocessar_os import reprocessar_cache
+from app.utils.payload_store import OS_PAYLOAD_RETENTION_DAYS, get_payload_store
+
+
+@click.command('backfill-os')
+@click.option('--inicio', required=True, type=click.DateTime(formats=['%Y-%m-%d']),
+              help="Primeiro dia (AAAA-MM-DD).")
+@click.option('--fim', required=True, type=click.DateTime(formats=['%Y-%m-%d']),
+              help="Último dia, inclusive (AAAA-MM-DD).")
+@click.option('--paralelismo', default=BACKFILL_WORKERS, show_default=True,
+              help="Dias processados ao mesmo tempo.")
+@click.option('--taxa', default=BACKFILL_RATE_LIMIT, show_default=True,
+              help="Requisições por segundo à API (0 = sem limite).")
+@click.option('--reprocessar', is_flag=True, help="Refaz também os dias já concluídos.")
+@with_appcontext
+def backfill_os_command(inicio, fim, paralelismo, taxa, reprocessar):
+    """Importa o histórico de OS de um intervalo de datas, retomando de onde parou."""
+    if fim < inicio:
+        raise click.BadParameter("--fim deve ser igual ou posterior a --inicio")
+
+    resumo = executar_backfill(
+        current_app._get_current_object(), inicio.date(), fim.date(),
+        paralelismo=paralelismo, por_segundo=taxa, reprocessar=reprocessar
+    )
+
+    click.echo(f"✅ {resumo['ordens_servico']} OS em {resumo['segundos']}s "
+               f"({resumo['os_por_segundo']} OS/s), {resumo['processados']} dias processados, "
+               f"{resumo['ja_concluidos']} já concluídos")
+    if resumo['incompletos']:
+        click.echo(f"⚠️ Dias com OS faltando (rode de novo para buscá-las): {', '.join(resumo['incompletos'])}")
+    if resumo['falhas']:
+        click.echo(f"❌ Dias com falha (rode de novo para retomar): {', '.join(resumo['falhas'])}")
+    if resumo['falhas'] or resumo['incompletos']:
+        raise SystemExit(1)
+
+
+@click.command('reprocessar-os')
+@click.option('--inicio', required=True, type=click.DateTime(formats=['%Y-%m-%d']),
+              help="Primeiro dia de finalização (AAAA-MM-DD).")
+@click.option('--fim', required=True, type=click.DateTime(formats=['%Y-%m-%d']),
+              help="Último dia de finalização, inclusive (AAAA-MM-DD).")
+@with_appcontext
+def reprocessar_os_command(inicio, fim):
+    """Regrava as OS a partir do cache local de respostas da API, sem acessá-la."""
+    resumo = reprocessar_cache(
+        current_app._get_current_object(), inicio.strftime('%Y-%m-%d'), fim.strftime('%Y-%m-%d')
+    )
+    click.echo(f"✅ {resumo['ordens_servico']} OS reprocessadas em {resumo['segundos']}s "
+               f"({resumo['os_por_segundo']} OS/s)")
+
+
+@click.command('manutencao-os')
+@click.option('--arquivo', default=OS_ARCHIVE_MONTHS, show_default=True,
+              help="Meses de OS mantidos além do atual; os anteriores são desanexados (0 = todos).")
+@with_appcontext
+def manutencao_os_command(arquivo):
+    """Cria as próximas partições de service_orders, arquiva as antigas e atualiza as estatísticas."""
+    resultado = manter_service_orders(meses_arquivo=arquivo)
+    if not resultado:
+        click.echo("⚠️ Nada a fazer: manutenção disponível apenas no PostgreSQL")
+        return
+    click.echo(f"✅ Partições criadas: {', '.join(resultado['criadas']) or '-'}; "
+               f"arquivadas: {', '.join(resultado['arquivadas']) or '-'}; "
+               + ", ".join(f"{etapa}: {segundos}s" for etapa, segundos in resultado['tempos'].items()))
+    if resultado['falhas']:
+        for nome, erro in resultado['falhas'].items():
+            click.echo(f"❌ {nome}: {erro}")
+        raise SystemExit(1)
+
+
+@click.command('manutencao-auditoria')
+@click.option('--retencao', default=AUDIT_RETENTION_MONTHS, show_default=True,
+              help="Meses de auditoria compacta mantidos além do atual (0 = todos).")
+@with_appcontext
+def manutencao_auditoria_command(retencao):
+    """Cria as próximas partições de audit_records e apaga as mais antigas que a retenção."""
+    resultado = manter_auditoria(meses_retencao=retencao)
+    click.echo(f"✅ Partições criadas: {', '.join(resultado['criadas']) or '-'}; "
+               f"apagadas: {', '.join(resultado['apagadas']) or '-'}; "
+               f"linhas apagadas: {resultado['linhas_apagadas']}")
+    if resultado['falhas']:
+        for nome, erro in resultado['falhas'].items():
+            click.echo(f"❌ {nome}: {erro}")
+        raise SystemExit(1)
+
+
+@click.command('limpar-cache-os')
+@click.option('--dias', default=OS_PAYLOAD_RETENTION_DAYS, show_default=True,
+              help="Dias de finalização mantidos no cache de respostas da API.")
+def limpar_cache_os_command(dias):
+    """Apaga do cache de respostas da API as OS mais antigas que a retenção e compacta o arquivo."""
+    store = get_payload_store()
+    if store is None:
+        click.echo("⚠️ Nada a fazer: cache de respostas desativado (OS_PAYLOAD_CACHE)")
+        return
+    apagadas = store.prune(dias)
+    stats = store.stats()
+    click.echo(f"✅ {apagadas} respostas apagadas; restam {stats['payloads']} "
+               f"({stats['compressed_bytes'] / 1024 / 1024:.1f} MB) em {stats['path']}")
@@ -1 +1 @@
-from .connection import db
+from .connection import db, lock_transacao
@@ -1,3 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
 
 db = SQLAlchemy()
+
+
+def lock_transacao(nome: str, conexao=None):
+    """
+    Trava nomeada (pg_advisory_xact_lock) liberada no commit/rollback da
+    transação atual da sessão (ou da conexão informada). Serializa entre
+    processos trechos como a criação de técnicos e tipos de serviço.
+    Sem efeito fora do PostgreSQL.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        (conexao or db.session).execute(text("SELECT pg_advisory_xact_lock(hashtext(:nome))"), {'nome': nome})
@@ -0,0 +1,150 @@
+import re
+from datetime import datetime
+
+from sqlalchemy import text
+
+from .connection import db
+
+# Partições mensais por intervalo: <tabela>_AAAA_MM, com [1º dia do mês, 1º dia do mês seguinte),
+# e <tabela>_default para o que não cai em nenhuma delas (inclusive NULL na coluna da partição)
+
+
+def somar_meses(ano: int, mes: int, meses: int):
+    total = ano * 12 + (mes - 1) + meses
+    return total // 12, total % 12 + 1
+
+
+def nome_particao(tabela: str, ano: int, mes: int) -> str:
+    return f'{tabela}_{ano:04d}_{mes:02d}'
+
+
+def particao_default(tabela: str) -> str:
+    return f'{tabela}_default'
+
+
+def particoes_mensais(tabela: str) -> dict:
+    """{(ano, mês): nome} das partições mensais anexadas à tabela (PostgreSQL)."""
+    nomes = db.session.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :tabela"
+    ), {'tabela': tabela}).scalars()
+
+    mensal = re.compile(rf'^{re.escape(tabela)}_(\d{{4}})_(\d{{2}})$')
+    particoes = {}
+    for nome in nomes:
+        encontrado = mensal.match(nome)
+        if encontrado:
+            particoes[(int(encontrado.group(1)), int(encontrado.group(2)))] = nome
+    return particoes
+
+
+def meses_na_default(tabela: str, coluna: str) -> list:
+    """(ano, mês) das linhas que caíram na partição default (PostgreSQL)."""
+    rows = db.session.execute(text(
+        f"SELECT DISTINCT CAST(EXTRACT(YEAR FROM {coluna}) AS INTEGER), "
+        f"CAST(EXTRACT(MONTH FROM {coluna}) AS INTEGER) FROM {particao_default(tabela)} "
+        f"WHERE {coluna} IS NOT NULL"
+    )).all()
+    db.session.commit()
+    return sorted((ano, mes) for ano, mes in rows)
+
+
+def criar_particao(tabela: str, coluna: str, ano: int, mes: int):
+    """
+    Cria a partição do mês (PostgreSQL), em uma transação própria. Se a
+    partição default já tiver linhas do mês, o PostgreSQL recusaria a nova
+    partição: a default é desanexada, as linhas do mês são movidas para a
+    nova partição e a default é anexada de novo, tudo na mesma transação
+    (gravações na tabela esperam o fim dela). Faz commit.
+    """
+    fim_ano, fim_mes = somar_meses(ano, mes, 1)
+    nome, default = nome_particao(tabela, ano, mes), particao_default(tabela)
+    inicio, fim = f"{ano:04d}-{mes:02d}-01", f"{fim_ano:04d}-{fim_mes:02d}-01"
+    no_mes = f"{coluna} >= '{inicio}' AND {coluna} < '{fim}'"
+
+    try:
+        tem_linhas = db.session.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {no_mes})")
+        ).scalar()
+        if tem_linhas:
+            db.session.execute(text(f"ALTER TABLE {tabela} DETACH PARTITION {default}"))
+        db.session.execute(text(
+            f"CREATE TABLE {nome} PARTITION OF {tabela} FOR VALUES FROM ('{inicio}') TO ('{fim}')"
+        ))
+        if tem_linhas:
+            db.session.execute(text(f"INSERT INTO {nome} SELECT * FROM {default} WHERE {no_mes}"))
+            db.session.execute(text(f"DELETE FROM {default} WHERE {no_mes}"))
+            db.session.execute(text(f"ALTER TABLE {tabela} ATTACH PARTITION {default} DEFAULT"))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def criar_particoes(tabela: str, coluna: str, meses_a_frente: int = 2, referencia: datetime = None) -> tuple:
+    """
+    Cria as partições que faltam (PostgreSQL): a do mês de referência, as
+    dos `meses_a_frente` seguintes e as dos meses que caíram na partição
+    default (ex.: manutenção sem rodar por semanas). Cada mês em sua
+    própria transação; a falha de um não impede os demais.
+
+    Returns:
+        tuple: (nomes das partições criadas, {nome: erro} das que falharam)
+    """
+    referencia = referencia or datetime.now()
+    existentes = particoes_mensais(tabela)
+    meses = {somar_meses(referencia.year, referencia.month, deslocamento)
+             for deslocamento in range(meses_a_frente + 1)}
+    meses.update(meses_na_default(tabela, coluna))
+
+    criadas, falhas = [], {}
+    for ano, mes in sorted(meses - set(existentes)):
+        nome = nome_particao(tabela, ano, mes)
+        try:
+            criar_particao(tabela, coluna, ano, mes)
+            criadas.append(nome)
+        except Exception as e:
+            falhas[nome] = str(e)
+    return criadas, falhas
+
+
+def apagar_particoes_antes(tabela: str, ano: int, mes: int) -> list:
+    """
+    Apaga as partições mensais anteriores a (ano, mês) (PostgreSQL).
+    Faz commit.
+
+    Returns:
+        list: nomes das partições apagadas
+    """
+    apagadas = []
+    for chave, nome in sorted(particoes_mensais(tabela).items()):
+        if chave >= (ano, mes):
+            continue
+        db.session.execute(text(f"DROP TABLE IF EXISTS {nome}"))
+        apagadas.append(nome)
+
+    db.session.commit()
+    return apagadas
+
+
+def desanexar_particoes_antes(tabela: str, ano: int, mes: int) -> list:
+    """
+    Desanexa as partições mensais anteriores a (ano, mês) (PostgreSQL): cada
+    uma vira uma tabela comum com o mesmo nome, fora das consultas da tabela
+    particionada, e pode ser exportada, apagada ou anexada de novo
+    (ALTER TABLE ... ATTACH PARTITION). Faz commit.
+
+    Returns:
+        list: nomes das partições desanexadas
+    """
+    desanexadas = []
+    for chave, nome in sorted(particoes_mensais(tabela).items()):
+        if chave >= (ano, mes):
+            continue
+        db.session.execute(text(f"ALTER TABLE {tabela} DETACH PARTITION {nome}"))
+        desanexadas.append(nome)
+
+    db.session.commit()
+    return desanexadas
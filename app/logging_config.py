@@ -5,8 +5,9 @@ import logging
 from flask import g
 from sqlalchemy import event
 from sqlalchemy.orm.attributes import get_history
-from app.models.audit_log import AuditLog
+from datetime import datetime
 from app.database.connection import db
+from app.utils.audit_writer import AuditWriter, auditoria_ativa
 
 
 class PrettyColorFormatter(logging.Formatter):
@@ -73,9 +74,26 @@ def setup_logging(app):
     root_logger.success("Logging iniciado com sucesso.")
 
 def register_audit_listeners():
+    """
+    Auditoria de INSERT/UPDATE/DELETE feitos pela sessão. As linhas são
+    acumuladas por transação em session.info e gravadas só depois do commit,
+    com um único INSERT (ver AuditWriter); um rollback as descarta.
+    """
 
     def is_audit_model(obj):
-        return getattr(obj.__class__, "__tablename__", None) == "audit_logs"
+        return getattr(obj.__class__, "__tablename__", None) in ("audit_logs", "audit_records")
+
+    def audit_row(obj, action, user_id, field="*", old_value=None, new_value=None):
+        return {
+            "table_name": obj.__tablename__,
+            "record_id": str(getattr(obj, "id", "")),
+            "field": field,
+            "old_value": old_value,
+            "new_value": new_value,
+            "changed_by": user_id,
+            "changed_at": datetime.now(),
+            "action": action,
+        }
 
     # ------------------------------------------
     # BEFORE FLUSH  -> UPDATE + DELETE
@@ -83,7 +101,11 @@ def register_audit_listeners():
     @event.listens_for(db.session, "before_flush")
     def audit_before_flush(session, flush_context, instances):
 
+        if not auditoria_ativa():
+            return
+
         user_id = getattr(g, "current_user_id", 0) or 0
+        buffer = session.info.setdefault("audit_rows", [])
 
         # UPDATE
         for obj in list(session.dirty):
@@ -108,15 +130,12 @@ def register_audit_listeners():
                 if old == new:
                     continue
 
-                session.add(
-                    AuditLog(
-                        table_name=obj.__tablename__,
-                        record_id=str(getattr(obj, "id", "")),
+                buffer.append(
+                    audit_row(
+                        obj, "UPDATE", user_id,
                         field=attr.key,
                         old_value=str(old) if old is not None else None,
                         new_value=str(new) if new is not None else None,
-                        changed_by=user_id,
-                        action="UPDATE",
                     )
                 )
 
@@ -126,17 +145,7 @@ def register_audit_listeners():
             if is_audit_model(obj):
                 continue
 
-            session.add(
-                AuditLog(
-                    table_name=obj.__tablename__,
-                    record_id=str(getattr(obj, "id", "")),
-                    field="*",
-                    old_value="DELETED",
-                    new_value=None,
-                    changed_by=user_id,
-                    action="DELETE",
-                )
-            )
+            buffer.append(audit_row(obj, "DELETE", user_id, old_value="DELETED"))
 
     # ------------------------------------------
     # AFTER FLUSH → INSERT (agora com ID real)
@@ -144,21 +153,77 @@ def register_audit_listeners():
     @event.listens_for(db.session, "after_flush")
     def audit_after_flush(session, flush_context):
 
+        if not auditoria_ativa():
+            return
+
         user_id = getattr(g, "current_user_id", 0) or 0
+        buffer = session.info.setdefault("audit_rows", [])
 
         for obj in list(session.new):
 
             if is_audit_model(obj):
                 continue
 
-            session.add(
-                AuditLog(
-                    table_name=obj.__tablename__,
-                    record_id=str(getattr(obj, "id", "")),
-                    field="*",
-                    old_value=None,
-                    new_value="CREATED",
-                    changed_by=user_id,
-                    action="INSERT",
-                )
-            )
\ No newline at end of file
+            buffer.append(audit_row(obj, "INSERT", user_id, new_value="CREATED"))
+
+    # ------------------------------------------
+    # Gravação após o commit / descarte no rollback
+    # ------------------------------------------
+    @event.listens_for(db.session, "after_commit")
+    def audit_after_commit(session):
+
+        rows = session.info.pop("audit_rows", None)
+        if rows:
+            AuditWriter.submit(db.engine, rows)
+
+    @event.listens_for(db.session, "after_rollback")
+    def audit_after_rollback(session):
+
+        session.info.pop("audit_rows", None)
+
+
+def register_dashboard_cache_listeners():
+    """
+    Invalida o cache do dashboard após o commit de alterações:
+    - ServiceOrder: apenas os meses (atual e anterior) de os_data_finalizacao
+    - Técnicos, clientes e tipos de serviço: todo o cache
+    """
+    from app.models.service_order import ServiceOrder
+    from app.service.dashboard_cache import DashboardCache
+
+    reference_tables = {"experts", "customers", "type_services"}
+
+    @event.listens_for(db.session, "before_flush")
+    def dashboard_cache_before_flush(session, flush_context, instances):
+
+        months = session.info.setdefault("dashboard_cache_months", set())
+
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+
+            if getattr(obj, "__tablename__", None) in reference_tables:
+                session.info["dashboard_cache_clear"] = True
+                continue
+
+            if not isinstance(obj, ServiceOrder):
+                continue
+
+            hist = get_history(obj, "os_data_finalizacao")
+            for dt in list(hist.deleted or []) + [obj.os_data_finalizacao]:
+                if dt:
+                    months.add((dt.year, dt.month))
+
+    @event.listens_for(db.session, "after_commit")
+    def dashboard_cache_after_commit(session):
+
+        months = session.info.pop("dashboard_cache_months", set())
+
+        if session.info.pop("dashboard_cache_clear", False):
+            DashboardCache.clear()
+        elif months:
+            DashboardCache.invalidate_months(months)
+
+    @event.listens_for(db.session, "after_rollback")
+    def dashboard_cache_after_rollback(session):
+
+        session.info.pop("dashboard_cache_months", None)
+        session.info.pop("dashboard_cache_clear", None)
@@ -1 +1,2 @@
 from .audit_log import AuditLog
+from .audit_record import AuditRecord
@@ -1,6 +1,9 @@
 from app.database import db
 
 service_order_assistants = db.Table('service_order_assistants',
+    # No PostgreSQL (service_orders particionada) a chave estrangeira aponta para service_order_keys.id
     db.Column('service_order_id', db.Integer, db.ForeignKey('service_orders.id'), primary_key=True),
-    db.Column('expert_id', db.Integer, db.ForeignKey('experts.id'), primary_key=True)
+    db.Column('expert_id', db.Integer, db.ForeignKey('experts.id'), primary_key=True),
+    # A chave primária cobre (service_order_id, expert_id); este cobre a busca por técnico
+    db.Index('ix_service_order_assistants_expert', 'expert_id', 'service_order_id')
 )
\ No newline at end of file
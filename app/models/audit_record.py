@@ -0,0 +1,126 @@
+from datetime import datetime
+
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.database import db, partitions
+
+# Partições mensais: audit_records_AAAA_MM, com [1º dia do mês, 1º dia do mês seguinte)
+PARTICAO_DEFAULT = partitions.particao_default('audit_records')
+
+
+class AuditRecord(db.Model):
+    """
+    Auditoria compacta (AUDIT_FORMAT=compacto): uma linha por registro
+    alterado, com os campos modificados em changes = {campo: [antigo, novo]}.
+
+    No PostgreSQL a tabela é particionada por mês de changed_at (por isso a
+    chave primária inclui changed_at); a retenção apaga partições inteiras
+    (ver app.tasks.manutencao_auditoria). Linhas fora das partições mensais
+    existentes caem em audit_records_default, e a manutenção as move para a
+    partição do mês quando a cria.
+    """
+    __tablename__ = 'audit_records'
+    __table_args__ = (
+        # Investigações: histórico de um registro (ou de uma tabela) em um período
+        db.Index('ix_audit_records_table_record_changed_at', 'table_name', 'record_id', 'changed_at'),
+        {'postgresql_partition_by': 'RANGE (changed_at)'},
+    )
+
+    # Sequência do BIGSERIAL criado pela migração (PK composta não tem autoincremento implícito)
+    id = db.Column(db.BigInteger, db.Sequence('audit_records_id_seq'), primary_key=True)
+    changed_at = db.Column(db.DateTime, primary_key=True, default=datetime.now)
+    table_name = db.Column(db.String(100), nullable=False)
+    record_id = db.Column(db.String(100), nullable=False)
+    action = db.Column(db.String(20), nullable=False)
+    # Só UPDATE: {campo: [valor antigo, valor novo]} (valores como texto)
+    changes = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'), nullable=True)
+    changed_by = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<AuditRecord {self.table_name} {self.record_id} {self.action} {self.changed_at}>"
+
+    @classmethod
+    def history(cls, table_name: str, record_id=None, start: datetime = None, end: datetime = None,
+                limit: int = 500):
+        """
+        Alterações de uma tabela (ou de um registro dela) em [start, end), da
+        mais recente para a mais antiga. Usa o índice (table_name, record_id,
+        changed_at); com start/end, só as partições do período são lidas.
+        """
+        query = cls.query.filter(cls.table_name == table_name)
+        if record_id is not None:
+            query = query.filter(cls.record_id == str(record_id))
+        if start is not None:
+            query = query.filter(cls.changed_at >= start)
+        if end is not None:
+            query = query.filter(cls.changed_at < end)
+        return query.order_by(cls.changed_at.desc(), cls.id.desc()).limit(limit).all()
+
+    @classmethod
+    def monthly_partitions(cls) -> dict:
+        """{(ano, mês): nome} das partições mensais existentes (PostgreSQL)."""
+        return partitions.particoes_mensais(cls.__tablename__)
+
+    @classmethod
+    def months_in_default(cls) -> list:
+        """(ano, mês) das linhas que caíram na partição default (PostgreSQL)."""
+        return partitions.meses_na_default(cls.__tablename__, 'changed_at')
+
+    @classmethod
+    def create_partition(cls, ano: int, mes: int):
+        """Cria a partição do mês (PostgreSQL); ver partitions.criar_particao. Faz commit."""
+        partitions.criar_particao(cls.__tablename__, 'changed_at', ano, mes)
+
+    @classmethod
+    def create_partitions(cls, months_ahead: int = 2, reference: datetime = None) -> tuple:
+        """
+        Cria a partição do mês de referência, as dos `months_ahead` seguintes
+        e as dos meses que caíram na partição default (PostgreSQL).
+
+        Returns:
+            tuple: (nomes das partições criadas, {nome: erro} das que falharam)
+        """
+        return partitions.criar_particoes(cls.__tablename__, 'changed_at', months_ahead, reference)
+
+    @classmethod
+    def drop_partitions_before(cls, ano: int, mes: int) -> list:
+        """
+        Apaga as partições mensais anteriores a (ano, mês) (PostgreSQL).
+        Faz commit.
+
+        Returns:
+            list: nomes das partições apagadas
+        """
+        return partitions.apagar_particoes_antes(cls.__tablename__, ano, mes)
+
+    @classmethod
+    def delete_before(cls, limite: datetime) -> int:
+        """
+        Apaga as linhas anteriores a `limite`: retenção sem partições (outros
+        bancos) ou da partição default, a única que ainda as teria depois de
+        drop_partitions_before. Faz commit.
+        """
+        apagadas = cls.query.filter(cls.changed_at < limite).delete(synchronize_session=False)
+        db.session.commit()
+        return apagadas
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'table_name': self.table_name,
+            'record_id': self.record_id,
+            'action': self.action,
+            'changes': self.changes or {},
+            'changed_by': self.changed_by,
+            'changed_at': self.changed_at.isoformat(timespec='seconds'),
+        }
+
+
+# Com create_all (sem migração), garante ao menos a partição default
+event.listen(
+    AuditRecord.__table__,
+    'after_create',
+    DDL(f"CREATE TABLE IF NOT EXISTS {PARTICAO_DEFAULT} PARTITION OF audit_records DEFAULT")
+    .execute_if(dialect='postgresql'),
+)
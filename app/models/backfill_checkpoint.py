@@ -0,0 +1,56 @@
+from datetime import datetime
+from app.database import db
+
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+# Dia processado, mas com OS que não foram buscadas ou gravadas (missing_os_ids)
+STATUS_PARTIAL = 'partial'
+
+
+class BackfillCheckpoint(db.Model):
+    """Situação de cada dia já processado pelo backfill histórico."""
+    __tablename__ = 'backfill_checkpoints'
+
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_RUNNING)
+    os_count = db.Column(db.Integer, nullable=False, default=0)
+    duration_seconds = db.Column(db.Float, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    # IDs das OS do dia que faltaram (STATUS_PARTIAL); a próxima execução busca só essas
+    missing_os_ids = db.Column(db.JSON, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<BackfillCheckpoint {self.day} {self.status}>"
+
+    @classmethod
+    def done_days(cls, start_day, end_day) -> set:
+        """Dias do intervalo já concluídos."""
+        rows = db.session.query(cls.day).filter(
+            cls.day >= start_day, cls.day <= end_day, cls.status == STATUS_DONE
+        )
+        return {day for (day,) in rows}
+
+    @classmethod
+    def partial_days(cls, start_day, end_day) -> dict:
+        """{dia: IDs das OS que faltaram} dos dias do intervalo processados em parte."""
+        rows = db.session.query(cls.day, cls.missing_os_ids).filter(
+            cls.day >= start_day, cls.day <= end_day, cls.status == STATUS_PARTIAL
+        )
+        return {day: missing or [] for day, missing in rows}
+
+    @classmethod
+    def mark(cls, day, status: str, os_count: int = 0, duration_seconds: float = None, error: str = None,
+             missing_os_ids: list = None):
+        """Grava (ou substitui) a situação do dia."""
+        checkpoint = db.session.get(cls, day) or cls(day=day)
+        checkpoint.status = status
+        checkpoint.os_count = os_count
+        checkpoint.duration_seconds = duration_seconds
+        checkpoint.error = error
+        checkpoint.missing_os_ids = missing_os_ids
+        checkpoint.updated_at = datetime.now()
+        db.session.add(checkpoint)
+        db.session.commit()
+        return checkpoint
@@ -1,3 +1,4 @@
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.database import db
 
 class Customer(db.Model):
@@ -24,6 +25,21 @@ class Customer(db.Model):
         db.session.commit()
         return customer
 
+    @classmethod
+    def create_many(cls, customers: list) -> list:
+        """
+        Cria vários clientes em um único INSERT, ignorando contratos que já existem
+        (ON CONFLICT (id_contrato) DO NOTHING). Retorna [(id, id_contrato)] dos criados.
+        """
+        if not customers:
+            return []
+        stmt = pg_insert(cls).values(customers).on_conflict_do_nothing(
+            index_elements=[cls.id_contrato]
+        ).returning(cls.id, cls.id_contrato)
+        rows = db.session.execute(stmt).all()
+        db.session.commit()
+        return [tuple(row) for row in rows]
+
     @classmethod
     def get_by_id(cls, customer_id: int):
         """Busca cliente pelo ID."""
@@ -1,4 +1,5 @@
-from app.database import db
+from sqlalchemy import insert
+from app.database import db, lock_transacao
 from app.models.association_tables import service_order_assistants
 
 class Expert(db.Model):
@@ -27,6 +28,27 @@ class Expert(db.Model):
         db.session.commit()
         return expert
 
+    @classmethod
+    def create_many(cls, nomes: list) -> list:
+        """
+        Cria vários especialistas em um único INSERT. Os nomes não são únicos no
+        banco, então a criação é serializada entre processos (lock_transacao)
+        e os que já existirem são ignorados. Retorna [(id, nome)] dos criados.
+        """
+        if not nomes:
+            return []
+        lock_transacao(cls.__tablename__)
+        existentes = {nome for (nome,) in db.session.query(cls.nome).filter(cls.nome.in_(nomes))}
+        novos = [nome for nome in dict.fromkeys(nomes) if nome not in existentes]
+        rows = []
+        if novos:
+            rows = db.session.execute(
+                insert(cls).returning(cls.id, cls.nome),
+                [{'nome': nome, 'status': True} for nome in novos]
+            ).all()
+        db.session.commit()
+        return [tuple(row) for row in rows]
+
     @classmethod
     def get_by_name(cls, nome):
         return cls.query.filter_by(nome=nome).first()
@@ -37,6 +59,15 @@ class Expert(db.Model):
             return None
         return cls.query.get(expert_id)
 
+    @classmethod
+    def list_by_ids(cls, expert_ids):
+        """Busca vários especialistas em uma consulta, na ordem dos IDs informados."""
+        expert_ids = [expert_id for expert_id in dict.fromkeys(expert_ids or []) if expert_id]
+        if not expert_ids:
+            return []
+        experts = {e.id: e for e in cls.query.filter(cls.id.in_(expert_ids)).all()}
+        return [experts[expert_id] for expert_id in expert_ids if expert_id in experts]
+
     @classmethod
     def update(cls, expert_id: int, **kwargs):
         """Atualiza os dados de um especialista."""
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from app.database import db
+
+STATUS_SUCCESS = 'success'
+STATUS_FAILED = 'failed'
+
+
+class IngestionRun(db.Model):
+    """Métricas de cada execução da ingestão de OS (diária, intradiária, backfill...)."""
+    __tablename__ = 'ingestion_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, index=True)
+    finished_at = db.Column(db.DateTime, nullable=False)
+    duration_seconds = db.Column(db.Float, nullable=False)
+    rows_inserted = db.Column(db.Integer, nullable=False, default=0)
+    rows_updated = db.Column(db.Integer, nullable=False, default=0)
+    rows_skipped = db.Column(db.Integer, nullable=False, default=0)
+    rows_failed = db.Column(db.Integer, nullable=False, default=0)
+    db_write_seconds = db.Column(db.Float, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    # {endpoint: {chamadas, media_ms, p50_ms, p95_ms, max_ms, faixas_ms, contagens}}
+    latency = db.Column(db.JSON, nullable=True)
+    errors = db.Column(db.JSON, nullable=True)
+    # Resultado da rotina (meses atualizados, vazão das etapas do pipeline...)
+    summary = db.Column(db.JSON, nullable=True)
+
+    def __repr__(self):
+        return f"<IngestionRun {self.kind} {self.started_at} {self.status}>"
+
+    @classmethod
+    def record(cls, kind: str, status: str, started_at: datetime, duration_seconds: float,
+               metrics: dict, summary: dict = None):
+        """Grava uma execução a partir do resumo de um ColetorIngestao. Faz commit."""
+        run = cls(
+            kind=kind,
+            status=status,
+            started_at=started_at,
+            finished_at=started_at + timedelta(seconds=duration_seconds),
+            duration_seconds=duration_seconds,
+            rows_inserted=metrics.get('inseridas', 0),
+            rows_updated=metrics.get('atualizadas', 0),
+            rows_skipped=metrics.get('inalteradas', 0),
+            rows_failed=metrics.get('falhas', 0),
+            db_write_seconds=metrics.get('gravacao_s', 0),
+            error_count=metrics.get('total_erros', 0),
+            latency=metrics.get('latencias') or None,
+            errors=metrics.get('erros') or None,
+            summary=summary,
+        )
+        db.session.add(run)
+        db.session.commit()
+        return run
+
+    @classmethod
+    def recent(cls, days: int = 30, kind: str = None, limit: int = 2000):
+        """Execuções dos últimos `days` dias, da mais antiga para a mais recente."""
+        query = cls.query.filter(cls.started_at >= datetime.now() - timedelta(days=days))
+        if kind:
+            query = query.filter_by(kind=kind)
+        runs = query.order_by(cls.started_at.desc()).limit(limit).all()
+        return runs[::-1]
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'duration_seconds': round(self.duration_seconds, 2),
+            'rows_inserted': self.rows_inserted,
+            'rows_updated': self.rows_updated,
+            'rows_skipped': self.rows_skipped,
+            'rows_failed': self.rows_failed,
+            'db_write_seconds': round(self.db_write_seconds, 2),
+            'error_count': self.error_count,
+            'latency': self.latency or {},
+            'errors': self.errors or [],
+        }
@@ -0,0 +1,123 @@
+import contextvars
+import os
+import socket
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.database import db
+
+
+def holder_id() -> str:
+    """Identifica o processo que detém a concessão (host:pid)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ConcessaoPerdida(RuntimeError):
+    """A concessão expirou ou passou para outra execução antes do fim do trabalho."""
+
+
+class JobLease(db.Model):
+    """
+    Concessão de execução de um job agendado. Todos os workers disparam o job
+    no mesmo horário, mas só quem consegue a concessão executa: no máximo uma
+    execução por disparo (slot) e nenhuma enquanto outra estiver em andamento.
+    """
+    __tablename__ = 'job_leases'
+
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(255), nullable=True)
+    slot = db.Column(db.DateTime, nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<JobLease {self.name} {self.holder} slot={self.slot}>"
+
+    @classmethod
+    def acquire(cls, name: str, slot: datetime, ttl_seconds: int) -> bool:
+        """
+        Tenta obter a concessão do job para o disparo `slot`, válida por ttl_seconds
+        (expira sozinha se o processo morrer). Falha se o slot já foi executado
+        ou se outra execução ainda detém a concessão. Faz commit.
+        """
+        if db.session.get(cls, name) is None:
+            try:
+                db.session.add(cls(name=name))
+                db.session.commit()
+            except IntegrityError:
+                # Outro worker criou a linha ao mesmo tempo
+                db.session.rollback()
+
+        agora = datetime.now()
+        result = db.session.execute(
+            update(cls)
+            .where(cls.name == name)
+            .where(or_(cls.slot.is_(None), cls.slot < slot))
+            .where(or_(cls.locked_until.is_(None), cls.locked_until < agora))
+            .values(holder=holder_id(), slot=slot,
+                    locked_until=agora + timedelta(seconds=ttl_seconds), updated_at=agora)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    @classmethod
+    def release(cls, name: str, slot: datetime = None):
+        """
+        Libera a concessão mantida por este processo (só a do disparo `slot`,
+        se informado). Faz commit.
+        """
+        stmt = update(cls).where(cls.name == name, cls.holder == holder_id())
+        if slot is not None:
+            stmt = stmt.where(cls.slot == slot)
+        db.session.execute(stmt.values(locked_until=None, updated_at=datetime.now()))
+        db.session.commit()
+
+    @classmethod
+    def renew(cls, name: str, slot: datetime, ttl_seconds: int) -> bool:
+        """
+        Estende por ttl_seconds a concessão obtida por este processo para o
+        disparo `slot`. Falha se ela já passou para outra execução (inclusive
+        de outro job no mesmo processo, que teria outro slot). Faz commit.
+        """
+        agora = datetime.now()
+        result = db.session.execute(
+            update(cls)
+            .where(cls.name == name, cls.holder == holder_id(), cls.slot == slot)
+            .values(locked_until=agora + timedelta(seconds=ttl_seconds), updated_at=agora)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+
+# Concessão mantida pela execução em andamento no contexto atual (ver manter_concessao)
+_concessao_atual = contextvars.ContextVar("concessao_atual", default=None)
+
+
+@contextmanager
+def manter_concessao(name: str, slot: datetime, ttl_seconds: int):
+    """
+    Registra no contexto atual a concessão obtida (name, slot), para que o
+    trabalho longo feito dentro do bloco a renove com renovar_concessao.
+    """
+    token = _concessao_atual.set((name, slot, ttl_seconds))
+    try:
+        yield
+    finally:
+        _concessao_atual.reset(token)
+
+
+def renovar_concessao():
+    """
+    Renova a concessão registrada por manter_concessao, se houver. Levanta
+    ConcessaoPerdida se ela não for mais desta execução: outra pode estar
+    gravando o mesmo trabalho, então a atual deve parar.
+    """
+    concessao = _concessao_atual.get()
+    if concessao is None:
+        return
+    name, slot, ttl_seconds = concessao
+    if not JobLease.renew(name, slot, ttl_seconds):
+        raise ConcessaoPerdida(f"Concessão {name} expirou ou foi obtida por outra execução")
@@ -1,11 +1,29 @@
-from sqlalchemy import and_
-from app.database import db
+from sqlalchemy import and_, bindparam, delete, func, insert, select, text, update
+from sqlalchemy.orm import joinedload, selectinload
+from app.database import db, lock_transacao, partitions
 from datetime import datetime, date
+import logging
 
+from app.models.association_tables import service_order_assistants
 from app.models.expert import Expert
 from app.models.type_service import TypeService
 
+logger = logging.getLogger(__name__)
+
 class ServiceOrder(db.Model):
+    """
+    No PostgreSQL a tabela é particionada por mês de os_data_finalizacao
+    (migração a3d7f1c9e254): service_orders_AAAA_MM e service_orders_default,
+    que recebe as OS sem finalização e as de meses ainda sem partição (a
+    manutenção as move quando cria a partição). Consultas de um mês leem só a
+    partição dele.
+
+    Uma tabela particionada não tem chave única fora da coluna da partição:
+    a unicidade de id e de os_id fica em service_order_keys, mantida por
+    gatilho e referenciada por service_order_assistants. O modelo segue
+    descrevendo a tabela simples (id chave primária, os_id único), que é o
+    que create_all cria fora das migrações.
+    """
     __tablename__ = 'service_orders'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -17,6 +35,8 @@ class ServiceOrder(db.Model):
     os_servicoprestado = db.Column(db.Text, nullable=False)
     retrabalho = db.Column(db.Boolean, nullable=False, default=False)
     observacoes = db.Column(db.Text, nullable=True)
+    # Hash dos dados importados da API; reimportações idênticas não regravam a ordem
+    payload_hash = db.Column(db.String(64), nullable=True)
     
     type_service_id = db.Column(db.Integer, db.ForeignKey('type_services.id'), nullable=False)
     type_service = db.relationship("TypeService", backref="service_orders")
@@ -24,6 +44,23 @@ class ServiceOrder(db.Model):
     os_tecnico_responsavel = db.Column(db.Integer, db.ForeignKey('experts.id'), nullable=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
 
+    __table_args__ = (
+        # Usado por list_finalized_months (PostgreSQL)
+        db.Index(
+            'ix_service_orders_finalizacao_mes',
+            func.date_trunc('month', os_data_finalizacao)
+        ).ddl_if(dialect='postgresql'),
+        # Períodos do dashboard e do rollup mensal
+        db.Index('ix_service_orders_finalizacao', os_data_finalizacao),
+        db.Index('ix_service_orders_agendamento', os_data_agendamento),
+        # get_retrabalho_by_interval
+        db.Index('ix_service_orders_responsavel_retrabalho_finalizacao',
+                 os_tecnico_responsavel, retrabalho, os_data_finalizacao),
+        # get_by_customer_id e reincidências (get_repeated_services)
+        db.Index('ix_service_orders_customer_finalizacao', customer_id, os_data_finalizacao),
+        db.Index('ix_service_orders_type_service', type_service_id),
+    )
+
     def __repr__(self):
         return f"<ServiceOrder {self.os_id}>"
 
@@ -51,14 +88,141 @@ class ServiceOrder(db.Model):
         db.session.add(order)
 
         if assistants:
-            for assistant_id in assistants:
-                assistant = Expert.query.get(assistant_id)
-                if assistant:
-                    order.os_tecnicos_auxiliares.append(assistant)
+            order.os_tecnicos_auxiliares.extend(Expert.list_by_ids(assistants))
 
         db.session.commit()
         return order
 
+    @classmethod
+    def upsert_many(cls, orders: list, previous_months: set = None) -> dict:
+        """
+        Insere ou atualiza várias ordens: um SELECT das já gravadas (por os_id),
+        um INSERT das novas e um UPDATE por id das demais. Sem INSERT ... ON
+        CONFLICT, que exigiria os_id único na própria tabela particionada; a
+        trava lock_transacao serializa as gravações concorrentes até o commit.
+        Cada item segue os campos de create(); 'assistants' (lista de IDs) substitui
+        os técnicos auxiliares da ordem. Itens com 'payload_hash' só atualizam ordens
+        cujo hash gravado é diferente; as idênticas não são tocadas. Não faz commit.
+        previous_months (opcional) recebe o (ano, mês) de finalização anterior das
+        ordens atualizadas que mudaram de mês, cujo rollup também fica desatualizado.
+
+        Returns:
+            dict: os_id -> id das ordens inseridas ou atualizadas
+        """
+        rows = {}
+        assistants = {}
+        for data in orders:
+            data = dict(data)
+            os_id = data['os_id']
+            assistants[os_id] = data.pop('assistants', None) or []
+            data['os_data_cadastro'] = data.get('os_data_cadastro') or datetime.now()
+            rows[os_id] = data
+
+        if not rows:
+            return {}
+
+        columns = set().union(*rows.values())
+
+        lock_transacao(cls.__tablename__)
+        table = cls.__table__
+        existing = {
+            os_id: (order_id, finalizacao, payload_hash)
+            for os_id, order_id, finalizacao, payload_hash in db.session.execute(
+                select(table.c.os_id, table.c.id, table.c.os_data_finalizacao, table.c.payload_hash)
+                .where(table.c.os_id.in_(rows))
+            )
+        }
+
+        new_values = [
+            {'retrabalho': False, **{column: data.get(column) for column in columns}}
+            for os_id, data in rows.items() if os_id not in existing
+        ]
+        # Atualizadas pelo id e pela finalização gravada: no PostgreSQL só a partição da OS é lida
+        updated = {}
+        changed = {True: [], False: []}
+        for os_id, data in rows.items():
+            if os_id not in existing:
+                continue
+            order_id, finalizacao, payload_hash = existing[os_id]
+            if 'payload_hash' in columns and payload_hash == data.get('payload_hash'):
+                continue
+            params = {f'v_{column}': data.get(column) for column in columns if column != 'os_id'}
+            params.update(b_id=order_id, b_finalizacao=finalizacao)
+            changed[finalizacao is None].append(params)
+            updated[os_id] = order_id
+
+            nova = data.get('os_data_finalizacao')
+            if previous_months is not None and finalizacao is not None and 'os_data_finalizacao' in columns \
+                    and (nova is None or (nova.year, nova.month) != (finalizacao.year, finalizacao.month)):
+                previous_months.add((finalizacao.year, finalizacao.month))
+
+        ids = {}
+        if new_values:
+            ids.update(db.session.execute(
+                insert(table).returning(table.c.os_id, table.c.id), new_values
+            ).all())
+
+        set_values = {column: bindparam(f'v_{column}') for column in columns if column != 'os_id'}
+        for sem_finalizacao, params in changed.items():
+            if not params:
+                continue
+            same_month = table.c.os_data_finalizacao.is_(None) if sem_finalizacao \
+                else table.c.os_data_finalizacao == bindparam('b_finalizacao')
+            db.session.execute(
+                update(table).where(table.c.id == bindparam('b_id'), same_month).values(set_values), params
+            )
+        ids.update(updated)
+
+        if not ids:
+            return {}
+
+        db.session.execute(
+            delete(service_order_assistants)
+            .where(service_order_assistants.c.service_order_id.in_(ids.values()))
+        )
+        assistant_rows = [
+            {'service_order_id': order_id, 'expert_id': expert_id}
+            for os_id, order_id in ids.items()
+            for expert_id in dict.fromkeys(assistants[os_id])
+            if expert_id
+        ]
+        if assistant_rows:
+            db.session.execute(insert(service_order_assistants), assistant_rows)
+
+        return ids
+
+    @classmethod
+    def payload_hashes(cls, os_ids: list) -> dict:
+        """os_id -> payload_hash gravado, dos os_id informados que já estão gravados."""
+        if not os_ids:
+            return {}
+        return dict(db.session.query(cls.os_id, cls.payload_hash).filter(cls.os_id.in_(os_ids)))
+
+    @classmethod
+    def create_partitions(cls, months_ahead: int = 2, reference: datetime = None) -> tuple:
+        """
+        Cria a partição do mês de referência, as dos `months_ahead` seguintes
+        e as dos meses que caíram na partição default (PostgreSQL).
+
+        Returns:
+            tuple: (nomes das partições criadas, {nome: erro} das que falharam)
+        """
+        return partitions.criar_particoes(cls.__tablename__, 'os_data_finalizacao', months_ahead, reference)
+
+    @classmethod
+    def detach_partitions_before(cls, ano: int, mes: int) -> list:
+        """
+        Arquiva os meses anteriores a (ano, mês) desanexando as partições
+        (PostgreSQL): somem do dashboard e das consultas sem apagar nada. As
+        chaves em service_order_keys e os auxiliares continuam gravados, então
+        a partição pode ser anexada de novo; até lá, OS desses meses não são
+        regravadas (o os_id segue reservado). Faz commit.
+
+        Returns:
+            list: nomes das partições desanexadas
+        """
+        return partitions.desanexar_particoes_antes(cls.__tablename__, ano, mes)
+
     @classmethod
     def get_by_customer_id(cls, customer_id: int):
         """Busca ServiceOrder pelo ID."""
@@ -74,6 +238,56 @@ class ServiceOrder(db.Model):
         """Busca uma OS pelo os_id."""
         return cls.query.filter_by(os_id=os_id).first()
     
+    @classmethod
+    def list_finalized_between(cls, start_date: datetime, end_date: datetime, customer_ids=None):
+        """
+        Lista as ordens finalizadas em [start_date, end_date), ordenadas por ID,
+        já com técnicos auxiliares, técnico responsável, tipo de serviço e cliente carregados.
+        customer_ids (lista ou subquery) restringe a busca a esses clientes.
+        """
+        query = (
+            cls.query
+                .options(
+                    selectinload(cls.os_tecnicos_auxiliares),
+                    joinedload(cls.tecnico_responsavel),
+                    joinedload(cls.type_service),
+                    joinedload(cls.customer),
+                )
+                .filter(cls.os_data_finalizacao >= start_date)
+                .filter(cls.os_data_finalizacao < end_date)
+        )
+
+        if customer_ids is not None:
+            query = query.filter(cls.customer_id.in_(customer_ids))
+
+        return query.order_by(cls.id.asc()).all()
+
+    @classmethod
+    def list_finalized_months(cls):
+        """
+        Retorna os (ano, mês) com ordens finalizadas, do mais recente ao mais antigo.
+
+        Percorre o índice ix_service_orders_finalizacao_mes saltando de mês em mês
+        (uma busca no índice por mês existente), sem ler as linhas da tabela.
+        """
+        query = text("""
+            WITH RECURSIVE meses AS (
+                SELECT MAX(date_trunc('month', os_data_finalizacao)) AS mes
+                FROM service_orders
+                UNION ALL
+                SELECT (
+                    SELECT MAX(date_trunc('month', so.os_data_finalizacao))
+                    FROM service_orders so
+                    WHERE date_trunc('month', so.os_data_finalizacao) < meses.mes
+                )
+                FROM meses
+                WHERE meses.mes IS NOT NULL
+            )
+            SELECT mes FROM meses WHERE mes IS NOT NULL
+        """)
+
+        return [(mes.year, mes.month) for (mes,) in db.session.execute(query)]
+
     @classmethod
     def get_service_orders_grouped(cls, month: int = None, year: int = None):
         """
@@ -101,31 +315,39 @@ class ServiceOrder(db.Model):
         else:
             end_date = date(year, month + 1, 1)
 
-        base_query = db.session.query(ServiceOrder).filter(
-            and_(
-                ServiceOrder.os_data_agendamento >= start_date,
-                ServiceOrder.os_data_agendamento < end_date
-            )
+        period_filter = and_(
+            ServiceOrder.os_data_agendamento >= start_date,
+            ServiceOrder.os_data_agendamento < end_date
         )
 
-        orders = base_query.all()
-        result = {}
-
-        for order in orders:
+        responsible_rows = (
+            db.session.query(
+                ServiceOrder.os_tecnico_responsavel,
+                ServiceOrder.type_service_id,
+                func.count(ServiceOrder.id)
+            )
+            .filter(period_filter)
+            .group_by(ServiceOrder.os_tecnico_responsavel, ServiceOrder.type_service_id)
+        )
 
-            resp_id = order.os_tecnico_responsavel
-            ts_id = order.type_service_id
-            
-            if resp_id not in result:
-                result[resp_id] = {}
+        assistant_rows = (
+            db.session.query(
+                service_order_assistants.c.expert_id,
+                ServiceOrder.type_service_id,
+                func.count(ServiceOrder.id)
+            )
+            .join(ServiceOrder, ServiceOrder.id == service_order_assistants.c.service_order_id)
+            .filter(period_filter)
+            .group_by(service_order_assistants.c.expert_id, ServiceOrder.type_service_id)
+        )
 
-            result[resp_id][ts_id] = result[resp_id].get(ts_id, 0) + 1
+        result = {}
 
-            for assistant in order.os_tecnicos_auxiliares:
-                asst_id = assistant.id
-                if asst_id not in result:
-                    result[asst_id] = {}
-                result[asst_id][ts_id] = result[asst_id].get(ts_id, 0) + 1
+        for rows in (responsible_rows, assistant_rows):
+            for expert_id, ts_id, count in rows:
+                if expert_id not in result:
+                    result[expert_id] = {}
+                result[expert_id][ts_id] = result[expert_id].get(ts_id, 0) + count
 
         return result
 
@@ -177,11 +399,10 @@ class ServiceOrder(db.Model):
         
         # Atualiza técnicos auxiliares se fornecidos
         if assistants is not None:
-            order.os_tecnicos_auxiliares = []
-            for assistant_id in assistants:
-                assistant = Expert.query.get(assistant_id)
-                if assistant:
-                    order.os_tecnicos_auxiliares.append(assistant)
+            order.os_tecnicos_auxiliares = Expert.list_by_ids(assistants)
+
+        # Editada fora da importação: a próxima importação regrava os dados da API
+        order.payload_hash = None
         
         db.session.commit()
         return order
@@ -190,7 +411,7 @@ class ServiceOrder(db.Model):
     def update_retrabalho(cls, os_id: str, retrabalho: bool, observacao: str = None):
         """
         Atualiza o campo 'retrabalho' de uma ServiceOrder usando os_id.
-        Retorna o objeto atualizado ou None se não existir.
+        Retorna o objeto atualizado ou None se não existir ou não for gravado.
         """
         try:
             order = cls.query.filter_by(os_id=os_id).first()
@@ -200,12 +421,24 @@ class ServiceOrder(db.Model):
             order.retrabalho = bool(retrabalho)
             order.observacoes = observacao
             db.session.commit()
-            return order
 
         except Exception:
             db.session.rollback()
             return None
 
+        if order.os_data_finalizacao:
+            from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
+            try:
+                ServiceOrderMonthlyStats.refresh_month(
+                    order.os_data_finalizacao.year, order.os_data_finalizacao.month
+                )
+            except Exception as e:
+                # A alteração já foi gravada; o rollup fica desatualizado até o próximo recálculo do mês
+                logger.error(f"❌ Erro ao recalcular o rollup de {order.os_data_finalizacao:%Y-%m} "
+                             f"após alterar o retrabalho da OS {os_id}: {e}")
+
+        return order
+
     @classmethod
     def delete(cls, order_id: int) -> bool:
         """Deleta uma ServiceOrder pelo ID."""
@@ -0,0 +1,222 @@
+from datetime import datetime
+from sqlalchemy import case, delete, exists, extract, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.database import db, lock_transacao
+from app.models.association_tables import service_order_assistants
+from app.models.service_order import ServiceOrder
+
+ROLE_RESPONSIBLE = 'responsible'
+ROLE_ASSISTANT = 'assistant'
+
+# Ordens sem técnico responsável são agregadas com expert_id = 0
+NO_EXPERT_ID = 0
+
+
+class ServiceOrderMonthlyStatsBuild(db.Model):
+    """
+    Meses cujo rollup já foi montado, inclusive os sem nenhuma ordem
+    finalizada (que não têm linhas em service_order_monthly_stats).
+    """
+    __tablename__ = 'service_order_monthly_stats_builds'
+
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    built_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+class ServiceOrderMonthlyStats(db.Model):
+    """
+    Rollup mensal das ordens de serviço, por técnico, papel e tipo de serviço.
+
+    Cada linha conta as ordens finalizadas no mês (os_data_finalizacao) em que
+    o técnico participou no papel indicado. Como o tipo de serviço faz parte
+    da chave, a separação entre realizados e categorias bloqueadas é feita na
+    leitura, a partir do nome do tipo.
+    """
+    __tablename__ = 'service_order_monthly_stats'
+    __table_args__ = (
+        db.UniqueConstraint('year', 'month', 'expert_id', 'role', 'type_service_id',
+                            name='uq_service_order_monthly_stats_key'),
+        db.Index('ix_service_order_monthly_stats_year_month', 'year', 'month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    expert_id = db.Column(db.Integer, nullable=False)
+    role = db.Column(db.String(20), nullable=False)
+    type_service_id = db.Column(db.Integer, nullable=False)
+
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+    with_assist_count = db.Column(db.Integer, nullable=False, default=0)
+    retrabalho_count = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<ServiceOrderMonthlyStats {self.year}-{self.month:02d} {self.expert_id} {self.role}>"
+
+    # ---------- Manutenção ----------
+
+    # Meses já montados neste processo (o marcador nunca é removido)
+    _built_months = set()
+
+    @staticmethod
+    def _lock_name(year: int, month: int) -> str:
+        return f'service_order_monthly_stats:{year:04d}-{month:02d}'
+
+    @classmethod
+    def _refresh_statements(cls, year: int, month: int) -> list:
+        """DELETE + INSERT ... SELECT do rollup do mês e o marcador de montagem."""
+        start_date = datetime(year, month, 1)
+        end_date = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+
+        month_filter = (
+            ServiceOrder.os_data_finalizacao >= start_date,
+            ServiceOrder.os_data_finalizacao < end_date,
+        )
+        has_assist = ServiceOrder.os_tecnicos_auxiliares.any()
+        now = datetime.now()
+
+        def counters():
+            return (
+                func.count(ServiceOrder.id),
+                func.sum(case((has_assist, 1), else_=0)),
+                func.sum(case((ServiceOrder.retrabalho.is_(True), 1), else_=0)),
+                literal(now),
+            )
+
+        responsible_expert = func.coalesce(ServiceOrder.os_tecnico_responsavel, NO_EXPERT_ID)
+        responsible = (
+            select(
+                literal(year), literal(month), responsible_expert,
+                literal(ROLE_RESPONSIBLE), ServiceOrder.type_service_id, *counters()
+            )
+            .where(*month_filter)
+            .group_by(responsible_expert, ServiceOrder.type_service_id)
+        )
+
+        assistant = (
+            select(
+                literal(year), literal(month), service_order_assistants.c.expert_id,
+                literal(ROLE_ASSISTANT), ServiceOrder.type_service_id, *counters()
+            )
+            .join(ServiceOrder, ServiceOrder.id == service_order_assistants.c.service_order_id)
+            .where(*month_filter)
+            .group_by(service_order_assistants.c.expert_id, ServiceOrder.type_service_id)
+        )
+
+        columns = [
+            'year', 'month', 'expert_id', 'role', 'type_service_id',
+            'total_count', 'with_assist_count', 'retrabalho_count', 'updated_at',
+        ]
+        marker = pg_insert(ServiceOrderMonthlyStatsBuild).values(year=year, month=month, built_at=now)
+        marker = marker.on_conflict_do_update(
+            index_elements=['year', 'month'], set_={'built_at': marker.excluded.built_at}
+        )
+
+        return [
+            delete(cls).where(cls.year == year, cls.month == month),
+            insert(cls).from_select(columns, responsible),
+            insert(cls).from_select(columns, assistant),
+            marker,
+        ]
+
+    @classmethod
+    def refresh_month(cls, year: int, month: int, commit: bool = True):
+        """Recalcula o rollup de um mês a partir de service_orders."""
+        try:
+            # Recalcular o mesmo mês em paralelo violaria a chave única do rollup
+            lock_transacao(cls._lock_name(year, month))
+            for statement in cls._refresh_statements(year, month):
+                db.session.execute(statement)
+            if commit:
+                db.session.commit()
+                cls._built_months.add((year, month))
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @classmethod
+    def refresh_months(cls, months):
+        """Recalcula o rollup de cada (ano, mês) informado."""
+        for year, month in sorted(set(months)):
+            cls.refresh_month(year, month)
+
+    @classmethod
+    def refresh_for_orders(cls, order_ids: list, previous_months=None):
+        """
+        Recalcula somente os meses em que as ordens informadas foram finalizadas
+        e os previous_months, (ano, mês) de onde ordens atualizadas saíram
+        (ver ServiceOrder.upsert_many).
+        """
+        previous_months = set(previous_months or ())
+        if not order_ids and not previous_months:
+            return []
+
+        query = (
+            db.session.query(
+                extract('year', ServiceOrder.os_data_finalizacao),
+                extract('month', ServiceOrder.os_data_finalizacao),
+            )
+            .filter(ServiceOrder.id.in_(order_ids))
+            .filter(ServiceOrder.os_data_finalizacao.isnot(None))
+            .distinct()
+        )
+        months = {(int(year), int(month)) for year, month in query} if order_ids else set()
+        months.update(previous_months)
+
+        cls.refresh_months(months)
+        return sorted(months)
+
+    @classmethod
+    def ensure_month(cls, year: int, month: int):
+        """
+        Monta o rollup do mês na primeira leitura, caso ainda não tenha sido
+        montado (meses sem ordens também ficam marcados). A montagem usa uma
+        conexão própria: não faz commit na sessão da requisição nem expira os
+        objetos já carregados nela.
+        """
+        if (year, month) in cls._built_months:
+            return
+
+        built = exists().where(
+            ServiceOrderMonthlyStatsBuild.year == year, ServiceOrderMonthlyStatsBuild.month == month
+        )
+        if not db.session.scalar(select(built)):
+            with db.engine.begin() as conn:
+                lock_transacao(cls._lock_name(year, month), conn)
+                # Outro processo pode ter montado o mês enquanto esperávamos a trava
+                if not conn.scalar(select(built)):
+                    for statement in cls._refresh_statements(year, month):
+                        conn.execute(statement)
+
+        cls._built_months.add((year, month))
+
+    @classmethod
+    def touch_all(cls):
+        """
+        Renova updated_at de todo o rollup, mudando a versão de todos os meses.
+        Usado quando dados de referência (nomes de técnicos, tipos, contratos)
+        mudam sem alterar as contagens.
+        """
+        cls.query.update({cls.updated_at: datetime.now()}, synchronize_session=False)
+        db.session.commit()
+
+    # ---------- Versão dos dados ----------
+
+    @classmethod
+    def month_version(cls, year: int, month: int) -> tuple:
+        """
+        Versão dos dados de um mês: (maior updated_at, quantidade de linhas).
+        Muda sempre que o rollup do mês é recalculado.
+        """
+        cls.ensure_month(year, month)
+        return db.session.query(
+            func.max(cls.updated_at), func.count(cls.id)
+        ).filter(cls.year == year, cls.month == month).one()
+
+    @classmethod
+    def global_version(cls) -> tuple:
+        """Versão de todo o rollup: (maior updated_at, quantidade de linhas)."""
+        return db.session.query(func.max(cls.updated_at), func.count(cls.id)).one()
@@ -0,0 +1,89 @@
+from datetime import datetime
+from app.database import db
+
+STATUS_PENDING = 'pending'
+STATUS_DEAD = 'dead'
+
+ETAPA_BUSCA = 'busca'
+ETAPA_PREPARO = 'preparo'
+ETAPA_GRAVACAO = 'gravacao'
+
+
+class SyncFailure(db.Model):
+    """
+    OS que a sincronização incremental não conseguiu buscar ou gravar.
+    Pendentes são tentadas de novo a cada execução; ao atingir o limite de
+    tentativas (ou se forem ignoradas no preparo, sem cliente ou tipo de
+    serviço) são descartadas e deixam de segurar a marca d'água.
+    """
+    __tablename__ = 'sync_failures'
+
+    os_id = db.Column(db.String(50), primary_key=True)
+    stage = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Data de finalização, quando conhecida (falhas de gravação e OS ignoradas)
+    finalizacao = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    first_failed_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    last_failed_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<SyncFailure {self.os_id} {self.stage} {self.status} ({self.attempts})>"
+
+    @classmethod
+    def pending_ids(cls) -> list:
+        """IDs das OS pendentes, a tentar de novo."""
+        return [os_id for (os_id,) in db.session.query(cls.os_id).filter_by(status=STATUS_PENDING)]
+
+    @classmethod
+    def dead_ids(cls, os_ids: list) -> set:
+        """IDs das OS informadas que já foram descartadas."""
+        ids = [str(os_id) for os_id in os_ids]
+        descartadas = set()
+        for start in range(0, len(ids), 1000):
+            descartadas.update(os_id for (os_id,) in db.session.query(cls.os_id).filter(
+                cls.os_id.in_(ids[start:start + 1000]), cls.status == STATUS_DEAD
+            ))
+        return descartadas
+
+    @classmethod
+    def record(cls, falhas: dict, max_attempts: int) -> tuple:
+        """
+        Registra mais uma tentativa malsucedida de cada OS em falhas
+        ({os_id: {'etapa', 'erro', 'finalizacao'}}). OS ignoradas no preparo,
+        ou que atingiram max_attempts, são descartadas. Faz commit.
+
+        Returns:
+            tuple: (falhas ainda pendentes, falhas descartadas agora)
+        """
+        agora = datetime.now()
+        pendentes, descartadas = [], []
+        for os_id, falha in falhas.items():
+            registro = db.session.get(cls, os_id) or cls(os_id=os_id, attempts=0, first_failed_at=agora)
+            registro.stage = falha['etapa']
+            registro.attempts += 1
+            registro.finalizacao = falha.get('finalizacao') or registro.finalizacao
+            registro.last_error = (falha.get('erro') or '')[:2000]
+            registro.last_failed_at = agora
+            if falha['etapa'] == ETAPA_PREPARO or registro.attempts >= max_attempts:
+                registro.status = STATUS_DEAD
+                descartadas.append(registro)
+            else:
+                registro.status = STATUS_PENDING
+                pendentes.append(registro)
+            db.session.add(registro)
+
+        db.session.commit()
+        return pendentes, descartadas
+
+    @classmethod
+    def resolve(cls, os_ids: list) -> int:
+        """Remove as falhas das OS que foram processadas. Faz commit."""
+        ids = [str(os_id) for os_id in os_ids]
+        removidas = 0
+        for start in range(0, len(ids), 1000):
+            removidas += cls.query.filter(cls.os_id.in_(ids[start:start + 1000])) \
+                .delete(synchronize_session=False)
+        db.session.commit()
+        return removidas
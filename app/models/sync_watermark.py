@@ -0,0 +1,46 @@
+from datetime import datetime
+from app.database import db
+
+
+class SyncWatermark(db.Model):
+    """
+    Marca d'água da sincronização incremental com a API: a maior
+    (data de finalização, id da OS) já gravada para cada fonte.
+    """
+    __tablename__ = 'sync_watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    last_finalizacao = db.Column(db.DateTime, nullable=True)
+    last_os_id = db.Column(db.BigInteger, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<SyncWatermark {self.name} {self.last_finalizacao} #{self.last_os_id}>"
+
+    @property
+    def position(self) -> tuple:
+        """(last_finalizacao, last_os_id), comparável com as posições das OS."""
+        return (self.last_finalizacao or datetime.min, self.last_os_id or 0)
+
+    @classmethod
+    def get(cls, name: str):
+        return db.session.get(cls, name)
+
+    @classmethod
+    def advance(cls, name: str, finalizacao: datetime, os_id: int):
+        """
+        Avança a marca d'água para (finalizacao, os_id), se for posterior à atual.
+        Nunca retrocede.
+        """
+        watermark = cls.get(name)
+        if watermark is None:
+            watermark = cls(name=name)
+            db.session.add(watermark)
+        elif (finalizacao, os_id) <= watermark.position:
+            return watermark
+
+        watermark.last_finalizacao = finalizacao
+        watermark.last_os_id = os_id
+        watermark.updated_at = datetime.now()
+        db.session.commit()
+        return watermark
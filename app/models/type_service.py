@@ -1,4 +1,5 @@
-from app.database import db
+from sqlalchemy import insert
+from app.database import db, lock_transacao
 
 class TypeService(db.Model):
     __tablename__ = 'type_services'
@@ -19,6 +20,27 @@ class TypeService(db.Model):
         db.session.commit()
         return type_service
 
+    @classmethod
+    def create_many(cls, names: list) -> list:
+        """
+        Cria vários tipos de serviço em um único INSERT. Os nomes não são únicos no
+        banco, então a criação é serializada entre processos (lock_transacao)
+        e os que já existirem são ignorados. Retorna [(id, name)] dos criados.
+        """
+        if not names:
+            return []
+        lock_transacao(cls.__tablename__)
+        existentes = {name for (name,) in db.session.query(cls.name).filter(cls.name.in_(names))}
+        novos = [name for name in dict.fromkeys(names) if name not in existentes]
+        rows = []
+        if novos:
+            rows = db.session.execute(
+                insert(cls).returning(cls.id, cls.name),
+                [{'name': name} for name in novos]
+            ).all()
+        db.session.commit()
+        return [tuple(row) for row in rows]
+
     @classmethod
     def get_by_id(cls, type_service_id: int):
         """Busca um tipo de serviço pelo ID."""
@@ -0,0 +1,139 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Requisições acima deste tempo (ms) são registradas no log com as consultas mais lentas
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+# Quantas consultas mais lentas guardar por requisição
+SLOWEST_STATEMENTS = int(os.getenv("REQUEST_METRICS_SLOWEST", "3"))
+# Amostras mantidas por endpoint para o cálculo de p50/p95
+SAMPLES_PER_ENDPOINT = int(os.getenv("REQUEST_METRICS_SAMPLES", "500"))
+
+
+def percentile(values: list, pct: float) -> float:
+    """Percentil por vizinho mais próximo de uma lista já ordenada."""
+    if not values:
+        return 0
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+class RequestMetrics:
+    """
+    Amostras recentes (tempo total, tempo no banco e nº de consultas) por
+    endpoint, mantidas em memória no processo.
+    """
+
+    _lock = threading.Lock()
+    _samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_ENDPOINT))
+
+    @classmethod
+    def record(cls, endpoint: str, total_ms: float, db_ms: float, queries: int):
+        with cls._lock:
+            cls._samples[endpoint].append((total_ms, db_ms, queries))
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._samples.clear()
+
+    @classmethod
+    def stats(cls) -> list:
+        """Endpoints ordenados do pior p95 para o melhor."""
+        with cls._lock:
+            samples = {endpoint: list(values) for endpoint, values in cls._samples.items()}
+
+        result = []
+        for endpoint, values in samples.items():
+            durations = sorted(v[0] for v in values)
+            queries = [v[2] for v in values]
+            result.append({
+                'endpoint': endpoint,
+                'requests': len(values),
+                'p50_ms': round(percentile(durations, 50), 1),
+                'p95_ms': round(percentile(durations, 95), 1),
+                'max_ms': round(durations[-1], 1),
+                'avg_db_ms': round(sum(v[1] for v in values) / len(values), 1),
+                'avg_queries': round(sum(queries) / len(queries), 1),
+                'max_queries': max(queries),
+            })
+
+        return sorted(result, key=lambda item: item['p95_ms'], reverse=True)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('request_metrics_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+
+    starts = conn.info.get('request_metrics_start')
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+
+    g.sql_queries = g.get('sql_queries', 0) + 1
+    g.sql_time_ms = g.get('sql_time_ms', 0.0) + elapsed_ms
+
+    slowest = g.setdefault('sql_slowest', [])
+    item = (elapsed_ms, g.sql_queries, statement)
+    if len(slowest) < SLOWEST_STATEMENTS:
+        heapq.heappush(slowest, item)
+    else:
+        heapq.heappushpop(slowest, item)
+
+
+def register_request_metrics(app):
+    """
+    Mede cada requisição: nº de consultas SQL, tempo no banco e tempo total.
+    Devolve os valores no cabeçalho Server-Timing, registra no log as
+    requisições lentas e acumula amostras por endpoint (ver RequestMetrics).
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def request_metrics_start():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def request_metrics_finish(response):
+        start = g.get('request_start')
+        if start is None or request.endpoint == 'static':
+            return response
+
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = g.get('sql_time_ms', 0.0)
+        queries = g.get('sql_queries', 0)
+
+        response.headers.add(
+            'Server-Timing', f'db;dur={db_ms:.1f};desc="{queries} consultas", app;dur={total_ms:.1f}'
+        )
+
+        endpoint = request.endpoint or request.path
+        RequestMetrics.record(endpoint, total_ms, db_ms, queries)
+
+        if total_ms > SLOW_REQUEST_MS:
+            slowest = sorted(g.get('sql_slowest', []), reverse=True)
+            detalhes = "; ".join(
+                f"#{ordem} {elapsed:.1f}ms {' '.join(statement.split())[:200]}"
+                for elapsed, ordem, statement in slowest
+            )
+            logger.warning(
+                f"🐢 Requisição lenta: {request.method} {request.path} "
+                f"{total_ms:.0f}ms ({queries} consultas, {db_ms:.0f}ms no banco) {detalhes}"
+            )
+
+        return response
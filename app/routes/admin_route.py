@@ -2,12 +2,17 @@ from datetime import datetime
 from flask import render_template, Blueprint, request, jsonify, redirect, session, url_for
 from flask_login import current_user, login_required
 
+from app.models.audit_record import AuditRecord
+from app.models.ingestion_run import IngestionRun
+from app.request_metrics import RequestMetrics
 from app.service.customer_service import CustomerService
+from app.service.dashboard_cache import DashboardCache
 from app.service.dashboard_service import DashboardService
 from app.service.expert_service import ExpertService
 from app.service.service_order_service import ServiceOrderService
 from app.service.type_service_service import TypeServiceService
 from app.service.user_service import UserService
+from app.utils.audit_writer import AuditWriter
 from functools import wraps
 
 def admin_required(f):
@@ -460,4 +465,59 @@ def dashboard_metrics_data():
         'servicesByExpert': services_by_expert,
         'servicesWithAssist': services_with_assist,
         'servicesByCategory': services_by_category
-    })
\ No newline at end of file
+    })
+
+@admin_bp.route('/dashboard-cache-stats')
+@login_required
+@admin_required
+def dashboard_cache_stats():
+    """Contadores de acerto/falha do cache do dashboard"""
+    return jsonify({'success': True, 'data': DashboardCache.stats()})
+
+@admin_bp.route('/audit-writer-stats')
+@login_required
+@admin_required
+def audit_writer_stats():
+    """Linhas de auditoria gravadas, descartadas e pendentes na fila"""
+    return jsonify({'success': True, 'data': AuditWriter.stats()})
+
+@admin_bp.route('/request-metrics')
+@login_required
+@admin_required
+def request_metrics():
+    """Endpoints com pior tempo de resposta (p50/p95) e nº de consultas SQL"""
+    return render_template('admin/models/request_metrics.html', endpoints=RequestMetrics.stats())
+
+@admin_bp.route('/ingestion-runs')
+@login_required
+@admin_required
+def ingestion_runs():
+    """Histórico das execuções da ingestão de OS: duração, gravação, latência da API e erros"""
+    dias = request.args.get('dias', 30, type=int)
+    tipo = request.args.get('tipo') or None
+    runs = [run.to_dict() for run in IngestionRun.recent(days=dias, kind=tipo)]
+    return render_template('admin/models/ingestion_runs.html', runs=runs, dias=dias, tipo=tipo)
+
+@admin_bp.route('/api/audit-records')
+@login_required
+@admin_required
+def api_audit_records():
+    """Histórico da auditoria compacta: ?table=&record_id=&inicio=AAAA-MM-DD&fim=AAAA-MM-DD&limite="""
+    table = request.args.get('table')
+    if not table:
+        return jsonify({'success': False, 'error': "Parâmetro 'table' é obrigatório"}), 400
+
+    try:
+        inicio = datetime.fromisoformat(request.args['inicio']) if request.args.get('inicio') else None
+        fim = datetime.fromisoformat(request.args['fim']) if request.args.get('fim') else None
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    records = AuditRecord.history(
+        table,
+        record_id=request.args.get('record_id') or None,
+        start=inicio,
+        end=fim,
+        limit=min(request.args.get('limite', 500, type=int), 5000),
+    )
+    return jsonify({'success': True, 'data': [record.to_dict() for record in records]})
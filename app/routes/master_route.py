@@ -1,8 +1,13 @@
-from flask import render_template, Blueprint, request, jsonify
-from datetime import datetime
+from flask import render_template, Blueprint, request, jsonify, make_response
+from datetime import datetime, timezone
+from functools import wraps
 from app.models.service_order import ServiceOrder
+from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
 from app.models.type_service import TypeService
-from app.service.dashboard_service import DashboardService
+from app.service.dashboard_cache import DashboardCache
+from app.service.dashboard_service import (DashboardService, complete_dashboard_version,
+                                           repeated_services_version)
+import hashlib
 import logging
 
 from app.service.service_order_service import ServiceOrderService
@@ -10,6 +15,97 @@ logger = logging.getLogger(__name__)
 
 master_bp = Blueprint('master', __name__)
 
+
+def _validators(*parts, updated_at=None):
+    """Monta (ETag, Last-Modified) a partir da versão dos dados."""
+    etag = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    last_modified = None
+    if updated_at:
+        last_modified = updated_at.replace(microsecond=0).astimezone(timezone.utc)
+    return etag, last_modified
+
+
+def _not_modified(etag, last_modified) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional_get(version_loader):
+    """
+    Responde 304 Not Modified quando o cliente já possui a versão atual dos
+    dados, sem executar a view; caso contrário anexa ETag/Last-Modified à
+    resposta. version_loader() retorna (ETag, Last-Modified) ou None.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                validators = version_loader()
+            except Exception as e:
+                logger.error(f'Erro ao obter versão dos dados: {e}')
+                validators = None
+
+            if not validators:
+                return view(*args, **kwargs)
+
+            etag, last_modified = validators
+            if _not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
+def _latest(version):
+    """Maior data contida na versão (tuplas aninhadas de (updated_at, linhas))."""
+    if isinstance(version, datetime):
+        return version
+    if isinstance(version, tuple):
+        dates = [d for d in (_latest(part) for part in version) if d]
+        return max(dates) if dates else None
+    return None
+
+
+def dashboard_version(version):
+    """
+    Validadores do mês/ano da query string (mesmos padrões das rotas) a partir
+    de version(month, year), a mesma versão que a seção usa no DashboardCache.
+    """
+    def loader():
+        now = datetime.now()
+        month = request.args.get('month', type=int) or now.month
+        year = request.args.get('year', type=int) or now.year
+
+        if not (1 <= month <= 12) or year < 2000 or year > now.year + 1:
+            return None
+
+        data_version = version(month, year)
+        return _validators(year, month, data_version, updated_at=_latest(data_version))
+    return loader
+
+
+# Seções que leem só as ordens finalizadas no mês
+month_version = dashboard_version(DashboardCache.month_version)
+
+
+def months_catalog_version():
+    """Validadores da lista de meses disponíveis."""
+    updated_at, rows = ServiceOrderMonthlyStats.global_version()
+    return _validators('months', updated_at, rows, updated_at=updated_at)
+
+
 @master_bp.route('/')
 def main_dashboard():
     """Rota principal do dashboard - renderiza o template HTML"""
@@ -17,6 +113,7 @@ def main_dashboard():
     return render_template('user/index.html')
 
 @master_bp.route('/api/data')
+@conditional_get(dashboard_version(complete_dashboard_version))
 def get_dashboard_data():
     """API para obter todos os dados do dashboard com filtros opcionais"""
     try:
@@ -56,6 +153,7 @@ def get_dashboard_data():
         return jsonify({'error': f'Erro ao carregar dados: {str(e)}'}), 500
 
 @master_bp.route('/api/metrics')
+@conditional_get(dashboard_version(repeated_services_version))
 def get_metrics():
     """API para obter apenas as métricas principais"""
     try:
@@ -89,6 +187,7 @@ def get_metrics():
         return jsonify({'error': f'Erro ao carregar métricas: {str(e)}'}), 500
 
 @master_bp.route('/api/charts/services-by-expert')
+@conditional_get(month_version)
 def get_services_by_expert_chart():
     """API para obter dados do gráfico de serviços por técnico"""
     try:
@@ -117,6 +216,7 @@ def get_services_by_expert_chart():
         return jsonify({'error': f'Erro ao carregar dados do gráfico: {str(e)}'}), 500
 
 @master_bp.route('/api/charts/services-by-category')
+@conditional_get(month_version)
 def get_services_by_category_chart():
     """API para obter dados do gráfico de serviços por categoria"""
     try:
@@ -145,6 +245,7 @@ def get_services_by_category_chart():
         return jsonify({'error': f'Erro ao carregar dados do gráfico: {str(e)}'}), 500
 
 @master_bp.route('/api/charts/services-with-assist')
+@conditional_get(month_version)
 def get_services_with_assist_chart():
     """API para obter dados do gráfico de serviços com auxílio"""
     try:
@@ -173,6 +274,7 @@ def get_services_with_assist_chart():
         return jsonify({'error': f'Erro ao carregar dados do gráfico: {str(e)}'}), 500
 
 @master_bp.route('/api/charts/assistance-network')
+@conditional_get(month_version)
 def get_assistance_network_chart():
     """API para obter dados do gráfico de rede de assistência"""
     try:
@@ -201,6 +303,7 @@ def get_assistance_network_chart():
         return jsonify({'error': f'Erro ao carregar dados do gráfico: {str(e)}'}), 500
 
 @master_bp.route('/api/charts/assistance-by-service-type')
+@conditional_get(month_version)
 def get_assistance_by_service_type_chart():
     """API para obter dados do gráfico de assistência por tipo de serviço"""
     try:
@@ -229,6 +332,7 @@ def get_assistance_by_service_type_chart():
         return jsonify({'error': f'Erro ao carregar dados do gráfico: {str(e)}'}), 500
 
 @master_bp.route('/api/tables/repeated-services')
+@conditional_get(dashboard_version(repeated_services_version))
 def get_repeated_services_table():
     """API para obter dados da tabela de serviços repetidos"""
     try:
@@ -257,17 +361,10 @@ def get_repeated_services_table():
         return jsonify({'error': f'Erro ao carregar dados da tabela: {str(e)}'}), 500
 
 @master_bp.route('/api/available-months')
+@conditional_get(months_catalog_version)
 def get_available_months():
     try:
-        all_orders = ServiceOrder.list(limit=10000)
-
-        date_combinations = set()
-        for order in all_orders:
-            dt = order.os_data_finalizacao
-            if dt:
-                date_combinations.add((dt.year, dt.month))
-
-        sorted_dates = sorted(date_combinations, key=lambda x: (x[0], x[1]), reverse=True)
+        sorted_dates = ServiceOrder.list_finalized_months()
 
         available_months = [
             {
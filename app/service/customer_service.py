@@ -1,4 +1,6 @@
 from app.models.customer import Customer
+from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
+from app.service.reference_cache import ReferenceCache
 
 class CustomerService:
     @staticmethod
@@ -15,11 +17,19 @@ class CustomerService:
 
     @staticmethod
     def update_customer(customer_id: int, **kwargs) -> Customer | None:
-        return Customer.update(customer_id, **kwargs)
+        customer = Customer.update(customer_id, **kwargs)
+        if customer:
+            ServiceOrderMonthlyStats.touch_all()
+            ReferenceCache.invalidate()
+        return customer
 
     @staticmethod
     def delete_customer(customer_id: int) -> bool:
-        return Customer.delete(customer_id)
+        deleted = Customer.delete(customer_id)
+        if deleted:
+            ServiceOrderMonthlyStats.touch_all()
+            ReferenceCache.invalidate()
+        return deleted
 
     @staticmethod
     def list_customers(limit: int = 50, offset: int = 0):
@@ -0,0 +1,121 @@
+from datetime import datetime
+from sqlalchemy import case, func, select
+from app.database import db
+from app.models.expert import Expert
+from app.models.service_order import ServiceOrder
+from app.models.service_order_monthly_stats import ROLE_RESPONSIBLE, ServiceOrderMonthlyStats
+from app.models.type_service import TypeService
+from app.service.reference_cache import ReferenceCache
+
+
+class DashboardAggregation:
+    """
+    Consultas agregadas usadas pelo dashboard.
+
+    As contagens mensais são lidas do rollup service_order_monthly_stats,
+    mantido pela rotina diária; um mês ainda não agregado é montado na
+    primeira leitura a partir de service_orders.
+    """
+
+    @staticmethod
+    def month_interval(month: int, year: int) -> tuple:
+        """Retorna (início, fim) do mês como datetimes, com fim exclusivo."""
+        start_date = datetime(year, month, 1)
+        if month == 12:
+            end_date = datetime(year + 1, 1, 1)
+        else:
+            end_date = datetime(year, month + 1, 1)
+        return start_date, end_date
+
+    @staticmethod
+    def _month_rows(month: int, year: int):
+        """Garante o rollup do mês e retorna o filtro das suas linhas."""
+        ServiceOrderMonthlyStats.ensure_month(year, month)
+        return (
+            ServiceOrderMonthlyStats.year == year,
+            ServiceOrderMonthlyStats.month == month,
+        )
+
+    @staticmethod
+    def count_all_orders() -> int:
+        """Total de ordens de serviço cadastradas."""
+        return db.session.scalar(select(func.count(ServiceOrder.id))) or 0
+
+    @staticmethod
+    def count_active_experts() -> int:
+        """Total de técnicos ativos."""
+        return len(ReferenceCache.active_experts())
+
+    @staticmethod
+    def count_orders(month: int, year: int) -> int:
+        """Total de ordens finalizadas no mês."""
+        query = select(func.sum(ServiceOrderMonthlyStats.total_count)).where(
+            *DashboardAggregation._month_rows(month, year),
+            ServiceOrderMonthlyStats.role == ROLE_RESPONSIBLE,
+        )
+        return db.session.scalar(query) or 0
+
+    @staticmethod
+    def count_with_assist(month: int, year: int) -> tuple:
+        """Retorna (sem_auxilio, com_auxilio) das ordens finalizadas no mês."""
+        query = select(
+            func.coalesce(func.sum(ServiceOrderMonthlyStats.total_count), 0),
+            func.coalesce(func.sum(ServiceOrderMonthlyStats.with_assist_count), 0),
+        ).where(
+            *DashboardAggregation._month_rows(month, year),
+            ServiceOrderMonthlyStats.role == ROLE_RESPONSIBLE,
+        )
+
+        total, with_assist = db.session.execute(query).one()
+        return total - with_assist, with_assist
+
+    @staticmethod
+    def count_by_expert(month: int, year: int, blocked: set) -> list:
+        """
+        Conta as ordens do mês por técnico ativo, somando as participações
+        como responsável e como auxiliar.
+
+        Retorna lista de (nome, realizados, nao_realizados) ordenada pelo ID
+        do técnico, onde não realizados são os de categorias bloqueadas.
+        """
+        stats = ServiceOrderMonthlyStats
+        is_blocked = TypeService.name.in_(blocked) if blocked else False
+
+        query = (
+            select(
+                Expert.nome,
+                func.sum(stats.total_count),
+                func.coalesce(func.sum(case((is_blocked, stats.total_count), else_=0)), 0),
+            )
+            .select_from(stats)
+            .join(Expert, Expert.id == stats.expert_id)
+            .outerjoin(TypeService, TypeService.id == stats.type_service_id)
+            .where(*DashboardAggregation._month_rows(month, year), Expert.status.is_(True))
+            .group_by(Expert.id, Expert.nome)
+            .order_by(Expert.id)
+        )
+
+        return [
+            (nome, total - not_realized, not_realized)
+            for nome, total, not_realized in db.session.execute(query)
+        ]
+
+    @staticmethod
+    def count_by_type_service(month: int, year: int, only_with_assist: bool = False) -> list:
+        """
+        Conta as ordens do mês por tipo de serviço.
+        Retorna lista de (nome_categoria, quantidade) ordenada pelo ID do tipo.
+        """
+        stats = ServiceOrderMonthlyStats
+        counter = func.sum(stats.with_assist_count if only_with_assist else stats.total_count)
+
+        query = (
+            select(TypeService.name, counter)
+            .join(stats, stats.type_service_id == TypeService.id)
+            .where(*DashboardAggregation._month_rows(month, year), stats.role == ROLE_RESPONSIBLE)
+            .group_by(TypeService.id, TypeService.name)
+            .having(counter > 0)
+            .order_by(TypeService.id)
+        )
+
+        return [(name, count) for name, count in db.session.execute(query)]
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import g, has_request_context
+
+# TTL (segundos) do mês vigente e dos meses anteriores
+CURRENT_MONTH_TTL = int(os.getenv("DASHBOARD_CACHE_TTL_CURRENT", "300"))
+PAST_MONTH_TTL = int(os.getenv("DASHBOARD_CACHE_TTL_PAST", "86400"))
+
+
+class DashboardCache:
+    """
+    Cache em memória das seções do dashboard, por (ano, mês, seção).
+
+    Meses anteriores ao vigente recebem um TTL longo, já que quase não mudam;
+    as entradas de um mês são descartadas quando uma ServiceOrder desse mês é
+    gravada (ver register_dashboard_cache_listeners) ou quando a rotina diária
+    termina. Cada entrada guarda também a versão no banco dos dados que a
+    seção lê (por padrão ServiceOrderMonthlyStats.month_version do mês; ver
+    window_version e global_version), o que invalida entradas de outros
+    processos cujos dados foram alterados.
+    """
+
+    _entries = {}
+    _lock = threading.Lock()
+    _hits = defaultdict(int)
+    _misses = defaultdict(int)
+    _invalidations = 0
+
+    @staticmethod
+    def _ttl(month: int, year: int) -> int:
+        now = datetime.now()
+        if (year, month) < (now.year, now.month):
+            return PAST_MONTH_TTL
+        return CURRENT_MONTH_TTL
+
+    @staticmethod
+    def _per_request(key, loader):
+        """Calcula loader() uma única vez por requisição."""
+        if not has_request_context():
+            return loader()
+
+        versions = g.setdefault('dashboard_versions', {})
+        if key not in versions:
+            versions[key] = loader()
+        return versions[key]
+
+    @staticmethod
+    def month_version(month: int, year: int) -> tuple:
+        """
+        Versão dos dados do mês no banco, calculada uma única vez por requisição.
+        """
+        from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
+
+        return DashboardCache._per_request(
+            (year, month), lambda: tuple(ServiceOrderMonthlyStats.month_version(year, month))
+        )
+
+    @staticmethod
+    def window_version(month: int, year: int, days_before: int) -> tuple:
+        """
+        Versões de todos os meses de [1º dia do mês - days_before, fim do mês),
+        para seções que leem também ordens finalizadas antes do mês.
+        """
+        start = datetime(year, month, 1) - timedelta(days=days_before)
+        versions = []
+        current_year, current_month = start.year, start.month
+        while (current_year, current_month) <= (year, month):
+            versions.append(DashboardCache.month_version(current_month, current_year))
+            current_year, current_month = (
+                (current_year + 1, 1) if current_month == 12 else (current_year, current_month + 1)
+            )
+        return tuple(versions)
+
+    @staticmethod
+    def global_version() -> tuple:
+        """
+        Versão de todo o rollup, para seções que não filtram pela data de
+        finalização (ex.: data de agendamento); muda com qualquer mês recalculado.
+        """
+        from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
+
+        return DashboardCache._per_request(
+            'global', lambda: tuple(ServiceOrderMonthlyStats.global_version())
+        )
+
+    @classmethod
+    def get_or_set(cls, month: int, year: int, section: str, loader, version=None):
+        """
+        Retorna a seção do cache ou a calcula com loader() e armazena.
+        Uma entrada só é válida enquanto não expirar e tiver a mesma versão.
+        """
+        key = (year, month, section)
+        now = time.monotonic()
+
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry and entry[0] > now and entry[1] == version:
+                cls._hits[section] += 1
+                return entry[2]
+            cls._misses[section] += 1
+
+        value = loader()
+
+        with cls._lock:
+            cls._entries[key] = (now + cls._ttl(month, year), version, value)
+        return value
+
+    @classmethod
+    def invalidate_month(cls, year: int, month: int):
+        """Descarta todas as seções de um mês."""
+        with cls._lock:
+            keys = [key for key in cls._entries if key[:2] == (year, month)]
+            for key in keys:
+                del cls._entries[key]
+            cls._invalidations += 1
+
+    @classmethod
+    def invalidate_months(cls, months):
+        for year, month in set(months):
+            cls.invalidate_month(year, month)
+
+    @classmethod
+    def clear(cls):
+        """Descarta todas as entradas (ex.: dados de referência alterados)."""
+        with cls._lock:
+            cls._entries.clear()
+            cls._invalidations += 1
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Contadores de acerto/falha para ajuste dos TTLs."""
+        with cls._lock:
+            hits = sum(cls._hits.values())
+            misses = sum(cls._misses.values())
+            sections = sorted(set(cls._hits) | set(cls._misses))
+            return {
+                'entries': len(cls._entries),
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else 0,
+                'invalidations': cls._invalidations,
+                'ttl': {'current_month': CURRENT_MONTH_TTL, 'past_months': PAST_MONTH_TTL},
+                'by_section': {
+                    section: {'hits': cls._hits[section], 'misses': cls._misses[section]}
+                    for section in sections
+                },
+            }
+
+    @staticmethod
+    def cached(section: str, version=None):
+        """
+        Decorador para métodos do DashboardService com assinatura (month, year).
+        O argumento opcional orders (ordens do mês já carregadas) não altera a
+        chave; qualquer outro argumento extra ignora o cache.
+
+        version(month, year) dá a versão dos dados lidos pela seção (padrão:
+        month_version); seções que leem fora do mês de finalização informam a sua.
+        """
+        version = version or DashboardCache.month_version
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(month: int = None, year: int = None, *args, **kwargs):
+                if args or any(key != 'orders' for key in kwargs):
+                    return func(month, year, *args, **kwargs)
+
+                now = datetime.now()
+                month = month or now.month
+                year = year or now.year
+
+                return DashboardCache.get_or_set(
+                    month, year, section, lambda: func(month, year, **kwargs),
+                    version=version(month, year)
+                )
+            return wrapper
+        return decorator
@@ -1,10 +1,14 @@
+from bisect import bisect_left
 from collections import defaultdict
 from datetime import datetime, timedelta
+from app.database import db
 from app.models.customer import Customer
 from app.models.service_order import ServiceOrder
 from app.models.expert import Expert
 from app.models.type_service import TypeService
-from collections import defaultdict
+from app.service.dashboard_aggregation import DashboardAggregation
+from app.service.dashboard_cache import DashboardCache
+from app.service.reference_cache import ReferenceCache
 
 blocked_categories = {
     # "RETIRADA SEM SUCESSO",
@@ -15,94 +19,51 @@ blocked_categories = {
     # "PROMESSA DE PAGAMENTO"
 }
 
-class DashboardService:
-    @staticmethod
-    def get_total_service_orders() -> int:
-        return len(ServiceOrder.list(limit=10000))
+# Janela (dias antes da finalização) em que uma ordem anterior do cliente conta como reincidência
+REPEATED_SERVICES_WINDOW_DAYS = 60
 
-    @staticmethod
-    def get_total_experts() -> int:
-        return len(Expert.list_active(limit=10000))
 
-    @staticmethod
-    def get_services_with_assist() -> dict:
-        """Retorna total de ordens com e sem auxílio no mês atual."""
-        with_assist = 0
-        without_assist = 0
-        now = datetime.now()
-        mes_atual = now.month
-        ano_atual = now.year
-
-        for order in ServiceOrder.list(limit=10000):
-            if order.os_data_finalizacao.month == mes_atual and order.os_data_finalizacao.year == ano_atual:
-                if order.os_tecnicos_auxiliares:
-                    with_assist += 1
-                else:
-                    without_assist += 1
+def repeated_services_version(month: int, year: int) -> tuple:
+    """Versão dos meses lidos pelas reincidências: o mês e a janela anterior."""
+    return DashboardCache.window_version(month, year, REPEATED_SERVICES_WINDOW_DAYS)
 
-        return {'labels': ['Sem Auxílio', 'Com Auxílio'], 'data': [without_assist, with_assist]}
 
-    @staticmethod
-    def get_services_by_category() -> dict:
-        """Retorna quantidade de serviços por categoria e técnico, apenas do mês atual."""
-        now = datetime.now()
-        mes_atual = now.month
-        ano_atual = now.year
+def services_by_expert_details_version(month: int, year: int) -> tuple:
+    """
+    Versão dos dados por data de agendamento: as ordens agendadas no mês podem
+    ter sido finalizadas em qualquer outro, então usa a versão global.
+    """
+    return DashboardCache.month_version(month, year), DashboardCache.global_version()
 
-        categories = TypeService.list(limit=10000)
-        experts = Expert.list_active(limit=10000)
-        datasets = []
 
-        for expert in experts:
-            data = []
-            for cat in categories:
-                count = 0
-                # Responsável no mês atual
-                count += sum(
-                    1 for o in expert.responsible_orders
-                    if o.type_service_id == cat.id
-                    and o.os_data_finalizacao.month == mes_atual
-                    and o.os_data_finalizacao.year == ano_atual
-                )
-                # Auxiliar no mês atual
-                count += sum(
-                    1 for o in expert.assistant_orders
-                    if o.type_service_id == cat.id
-                    and o.os_data_finalizacao.month == mes_atual
-                    and o.os_data_finalizacao.year == ano_atual
-                )
-                data.append(count)
-            datasets.append({
-                'label': expert.nome,
-                'data': data,
-                'backgroundColor': f'rgba({hash(expert.nome)%256}, {(hash(expert.nome)*2)%256}, {(hash(expert.nome)*3)%256}, 0.7)'
-            })
+def complete_dashboard_version(month: int, year: int) -> tuple:
+    """Versão do dashboard completo, que inclui as duas seções acima."""
+    return repeated_services_version(month, year), DashboardCache.global_version()
 
-        labels = [cat.name for cat in categories]
-        return {'labels': labels, 'datasets': datasets}
-    
+
+class DashboardService:
     @staticmethod
+    def get_total_service_orders() -> int:
+        return DashboardAggregation.count_all_orders()
+
+    @staticmethod
+    @DashboardCache.cached('totalServices')
     def get_total_services(month: int = None, year: int = None) -> int:
         """Retorna o total de serviços para o mês/ano especificado"""
         if month is None:
             month = datetime.now().month
         if year is None:
             year = datetime.now().year
-            
-        all_orders = ServiceOrder.list(limit=10000)
-        count = 0
-        for order in all_orders:
-            if (order.os_data_finalizacao.month == month and 
-                order.os_data_finalizacao.year == year):
-                count += 1
-        return count
+
+        return DashboardAggregation.count_orders(month, year)
 
     @staticmethod
     def get_total_experts() -> int:
         """Retorna o total de técnicos ativos"""
-        return len(Expert.list_active(limit=10000))
+        return DashboardAggregation.count_active_experts()
 
     @staticmethod
+    @DashboardCache.cached('servicesByExpert')
     def get_services_by_expert(month: int = None, year: int = None) -> dict:
         """
         Retorna total de serviços por técnico no mês/ano especificado.
@@ -115,32 +76,15 @@ class DashboardService:
         if year is None:
             year = datetime.now().year
 
-        experts = Expert.list_active(limit=10000)
-
         realized = defaultdict(int)
         not_realized = defaultdict(int)
 
-        def process_order(expert_name, order):
-            if (
-                order.os_data_finalizacao.month == month and
-                order.os_data_finalizacao.year == year
-            ):
-                categoria = order.type_service.name if order.type_service else None
-
-                if categoria in blocked_categories:
-                    not_realized[expert_name] += 1
-                else:
-                    realized[expert_name] += 1
-
-        for expert in experts:
-
-            # Como responsável
-            for order in expert.responsible_orders:
-                process_order(expert.nome, order)
-
-            # Como auxiliar
-            for order in expert.assistant_orders:
-                process_order(expert.nome, order)
+        for expert_name, realized_count, not_realized_count in DashboardAggregation.count_by_expert(
+            month, year, blocked_categories
+        ):
+            if realized_count:
+                realized[expert_name] += realized_count
+            not_realized[expert_name] += not_realized_count
 
         labels = list(realized.keys())
 
@@ -153,6 +97,7 @@ class DashboardService:
         return result
 
     @staticmethod
+    @DashboardCache.cached('servicesByCategory')
     def get_services_by_category(month: int = None, year: int = None) -> dict:
         """Retorna quantidade de serviços por categoria no mês/ano especificado"""
         if month is None:
@@ -160,16 +105,9 @@ class DashboardService:
         if year is None:
             year = datetime.now().year
             
-        categories = TypeService.list(limit=10000)
-        all_orders = ServiceOrder.list(limit=10000)
         data = defaultdict(int)
-        
-        for category in categories:
-            for order in all_orders:
-                if (order.type_service_id == category.id and
-                    order.os_data_finalizacao.month == month and 
-                    order.os_data_finalizacao.year == year):
-                    data[category.name] += 1
+        for category_name, count in DashboardAggregation.count_by_type_service(month, year):
+            data[category_name] += count
         
         return {
             'labels': list(data.keys()),
@@ -177,6 +115,7 @@ class DashboardService:
         }
 
     @staticmethod
+    @DashboardCache.cached('servicesWithAssist')
     def get_services_with_assist(month: int = None, year: int = None) -> dict:
         """Retorna total de ordens com e sem auxílio no mês/ano especificado"""
         if month is None:
@@ -184,17 +123,7 @@ class DashboardService:
         if year is None:
             year = datetime.now().year
             
-        all_orders = ServiceOrder.list(limit=10000)
-        with_assist = 0
-        without_assist = 0
-        
-        for order in all_orders:
-            if (order.os_data_finalizacao.month == month and 
-                order.os_data_finalizacao.year == year):
-                if order.os_tecnicos_auxiliares:
-                    with_assist += 1
-                else:
-                    without_assist += 1
+        without_assist, with_assist = DashboardAggregation.count_with_assist(month, year)
         
         return {
             'labels': ['Sem Auxílio', 'Com Auxílio'],
@@ -202,13 +131,33 @@ class DashboardService:
         }
         
     @staticmethod
-    def get_assistance_network(month: int = None, year: int = None) -> dict:
+    def load_month_orders(month: int, year: int) -> list:
+        """
+        Carrega uma única vez as ordens finalizadas no mês, com os relacionamentos
+        usados pelo dashboard, para serem compartilhadas entre as seções.
+        """
+        start_date, end_date = DashboardAggregation.month_interval(month, year)
+        return ServiceOrder.list_finalized_between(start_date, end_date)
+
+    @staticmethod
+    @DashboardCache.cached('assistanceNetwork')
+    def get_assistance_network(month: int = None, year: int = None, orders: list = None) -> dict:
         if month is None:
             month = datetime.now().month
         if year is None:
             year = datetime.now().year
+
+        if orders is None:
+            orders = DashboardService.load_month_orders(month, year)
             
-        experts = Expert.list_active(limit=10000)
+        experts = ReferenceCache.active_experts()
+
+        orders_as_responsible = defaultdict(list)
+        orders_as_assistant = defaultdict(list)
+        for order in orders:
+            orders_as_responsible[order.os_tecnico_responsavel].append(order)
+            for assistant in order.os_tecnicos_auxiliares:
+                orders_as_assistant[assistant.id].append(order)
 
         expert_names = []
         helped_data = []
@@ -218,16 +167,13 @@ class DashboardService:
         for expert in experts:
             help_received_count = 0
             help_received_details = []
-            for order in expert.responsible_orders:
-                if (order.os_data_finalizacao.month == month and
-                    order.os_data_finalizacao.year == year and
-                    order.os_tecnicos_auxiliares):
+            for order in orders_as_responsible.get(expert.id, []):
+                if order.os_tecnicos_auxiliares:
 
                     help_received_count += 1
                     assistants = [a.nome for a in order.os_tecnicos_auxiliares if a.nome != expert.nome]
 
-                    category = TypeService.get_by_id(order.type_service_id)
-                    category_name = category.name if category else 'Desconhecida'
+                    category_name = order.type_service.name if order.type_service else 'Desconhecida'
 
                     help_received_details.append({
                         'assistants': assistants,
@@ -239,24 +185,20 @@ class DashboardService:
 
             helped_count = 0
             helped_details = []
-            for order in expert.assistant_orders:
-                if (order.os_data_finalizacao.month == month and
-                    order.os_data_finalizacao.year == year):
+            for order in orders_as_assistant.get(expert.id, []):
+                main_expert = order.tecnico_responsavel
+                if main_expert and main_expert.nome != expert.nome:
+                    helped_count += 1
 
-                    main_expert = Expert.get_by_id(order.os_tecnico_responsavel)
-                    if main_expert and main_expert.nome != expert.nome:
-                        helped_count += 1
+                    category_name = order.type_service.name if order.type_service else 'Desconhecida'
 
-                        category = TypeService.get_by_id(order.type_service_id)
-                        category_name = category.name if category else 'Desconhecida'
-
-                        helped_details.append({
-                            'main_expert': main_expert.nome,
-                            'date': order.os_data_finalizacao.strftime('%Y-%m-%d'),
-                            'category': category_name,
-                            'service_id': order.id,
-                            'service_os_id': order.os_id 
-                        })
+                    helped_details.append({
+                        'main_expert': main_expert.nome,
+                        'date': order.os_data_finalizacao.strftime('%Y-%m-%d'),
+                        'category': category_name,
+                        'service_id': order.id,
+                        'service_os_id': order.os_id 
+                    })
 
             assistant_summary = defaultdict(int)
             assistant_full_details = defaultdict(list)
@@ -329,6 +271,7 @@ class DashboardService:
 
 
     @staticmethod
+    @DashboardCache.cached('assistanceByServiceType')
     def get_assistance_by_service_type(month: int = None, year: int = None) -> dict:
         """Retorna tipos de serviço em que houve ajuda"""
         if month is None:
@@ -336,18 +279,11 @@ class DashboardService:
         if year is None:
             year = datetime.now().year
             
-        all_orders = ServiceOrder.list(limit=10000)
-        categories = TypeService.list(limit=10000)
         data = defaultdict(int)
-        
-        for order in all_orders:
-            if (order.os_data_finalizacao.month == month and 
-                order.os_data_finalizacao.year == year and
-                order.os_tecnicos_auxiliares):
-                
-                category = next((cat for cat in categories if cat.id == order.type_service_id), None)
-                if category:
-                    data[category.name] += 1
+        for category_name, count in DashboardAggregation.count_by_type_service(
+            month, year, only_with_assist=True
+        ):
+            data[category_name] += count
         
         return {
             'labels': list(data.keys()),
@@ -355,75 +291,87 @@ class DashboardService:
         }
 
     @staticmethod
-    def get_repeated_services(month: int = None, year: int = None) -> list:
+    @DashboardCache.cached('repeatedServices', version=repeated_services_version)
+    def get_repeated_services(month: int = None, year: int = None,
+                              window_days: int = REPEATED_SERVICES_WINDOW_DAYS,
+                              max_days: int = 30, blocked: set = None) -> list:
         """
-        Retorna serviços reincidentes dentro de uma janela de 60 dias,
-        mas só considera reincidência válida se acontecer em <= 30 dias
+        Retorna serviços reincidentes dentro de uma janela de window_days dias,
+        mas só considera reincidência válida se acontecer em <= max_days dias
         e a categoria NÃO estiver na lista de bloqueio.
         Mantém a estrutura de saída atual, porém agrupada por contrato.
+
+        As ordens do mês e as anteriores dentro da janela são carregadas em uma
+        única consulta e pareadas por cliente em ordem de finalização.
         """
         if month is None:
             month = datetime.now().month
         if year is None:
             year = datetime.now().year
-            
-        all_orders = ServiceOrder.list(limit=10000)
+        if blocked is None:
+            blocked = blocked_categories
+
+        start_date, end_date = DashboardAggregation.month_interval(month, year)
+        month_customers = (
+            db.session.query(ServiceOrder.customer_id)
+            .filter(ServiceOrder.os_data_finalizacao >= start_date)
+            .filter(ServiceOrder.os_data_finalizacao < end_date)
+            .distinct()
+        )
+
+        orders = ServiceOrder.list_finalized_between(
+            start_date - timedelta(days=window_days), end_date, customer_ids=month_customers
+        )
+
+        # Ordens de cada cliente ordenadas por data de finalização
+        timeline = defaultdict(list)
+        for order in orders:
+            timeline[order.customer_id].append(order)
+        for customer_orders in timeline.values():
+            customer_orders.sort(key=lambda o: (o.os_data_finalizacao, o.id))
+        timeline_dates = {
+            customer_id: [o.os_data_finalizacao for o in customer_orders]
+            for customer_id, customer_orders in timeline.items()
+        }
+
+        def expert_names(order):
+            names = {a.nome for a in order.os_tecnicos_auxiliares}
+            if order.tecnico_responsavel:
+                names.add(order.tecnico_responsavel.nome)
+            return names
+
         repeated_services = []
-        
-        current_month_orders = [
-            order for order in all_orders 
-            if (
-                order.os_data_finalizacao.month == month and 
-                order.os_data_finalizacao.year == year
-            )
-        ]
-        
-        for current_order in current_month_orders:
-            customer_id = current_order.customer_id
-            
-            date_limit = current_order.os_data_finalizacao - timedelta(days=60)
-
-            previous_orders = [
-                order for order in all_orders 
-                if (
-                    order.customer_id == customer_id and
-                    order.os_data_finalizacao < current_order.os_data_finalizacao and
-                    order.os_data_finalizacao >= date_limit
-                )
-            ]
-            
-            for prev_order in previous_orders:
-                days_between = (current_order.os_data_finalizacao - prev_order.os_data_finalizacao).days
-                
-                if days_between > 30:
-                    continue
 
-                current_category_obj = TypeService.get_by_id(current_order.type_service_id)
-                current_category = current_category_obj.name if current_category_obj else "Desconhecida"
+        for current_order in orders:
+            current_date = current_order.os_data_finalizacao
+            if current_date < start_date:
+                continue
 
-                # -------------------------
-                # FILTRO DAS CATEGORIAS BLOQUEADAS
-                # -------------------------
-                if current_category.upper() in blocked_categories:
-                    continue
+            current_category = current_order.type_service.name if current_order.type_service else "Desconhecida"
 
-                all_experts = set()
-                
-                current_responsible = Expert.get_by_id(current_order.os_tecnico_responsavel)
-                if current_responsible:
-                    all_experts.add(current_responsible.nome)
-                
-                for assistant in current_order.os_tecnicos_auxiliares:
-                    all_experts.add(assistant.nome)
-                
-                prev_responsible = Expert.get_by_id(prev_order.os_tecnico_responsavel)
-                if prev_responsible:
-                    all_experts.add(prev_responsible.nome)
+            # -------------------------
+            # FILTRO DAS CATEGORIAS BLOQUEADAS
+            # -------------------------
+            if current_category.upper() in blocked:
+                continue
+
+            customer_orders = timeline[current_order.customer_id]
+            dates = timeline_dates[current_order.customer_id]
+
+            # Ordens anteriores do cliente em [data - window_days, data)
+            first = bisect_left(dates, current_date - timedelta(days=window_days))
+            last = bisect_left(dates, current_date)
+            previous_orders = sorted(customer_orders[first:last], key=lambda o: o.id)
+
+            for prev_order in previous_orders:
+                days_between = (current_date - prev_order.os_data_finalizacao).days
                 
-                for assistant in prev_order.os_tecnicos_auxiliares:
-                    all_experts.add(assistant.nome)
+                if days_between > max_days:
+                    continue
 
-                customer = Customer.get_by_id(current_order.customer_id)
+                all_experts = expert_names(current_order) | expert_names(prev_order)
+
+                customer = current_order.customer
                 contract_id = customer.id_contrato if customer else "Desconhecido"
                 
                 repeated_services.append({
@@ -431,7 +379,7 @@ class DashboardService:
                     'category': current_category,
                     'experts': list(all_experts),
                     'firstServiceDate': prev_order.os_data_finalizacao.strftime('%Y-%m-%d'),
-                    'secondServiceDate': current_order.os_data_finalizacao.strftime('%Y-%m-%d'),
+                    'secondServiceDate': current_date.strftime('%Y-%m-%d'),
                     'daysBetween': days_between,
                     'firstServiceId': prev_order.os_id,
                     'secondServiceId': current_order.os_id
@@ -455,6 +403,7 @@ class DashboardService:
         return final_output
 
     @staticmethod
+    @DashboardCache.cached('servicesByExpertDetails', version=services_by_expert_details_version)
     def get_services_by_expert_with_details(month: int = None, year: int = None) -> dict:
         """Retorna dados detalhados de serviços por técnico incluindo categorias"""
         if month is None:
@@ -464,11 +413,8 @@ class DashboardService:
 
         detailed_data = ServiceOrder.get_service_orders_grouped(month, year)
 
-        experts = Expert.list_active(limit=10000)
-        categories = TypeService.list(limit=10000)
-        
-        expert_map = {expert.id: expert.nome for expert in experts}
-        category_map = {category.id: category.name for category in categories}
+        expert_map = {expert.id: expert.nome for expert in ReferenceCache.active_experts()}
+        category_map = ReferenceCache.type_service_names()
         
         result = {
             'summary': {},
@@ -509,12 +455,30 @@ class DashboardService:
         return months[month - 1] if 1 <= month <= 12 else 'Mês Inválido'
     
     @staticmethod
-    def combine_services_with_assistance(assistance_data: dict, services_data: dict, month: int = None, year: int = None) -> dict:
+    def get_retrabalho_by_expert(orders: list) -> dict:
+        """
+        Agrupa os retrabalhos das ordens informadas pelo técnico responsável.
+        Retorna {expert_id: [{"category", "service_id", "service_os_id"}, ...]}.
+        """
+        details = defaultdict(list)
+        for order in orders:
+            if not order.retrabalho or not order.os_tecnico_responsavel:
+                continue
+
+            details[order.os_tecnico_responsavel].append({
+                "category": order.type_service.name if order.type_service else "Desconhecida",
+                "service_id": order.id,
+                "service_os_id": order.os_id
+            })
+        return details
+
+    @staticmethod
+    def combine_services_with_assistance(assistance_data: dict, services_data: dict, month: int = None, year: int = None,
+                                         orders: list = None) -> dict:
         """
         Combina dados de services_data e assistance_data.
-        - Se month e year forem fornecidos, os retrabalhos serão obtidos via
-        ServiceOrder.get_retrabalho_by_interval(expert_id, start_date, end_date)
-        para cada técnico (apenas técnico responsável).
+        - Se month e year forem fornecidos, os retrabalhos do mês são obtidos das
+        ordens do mês (orders, ou carregadas aqui), apenas do técnico responsável.
         - Se month/year não forem fornecidos, usa os valores em services_data['retrabalho']
         (comportamento legado).
         """
@@ -553,14 +517,12 @@ class DashboardService:
 
         if month is not None and year is not None:
 
-            start_date = datetime(year, month, 1)
-            if month == 12:
-                end_date = datetime(year + 1, 1, 1)
-            else:
-                end_date = datetime(year, month + 1, 1)
+            if orders is None:
+                orders = DashboardService.load_month_orders(month, year)
+            retrabalho_by_expert = DashboardService.get_retrabalho_by_expert(orders)
 
             name_to_id = {}
-            for e in Expert.list_active(limit=10000):
+            for e in ReferenceCache.active_experts():
                 name_to_id[e.nome] = e.id
 
 
@@ -572,21 +534,9 @@ class DashboardService:
                     retrabalho_details[expert_name] = retrabalho_details.get(expert_name, [])
                     continue
 
-                retrabalhos = ServiceOrder.get_retrabalho_by_interval(expert_id, start_date, end_date)
-                retrabalho_count = 0
-                details = []
-
-                for order in retrabalhos:
-                    retrabalho_count += 1
-                    category = TypeService.get_by_id(order.type_service_id)
-                    category_name = category.name if category else "Desconhecida"
-                    details.append({
-                        "category": category_name,
-                        "service_id": order.id,
-                        "service_os_id": order.os_id
-                    })
+                details = retrabalho_by_expert.get(expert_id, [])
 
-                retrabalho_dict[expert_name] = retrabalho_count
+                retrabalho_dict[expert_name] = len(details)
 
                 retrabalho_details[expert_name] = sorted(details, key=lambda x: (x["category"], x["service_id"]))
 
@@ -607,14 +557,9 @@ class DashboardService:
 
 
     @staticmethod
-    def merge_services_with_assistance(services_details: dict, month: int, year: int) -> dict:
-        from datetime import datetime
-        start_date = datetime(year, month, 1)
-        # Último dia do mês
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1)
-        else:
-            end_date = datetime(year, month + 1, 1)
+    def merge_services_with_assistance(services_details: dict, month: int, year: int, orders: list = None) -> dict:
+        if orders is None:
+            orders = DashboardService.load_month_orders(month, year)
 
         final_result = {"summary": {}, "detailed": {}}
 
@@ -637,27 +582,17 @@ class DashboardService:
                 else:
                     category_map[expert_name][name] += count
 
-        # Recupera retrabalhos DIRETAMENTE DO BANCO usando o método solicitado
-        experts = Expert.list_active(limit=10000)
+        # Retrabalhos do mês, a partir das ordens já carregadas
+        retrabalho_by_expert = DashboardService.get_retrabalho_by_expert(orders)
+        experts = ReferenceCache.active_experts()
 
         for expert in experts:
-            retrabalhos = ServiceOrder.get_retrabalho_by_interval(
-                expert.id, start_date, end_date
-            )
-            if not retrabalhos:
+            details = retrabalho_by_expert.get(expert.id)
+            if not details:
                 continue
 
-            for order in retrabalhos:
-                retrabalho_count[expert.nome] += 1
-
-                category = TypeService.get_by_id(order.type_service_id)
-                category_name = category.name if category else "Desconhecida"
-
-                retrabalho_details[expert.nome].append({
-                    "category": category_name,
-                    "service_id": order.id,
-                    "service_os_id": order.os_id
-                })
+            retrabalho_count[expert.nome] += len(details)
+            retrabalho_details[expert.nome].extend(details)
 
         # Montagem final
         all_experts = sorted(set(
@@ -766,6 +701,7 @@ class DashboardService:
         return ServiceOrder.update_retrabalho(os_id, retrabalho, observacao)
 
     @staticmethod
+    @DashboardCache.cached('complete', version=complete_dashboard_version)
     def get_complete_dashboard_data(month: int = None, year: int = None) -> dict:
         """Retorna todos os dados do dashboard em um único dicionário"""
         if month is None:
@@ -773,6 +709,8 @@ class DashboardService:
         if year is None:
             year = datetime.now().year
             
+        orders = DashboardService.load_month_orders(month, year)
+        assistance_network = DashboardService.get_assistance_network(month, year, orders=orders)
         services_with_assist_data = DashboardService.get_services_with_assist(month, year)
         repeated_services_list = DashboardService.get_repeated_services(month, year)
         
@@ -781,12 +719,12 @@ class DashboardService:
             'totalExperts': DashboardService.get_total_experts(),
             'servicesWithAssist': services_with_assist_data['data'][1], 
             'repeatedServices': len(repeated_services_list),
-            'servicesByExpert': DashboardService.combine_services_with_assistance(DashboardService.get_assistance_network(month, year), 
-                                                                                  DashboardService.get_services_by_expert(month, year), month, year),
+            'servicesByExpert': DashboardService.combine_services_with_assistance(assistance_network, 
+                                                                                  DashboardService.get_services_by_expert(month, year), month, year, orders),
             'servicesByCategory': DashboardService.get_services_by_category(month, year),
             'servicesWithAssistChart': services_with_assist_data,
-            'assistanceNetwork': DashboardService.get_assistance_network(month, year),
+            'assistanceNetwork': assistance_network,
             'assistanceByServiceType': DashboardService.get_assistance_by_service_type(month, year),
             'repeatedServicesList': repeated_services_list,
-            'servicesByExpertDetailed': DashboardService.merge_services_with_assistance(DashboardService.get_services_by_expert_with_details(month, year), month, year) 
-        }
\ No newline at end of file
+            'servicesByExpertDetailed': DashboardService.merge_services_with_assistance(DashboardService.get_services_by_expert_with_details(month, year), month, year, orders) 
+        }
@@ -1,9 +1,15 @@
 from app.models.expert import Expert
+from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
+from app.service.reference_cache import ReferenceCache
 
 class ExpertService:
     @staticmethod
     def create_expert(nome: str) -> Expert:
-        return Expert.create(nome=nome)
+        expert = Expert.create(nome=nome)
+        if expert:
+            ServiceOrderMonthlyStats.touch_all()
+            ReferenceCache.invalidate()
+        return expert
 
     @staticmethod
     def get_expert_by_id(expert_id: int) -> Expert | None:
@@ -15,11 +21,19 @@ class ExpertService:
 
     @staticmethod
     def update_expert(expert_id: int, **kwargs) -> Expert | None:
-        return Expert.update(expert_id, **kwargs)
+        expert = Expert.update(expert_id, **kwargs)
+        if expert:
+            ServiceOrderMonthlyStats.touch_all()
+            ReferenceCache.invalidate()
+        return expert
 
     @staticmethod
     def delete_expert(expert_id: int) -> bool:
-        return Expert.delete(expert_id)
+        deleted = Expert.delete(expert_id)
+        if deleted:
+            ServiceOrderMonthlyStats.touch_all()
+            ReferenceCache.invalidate()
+        return deleted
 
     @staticmethod
     def list_experts(limit: int = 50, offset: int = 0):
@@ -0,0 +1,303 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from flask import g, has_request_context
+from app.models.customer import Customer
+from app.models.expert import Expert
+from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
+from app.models.type_service import TypeService
+
+# Tempo máximo (segundos) até recarregar fora de requisições (importações em andamento)
+REFERENCE_CACHE_TTL = int(os.getenv("REFERENCE_CACHE_TTL", "300"))
+
+# Tamanho máximo das listas usadas em filtros IN
+LOOKUP_CHUNK_SIZE = 1000
+
+ExpertRef = namedtuple('ExpertRef', ['id', 'nome', 'status'])
+
+
+def _chunks(values: list, size: int = LOOKUP_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class ReferenceCache:
+    """
+    Cache em memória das tabelas de referência (técnicos, tipos de serviço e
+    contratos de clientes), com mapas id <-> nome.
+
+    Técnicos e tipos de serviço são carregados por inteiro em uma consulta cada;
+    clientes são guardados sob demanda, à medida que a importação os encontra.
+    Guarda apenas valores simples, nunca objetos ORM, para poder ser
+    compartilhado entre requisições e threads.
+    Os services de CRUD chamam invalidate() após gravar, e touch_all() muda a
+    versão global do rollup: em outros processos, a primeira leitura de cada
+    requisição compara essa versão com a da carga e recarrega se mudou, antes
+    que o dashboard monte (e guarde sob a versão nova) seções com nomes antigos.
+    Fora de requisições, o cache é recarregado ao fim do REFERENCE_CACHE_TTL.
+    """
+
+    _lock = threading.RLock()
+    _loaded_at = None
+    # ServiceOrderMonthlyStats.global_version() lida antes da última carga
+    _version = None
+
+    _experts = {}
+    _expert_ids = {}
+    _type_services = {}
+    _type_service_ids = {}
+    _customer_ids = {}
+
+    @classmethod
+    def preload(cls):
+        """Carrega técnicos e tipos de serviço em bloco."""
+        # Lida antes dos dados: uma alteração no meio da carga força outra na próxima verificação
+        version = tuple(ServiceOrderMonthlyStats.global_version())
+        experts = Expert.query.order_by(Expert.id).all()
+        type_services = TypeService.query.order_by(TypeService.id).all()
+
+        with cls._lock:
+            cls._experts = {e.id: ExpertRef(e.id, e.nome, e.status) for e in experts}
+            cls._expert_ids = {}
+            for expert in cls._experts.values():
+                cls._expert_ids.setdefault(expert.nome, expert.id)
+
+            cls._type_services = {ts.id: ts.name for ts in type_services}
+            cls._type_service_ids = {}
+            for ts_id, name in cls._type_services.items():
+                cls._type_service_ids.setdefault(name, ts_id)
+
+            cls._customer_ids = {}
+            cls._version = version
+            cls._loaded_at = time.monotonic()
+
+    @classmethod
+    def _ensure_loaded(cls):
+        loaded_at = cls._loaded_at
+        expired = loaded_at is None or time.monotonic() - loaded_at > REFERENCE_CACHE_TTL
+
+        # Uma verificação por requisição da versão compartilhada (alterações de outros processos)
+        if has_request_context() and 'reference_cache_checked' not in g:
+            g.reference_cache_checked = True
+            expired = expired or tuple(ServiceOrderMonthlyStats.global_version()) != cls._version
+
+        if expired:
+            cls.preload()
+
+    @classmethod
+    def invalidate(cls):
+        """Descarta o cache; a próxima leitura recarrega do banco."""
+        with cls._lock:
+            cls._loaded_at = None
+
+    # ---------- Técnicos ----------
+
+    @classmethod
+    def active_experts(cls) -> list:
+        """Técnicos ativos, ordenados por ID."""
+        cls._ensure_loaded()
+        return [e for e in cls._experts.values() if e.status]
+
+    @classmethod
+    def expert(cls, expert_id: int):
+        """Retorna o ExpertRef do ID, consultando o banco se não estiver em cache."""
+        if not expert_id:
+            return None
+        cls._ensure_loaded()
+
+        expert = cls._experts.get(expert_id)
+        if expert is None:
+            db_expert = Expert.get_by_id(expert_id)
+            if db_expert:
+                expert = cls.remember_expert(db_expert)
+        return expert
+
+    @classmethod
+    def expert_name(cls, expert_id: int):
+        expert = cls.expert(expert_id)
+        return expert.nome if expert else None
+
+    @classmethod
+    def expert_id(cls, nome: str):
+        """Retorna o ID do técnico pelo nome, consultando o banco se não estiver em cache."""
+        if not nome:
+            return None
+        cls._ensure_loaded()
+
+        expert_id = cls._expert_ids.get(nome)
+        if expert_id is None:
+            db_expert = Expert.get_by_name(nome)
+            if db_expert:
+                expert_id = cls.remember_expert(db_expert).id
+        return expert_id
+
+    @classmethod
+    def resolve_experts(cls, nomes) -> tuple:
+        """
+        Resolve vários técnicos pelo nome, criando em bloco os que não existem.
+        Retorna ({nome: id}, [nomes criados]).
+        """
+        nomes = [nome for nome in dict.fromkeys(nomes) if nome]
+        cls._ensure_loaded()
+
+        missing = [nome for nome in nomes if nome not in cls._expert_ids]
+        for chunk in _chunks(missing):
+            for expert in Expert.query.filter(Expert.nome.in_(chunk)).order_by(Expert.id):
+                cls.remember_expert(expert)
+
+        created = [nome for nome in missing if nome not in cls._expert_ids]
+        rows = Expert.create_many(created)
+        with cls._lock:
+            for expert_id, nome in rows:
+                cls._experts[expert_id] = ExpertRef(expert_id, nome, True)
+                cls._expert_ids.setdefault(nome, expert_id)
+
+        # Criados em paralelo por outro processo (create_many ignora os existentes)
+        concurrent = [nome for nome in created if nome not in cls._expert_ids]
+        for chunk in _chunks(concurrent):
+            for expert in Expert.query.filter(Expert.nome.in_(chunk)).order_by(Expert.id):
+                cls.remember_expert(expert)
+
+        created = [nome for _, nome in rows]
+        return {nome: cls._expert_ids[nome] for nome in nomes}, created
+
+    @classmethod
+    def remember_expert(cls, expert: Expert) -> ExpertRef:
+        """Registra no cache um técnico recém-criado ou lido do banco."""
+        ref = ExpertRef(expert.id, expert.nome, expert.status)
+        with cls._lock:
+            cls._experts[ref.id] = ref
+            cls._expert_ids.setdefault(ref.nome, ref.id)
+        return ref
+
+    # ---------- Tipos de serviço ----------
+
+    @classmethod
+    def type_service_names(cls) -> dict:
+        """Mapa {id: nome} de todos os tipos de serviço."""
+        cls._ensure_loaded()
+        return dict(cls._type_services)
+
+    @classmethod
+    def type_service_name(cls, type_service_id: int):
+        if not type_service_id:
+            return None
+        cls._ensure_loaded()
+
+        name = cls._type_services.get(type_service_id)
+        if name is None:
+            db_type_service = TypeService.get_by_id(type_service_id)
+            if db_type_service:
+                name = cls.remember_type_service(db_type_service)[1]
+        return name
+
+    @classmethod
+    def type_service_id(cls, name: str):
+        """Retorna o ID do tipo de serviço pelo nome, consultando o banco se não estiver em cache."""
+        if not name:
+            return None
+        cls._ensure_loaded()
+
+        type_service_id = cls._type_service_ids.get(name)
+        if type_service_id is None:
+            db_type_service = TypeService.get_by_name(name)
+            if db_type_service:
+                type_service_id = cls.remember_type_service(db_type_service)[0]
+        return type_service_id
+
+    @classmethod
+    def resolve_type_services(cls, names) -> dict:
+        """Resolve vários tipos de serviço pelo nome, criando em bloco os que não existem."""
+        names = [name for name in dict.fromkeys(names) if name]
+        cls._ensure_loaded()
+
+        missing = [name for name in names if name not in cls._type_service_ids]
+        for chunk in _chunks(missing):
+            for type_service in TypeService.query.filter(TypeService.name.in_(chunk)).order_by(TypeService.id):
+                cls.remember_type_service(type_service)
+
+        created = [name for name in missing if name not in cls._type_service_ids]
+        rows = TypeService.create_many(created)
+        with cls._lock:
+            for type_service_id, name in rows:
+                cls._type_services[type_service_id] = name
+                cls._type_service_ids.setdefault(name, type_service_id)
+
+        # Criados em paralelo por outro processo (create_many ignora os existentes)
+        concurrent = [name for name in created if name not in cls._type_service_ids]
+        for chunk in _chunks(concurrent):
+            for type_service in TypeService.query.filter(TypeService.name.in_(chunk)).order_by(TypeService.id):
+                cls.remember_type_service(type_service)
+
+        return {name: cls._type_service_ids[name] for name in names}
+
+    @classmethod
+    def remember_type_service(cls, type_service: TypeService) -> tuple:
+        """Registra no cache um tipo de serviço recém-criado ou lido do banco."""
+        with cls._lock:
+            cls._type_services[type_service.id] = type_service.name
+            cls._type_service_ids.setdefault(type_service.name, type_service.id)
+        return type_service.id, type_service.name
+
+    # ---------- Clientes ----------
+
+    @classmethod
+    def customer_id(cls, id_contrato: str):
+        """Retorna o ID do cliente pelo contrato, consultando o banco se não estiver em cache."""
+        if not id_contrato:
+            return None
+        cls._ensure_loaded()
+
+        customer_id = cls._customer_ids.get(id_contrato)
+        if customer_id is None:
+            db_customer = Customer.get_by_contract(id_contrato)
+            if db_customer:
+                customer_id = cls.remember_customer(db_customer)
+        return customer_id
+
+    @classmethod
+    def resolve_customers(cls, customers: dict) -> dict:
+        """
+        Resolve vários clientes pelo contrato, criando em bloco os que não existem.
+
+        Args:
+            customers: {id_contrato: (cliente_nome, plano)}
+
+        Returns:
+            dict: id_contrato -> ID do cliente
+        """
+        cls._ensure_loaded()
+
+        missing = [contrato for contrato in customers if contrato and contrato not in cls._customer_ids]
+        for chunk in _chunks(missing):
+            rows = Customer.query.with_entities(Customer.id_contrato, Customer.id) \
+                .filter(Customer.id_contrato.in_(chunk)).all()
+            with cls._lock:
+                cls._customer_ids.update(dict(rows))
+
+        created = [contrato for contrato in missing if contrato not in cls._customer_ids]
+        for chunk in _chunks(created):
+            rows = Customer.create_many([
+                {'id_contrato': contrato, 'cliente_nome': customers[contrato][0], 'plano': customers[contrato][1]}
+                for contrato in chunk
+            ])
+            with cls._lock:
+                cls._customer_ids.update({contrato: customer_id for customer_id, contrato in rows})
+
+            # Criados em paralelo por outro processo (ON CONFLICT DO NOTHING)
+            concurrent = [contrato for contrato in chunk if contrato not in cls._customer_ids]
+            if concurrent:
+                rows = Customer.query.with_entities(Customer.id_contrato, Customer.id) \
+                    .filter(Customer.id_contrato.in_(concurrent)).all()
+                with cls._lock:
+                    cls._customer_ids.update(dict(rows))
+
+        return {contrato: cls._customer_ids.get(contrato) for contrato in customers if contrato}
+
+    @classmethod
+    def remember_customer(cls, customer: Customer) -> int:
+        """Registra no cache um cliente recém-criado ou lido do banco."""
+        with cls._lock:
+            cls._customer_ids[customer.id_contrato] = customer.id
+        return customer.id
@@ -1,10 +1,18 @@
 from app.models.service_order import ServiceOrder
+from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
 from datetime import datetime
 from collections import defaultdict
 
 from app.models.type_service import TypeService
 
 class ServiceOrderService:
+    @staticmethod
+    def _refresh_monthly_stats(*dates):
+        """Recalcula o rollup mensal dos meses das datas de finalização informadas."""
+        ServiceOrderMonthlyStats.refresh_months(
+            (dt.year, dt.month) for dt in dates if dt
+        )
+
     @staticmethod
     def create_service_order(
         os_id: str,
@@ -18,7 +26,7 @@ class ServiceOrderService:
         os_data_cadastro: datetime = None,
         assistants: list = None
     ) -> ServiceOrder:
-        return ServiceOrder.create(
+        order = ServiceOrder.create(
             os_id=os_id,
             os_data_agendamento=os_data_agendamento,
             os_conteudo=os_conteudo,
@@ -30,6 +38,8 @@ class ServiceOrderService:
             os_data_cadastro=os_data_cadastro,
             assistants=assistants
         )
+        ServiceOrderService._refresh_monthly_stats(order.os_data_finalizacao)
+        return order
 
     @staticmethod
     def get_service_order_by_id(order_id: int) -> ServiceOrder | None:
@@ -41,11 +51,23 @@ class ServiceOrderService:
 
     @staticmethod
     def update_service_order(order_id: int, **kwargs) -> ServiceOrder | None:
-        return ServiceOrder.update(order_id, **kwargs)
+        current = ServiceOrder.get_by_id(order_id)
+        previous_date = current.os_data_finalizacao if current else None
+
+        order = ServiceOrder.update(order_id, **kwargs)
+        if order:
+            ServiceOrderService._refresh_monthly_stats(previous_date, order.os_data_finalizacao)
+        return order
 
     @staticmethod
     def delete_service_order(order_id: int) -> bool:
-        return ServiceOrder.delete(order_id)
+        current = ServiceOrder.get_by_id(order_id)
+        previous_date = current.os_data_finalizacao if current else None
+
+        deleted = ServiceOrder.delete(order_id)
+        if deleted:
+            ServiceOrderService._refresh_monthly_stats(previous_date)
+        return deleted
 
     @staticmethod
     def list_service_orders(limit: int = 50, offset: int = 0):
@@ -54,7 +76,7 @@ class ServiceOrderService:
     @staticmethod
     def complete_service_order(order_id: int) -> ServiceOrder | None:
         """Marca uma ordem de serviço como concluída"""
-        return ServiceOrder.update(order_id, os_data_finalizacao=datetime.now())
+        return ServiceOrderService.update_service_order(order_id, os_data_finalizacao=datetime.now())
     
     @staticmethod
     def get_service_orders_by_type_service(type_service) -> list:
@@ -1,9 +1,14 @@
 from app.models.type_service import TypeService
+from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
+from app.service.reference_cache import ReferenceCache
 
 class TypeServiceService:
     @staticmethod
     def create_type_service(name: str) -> TypeService:
-        return TypeService.create(name=name)
+        type_service = TypeService.create(name=name)
+        if type_service:
+            ReferenceCache.remember_type_service(type_service)
+        return type_service
 
     @staticmethod
     def get_type_service_by_id(type_service_id: int) -> TypeService | None:
@@ -15,11 +20,19 @@ class TypeServiceService:
 
     @staticmethod
     def update_type_service(type_service_id: int, **kwargs) -> TypeService | None:
-        return TypeService.update(type_service_id, **kwargs)
+        type_service = TypeService.update(type_service_id, **kwargs)
+        if type_service:
+            ServiceOrderMonthlyStats.touch_all()
+            ReferenceCache.invalidate()
+        return type_service
 
     @staticmethod
     def delete_type_service(type_service_id: int) -> bool:
-        return TypeService.delete(type_service_id)
+        deleted = TypeService.delete(type_service_id)
+        if deleted:
+            ServiceOrderMonthlyStats.touch_all()
+            ReferenceCache.invalidate()
+        return deleted
 
     @staticmethod
     def list_type_services(limit: int = 50, offset: int = 0):
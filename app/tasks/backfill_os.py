@@ -0,0 +1,158 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from app.database import db
+from app.models.backfill_checkpoint import (STATUS_DONE, STATUS_FAILED, STATUS_PARTIAL, STATUS_RUNNING,
+                                           BackfillCheckpoint)
+from app.tasks.ingestion_log import registrar_execucao
+from app.tasks.pipeline import ingerir_os
+from app.utils import busca_OS, ingestion_metrics
+from app.utils.busca_OS import buscar_os_paginado, listar_tecnicos
+
+logger = logging.getLogger(__name__)
+
+TOKEN = os.getenv("TOKEN")
+APP_NAME = os.getenv("APP_NAME")
+BASE_URL = os.getenv("BASE_URL")
+
+# Dias processados ao mesmo tempo
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+# Requisições por segundo à API durante o backfill (token bucket compartilhado)
+BACKFILL_RATE_LIMIT = float(os.getenv("BACKFILL_RATE_LIMIT", "10"))
+# Requisições simultâneas de detalhes dentro de cada dia
+BACKFILL_FETCH_WORKERS = int(os.getenv("BACKFILL_FETCH_WORKERS", "4"))
+
+# A gravação é serializada: as buscas na API (a parte lenta) rodam em paralelo,
+# e a criação de clientes/tipos de serviço não corre risco de duplicar
+_lock_gravacao = threading.Lock()
+
+
+def dias_do_intervalo(data_inicio, data_fim) -> list:
+    return [data_inicio + timedelta(days=i) for i in range((data_fim - data_inicio).days + 1)]
+
+
+def processar_dia(app, dia, dados_tecnicos, faltantes: list = None) -> int:
+    """
+    Busca e grava todas as OS encerradas no dia (ou só as `faltantes` de uma
+    execução anterior), registrando o checkpoint. Se alguma OS não for buscada
+    ou gravada, o dia fica STATUS_PARTIAL com os IDs delas, para a próxima
+    execução. Retorna a quantidade de OS gravadas (levanta a exceção em caso de erro).
+    """
+    with app.app_context():
+        inicio = time.perf_counter()
+        data = dia.strftime("%Y-%m-%d")
+        # Retomando um dia processado em parte, soma as OS já gravadas nele
+        anterior = db.session.get(BackfillCheckpoint, dia) if faltantes else None
+        gravadas_antes = anterior.os_count if anterior else 0
+        BackfillCheckpoint.mark(dia, STATUS_RUNNING)
+
+        try:
+            if faltantes:
+                os_ids = faltantes
+            else:
+                itens = buscar_os_paginado(TOKEN, APP_NAME, f"{BASE_URL}/api/ura/ordemservico/list/", data)
+                os_ids = [item["id"] for item in itens]
+            resultado = ingerir_os(
+                TOKEN, APP_NAME, BASE_URL, os_ids, dados_tecnicos,
+                fetch_workers=BACKFILL_FETCH_WORKERS, lock_gravacao=_lock_gravacao
+            )
+
+            gravadas = resultado.get('ordens_servico', 0)
+            duracao = time.perf_counter() - inicio
+            # OS ignoradas no preparo (sem cliente ou tipo de serviço) não são tentadas de novo
+            faltando = sorted(resultado.get('falhas', {}))
+            if faltando:
+                BackfillCheckpoint.mark(dia, STATUS_PARTIAL, os_count=gravadas_antes + gravadas,
+                                        duration_seconds=duracao,
+                                        error=f"{len(faltando)} OS não buscadas ou gravadas",
+                                        missing_os_ids=faltando)
+                logger.warning(f"⚠️ {data}: {len(faltando)} de {len(os_ids)} OS não foram buscadas ou gravadas; "
+                               f"serão tentadas de novo na próxima execução")
+            else:
+                BackfillCheckpoint.mark(dia, STATUS_DONE, os_count=gravadas_antes + gravadas,
+                                        duration_seconds=duracao)
+
+            logger.info(f"📅 {data}: {len(os_ids) - len(faltando)}/{len(os_ids)} OS processadas, "
+                        f"{gravadas} gravadas em {duracao:.1f}s ({gravadas / duracao if duracao else 0:.1f} OS/s)")
+            return gravadas
+
+        except Exception as e:
+            db.session.rollback()
+            BackfillCheckpoint.mark(dia, STATUS_FAILED, duration_seconds=time.perf_counter() - inicio,
+                                    error=str(e)[:2000])
+            raise
+
+
+def executar_backfill(app, data_inicio, data_fim, paralelismo: int = None,
+                      por_segundo: float = None, reprocessar: bool = False) -> dict:
+    """
+    Backfill histórico de data_inicio a data_fim (inclusive).
+
+    Cada dia é uma partição: os dias pendentes são processados por até
+    `paralelismo` threads, com todas as chamadas à API limitadas a `por_segundo`
+    requisições por segundo. Dias já concluídos (backfill_checkpoints) são
+    pulados, o que permite retomar após uma falha; dos processados em parte,
+    só as OS que faltaram são buscadas de novo. reprocessar=True refaz todos.
+    """
+    paralelismo = paralelismo or BACKFILL_WORKERS
+    por_segundo = BACKFILL_RATE_LIMIT if por_segundo is None else por_segundo
+
+    with app.app_context():
+        concluidos = set() if reprocessar else BackfillCheckpoint.done_days(data_inicio, data_fim)
+        parciais = {} if reprocessar else BackfillCheckpoint.partial_days(data_inicio, data_fim)
+        dados_tecnicos = listar_tecnicos(TOKEN, APP_NAME, f"{BASE_URL}/api/ura/tecnicos/")
+
+    dias = dias_do_intervalo(data_inicio, data_fim)
+    pendentes = [dia for dia in dias if dia not in concluidos]
+    logger.info(f"🚚 Backfill {data_inicio} → {data_fim}: {len(pendentes)} de {len(dias)} dias pendentes "
+                f"({paralelismo} em paralelo, {por_segundo or 'sem limite de'} req/s)")
+
+    busca_OS.configurar_limite_requisicoes(por_segundo)
+    busca_OS.ajustar_pool_conexoes(paralelismo * BACKFILL_FETCH_WORKERS)
+    inicio = time.perf_counter()
+    total_os = 0
+    falhas = []
+    incompletos = []
+
+    def executar(dia):
+        try:
+            return dia, processar_dia(app, dia, dados_tecnicos, parciais.get(dia)), None
+        except Exception as e:
+            return dia, 0, e
+
+    with registrar_execucao(app, "backfill") as execucao:
+        try:
+            with ThreadPoolExecutor(max_workers=paralelismo, thread_name_prefix="backfill") as executor:
+                # Cada dia roda em uma cópia do contexto atual (ex.: sem_auditoria)
+                futuros = [executor.submit(contextvars.copy_context().run, executar, dia) for dia in pendentes]
+                for dia, gravadas, erro in (futuro.result() for futuro in futuros):
+                    if erro:
+                        falhas.append(dia)
+                        logger.error(f"❌ Backfill do dia {dia} falhou: {erro}")
+                        ingestion_metrics.registrar_erro(f"{dia}: {erro}")
+                    total_os += gravadas
+            with app.app_context():
+                incompletos = sorted(BackfillCheckpoint.partial_days(data_inicio, data_fim))
+        finally:
+            busca_OS.configurar_limite_requisicoes(busca_OS.HTTP_RATE_LIMIT)
+
+        segundos = time.perf_counter() - inicio
+        resumo = {
+            'dias': len(dias),
+            'ja_concluidos': len(dias) - len(pendentes),
+            'processados': len(pendentes) - len(falhas),
+            'falhas': [dia.isoformat() for dia in falhas],
+            'incompletos': [dia.isoformat() for dia in incompletos],
+            'ordens_servico': total_os,
+            'segundos': round(segundos, 1),
+            'os_por_segundo': round(total_os / segundos, 2) if segundos else 0,
+        }
+        execucao['resultado'] = resumo
+
+    logger.info(f"🏁 Backfill finalizado: {resumo}")
+    return resumo
@@ -1,13 +1,21 @@
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import os
+import time
 from dotenv import load_dotenv
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from flask import current_app
 import logging
 
-from app.tasks.helpers import salvar_dados_no_banco
-from app.utils.busca_OS import buscar_os, buscar_os_por_id, listar_tecnicos
+from app.models.job_lease import JobLease, manter_concessao
+from app.service.dashboard_cache import DashboardCache
+from app.tasks.ingestion_log import registrar_execucao
+from app.tasks.manutencao_auditoria import manter_auditoria
+from app.tasks.manutencao_os import manter_service_orders
+from app.tasks.pipeline import ingerir_os
+from app.tasks.sync_os import sincronizar_os
+from app.utils.busca_OS import buscar_os_paginado, listar_tecnicos
 
 logger = logging.getLogger(__name__)
 
@@ -19,25 +27,151 @@ APP_NAME = os.getenv("APP_NAME")
 BASE_URL = os.getenv("BASE_URL")
 DATA = os.getenv("OS_DATA", datetime.today().strftime("%Y-%m-%d")) or (datetime.today() - timedelta(days=1)).strftime("%Y-%m-%d")
 HORARIO_EXECUCAO = os.getenv("OS_EXECUTION_HOUR")
+# "incremental" (a partir da marca d'água) ou "data" (apenas o dia OS_DATA)
+SYNC_MODE = os.getenv("OS_SYNC_MODE", "incremental")
+# Validade (segundos) da concessão de execução; expira se o processo morrer no meio
+SCHEDULER_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", "3600"))
+
+# Quanto a rotina diária espera (segundos) por uma sincronização intradiária em andamento
+INGESTION_LOCK_WAIT_SECONDS = int(os.getenv("INGESTION_LOCK_WAIT_SECONDS", "900"))
+
+# Intervalo (minutos) da sincronização intradiária; 0 desativa
+OS_INTRADAY_INTERVAL_MINUTES = int(os.getenv("OS_INTRADAY_INTERVAL_MINUTES", "5"))
+
+# Horário da manutenção da auditoria compacta (partições e retenção)
+AUDIT_MAINTENANCE_HOUR = os.getenv("AUDIT_MAINTENANCE_HOUR", "03:15")
+# Horário da manutenção de service_orders (partições, arquivamento e estatísticas)
+OS_MAINTENANCE_HOUR = os.getenv("OS_MAINTENANCE_HOUR", "03:30")
+
+JOB_ROTINA_DIARIA = "rotina_diaria_os"
+JOB_SINCRONIZACAO_INTRADIARIA = "sincronizacao_intradiaria_os"
+JOB_MANUTENCAO_AUDITORIA = "manutencao_auditoria"
+JOB_MANUTENCAO_OS = "manutencao_service_orders"
+# Concessão comum às rotinas que ingerem OS: uma ingestão por vez, em qualquer processo
+JOB_INGESTAO_OS = "ingestao_os"
+
+def slot_do_disparo(agora: datetime = None) -> datetime:
+    """Minuto do disparo agendado (arredondado), igual em todos os workers."""
+    agora = agora or datetime.now()
+    return (agora + timedelta(seconds=30)).replace(second=0, microsecond=0)
+
+@contextmanager
+def ingestao_exclusiva(espera_segundos: float = 0):
+    """
+    Obtém a concessão JOB_INGESTAO_OS, esperando até espera_segundos se outra
+    ingestão (diária ou intradiária) estiver em andamento. Sem ela, as duas
+    gravariam a mesma janela ao mesmo tempo (marca d'água, auxiliares das OS).
+    O bloco recebe True se a concessão foi obtida.
+
+    A concessão vale SCHEDULER_LEASE_SECONDS e é renovada a cada lote gravado
+    pelo pipeline (renovar_concessao); se a renovação falhar, a ingestão é
+    interrompida com ConcessaoPerdida em vez de seguir junto com outra.
+    """
+    limite = time.monotonic() + espera_segundos
+    # O slot é o instante atual: a concessão só impede execuções simultâneas
+    slot = datetime.now()
+    while not JobLease.acquire(JOB_INGESTAO_OS, slot, SCHEDULER_LEASE_SECONDS):
+        if time.monotonic() >= limite:
+            yield False
+            return
+        time.sleep(5)
+        slot = datetime.now()
+
+    try:
+        with manter_concessao(JOB_INGESTAO_OS, slot, SCHEDULER_LEASE_SECONDS):
+            yield True
+    finally:
+        JobLease.release(JOB_INGESTAO_OS, slot)
 
 def rotina_diaria_os(app):
     with app.app_context():
-        data = DATA 
-        logger.info(f"⏰ Iniciando rotina diária: {datetime.now()} (data: {data})")
-        try:
-            dados_tecnicos = listar_tecnicos(TOKEN, APP_NAME, f"{BASE_URL}/api/ura/tecnicos/")
-            os_dados = buscar_os(TOKEN, APP_NAME, f"{BASE_URL}/api/ura/ordemservico/list/", data)
+        # Vários processos disparam o job no mesmo horário: só um executa
+        if not JobLease.acquire(JOB_ROTINA_DIARIA, slot_do_disparo(), SCHEDULER_LEASE_SECONDS):
+            logger.info("⏭️ Rotina diária já executada ou em execução por outro processo")
+            return
 
-            os_ids = [os["id"] for os in os_dados.get("ordens_servicos", []) if "id" in os]
-            dados_os_detalhadas = {
-                str(os_id): buscar_os_por_id(TOKEN, APP_NAME, os_id, BASE_URL)
-                for os_id in os_ids
-            }
+        logger.info(f"⏰ Iniciando rotina diária: {datetime.now()} (modo: {SYNC_MODE})")
+        try:
+            with ingestao_exclusiva(INGESTION_LOCK_WAIT_SECONDS) as obtida:
+                if not obtida:
+                    logger.error("❌ Rotina diária não executada: outra ingestão de OS segue em andamento")
+                    return
+                resultado = _executar_rotina_diaria(app)
 
-            resultado = salvar_dados_no_banco(dados_tecnicos, dados_os_detalhadas)
+            DashboardCache.invalidate_months(resultado.get('meses_atualizados', []))
             logger.info(f"✅ Rotina diária finalizada: {resultado}")
         except Exception as e:
             logger.error(f"❌ Erro na rotina diária: {e}")
+        finally:
+            JobLease.release(JOB_ROTINA_DIARIA)
+
+def _executar_rotina_diaria(app) -> dict:
+    with registrar_execucao(app, "diaria") as execucao:
+        if SYNC_MODE == "incremental":
+            resultado = sincronizar_os(TOKEN, APP_NAME, BASE_URL)
+        else:
+            data = DATA
+            dados_tecnicos = listar_tecnicos(TOKEN, APP_NAME, f"{BASE_URL}/api/ura/tecnicos/")
+            os_dados = buscar_os_paginado(TOKEN, APP_NAME, f"{BASE_URL}/api/ura/ordemservico/list/", data)
+
+            os_ids = [os["id"] for os in os_dados]
+            resultado = ingerir_os(TOKEN, APP_NAME, BASE_URL, os_ids, dados_tecnicos)
+        execucao['resultado'] = resultado
+    return resultado
+
+def sincronizacao_intradiaria_os(app):
+    """
+    Sincronização ao longo do dia: busca apenas as OS encerradas depois da
+    marca d'água e recalcula somente os meses afetados. Sem novidades, custa
+    uma listagem na API e uma consulta ao banco.
+    """
+    with app.app_context():
+        if not JobLease.acquire(JOB_SINCRONIZACAO_INTRADIARIA, slot_do_disparo(), SCHEDULER_LEASE_SECONDS):
+            return
+
+        inicio = time.perf_counter()
+        try:
+            # Com a rotina diária (ou outra ingestão) em andamento, fica para o próximo ciclo
+            with ingestao_exclusiva() as obtida:
+                if not obtida:
+                    logger.info("⏭️ Sincronização intradiária adiada: outra ingestão de OS em andamento")
+                    return
+                with registrar_execucao(app, "intradiaria") as execucao:
+                    resultado = sincronizar_os(TOKEN, APP_NAME, BASE_URL)
+                    execucao['resultado'] = resultado
+            DashboardCache.invalidate_months(resultado.get('meses_atualizados', []))
+            logger.info(f"🔁 Sincronização intradiária: {resultado.get('novas', 0)} OS novas "
+                        f"em {time.perf_counter() - inicio:.2f}s")
+        except Exception as e:
+            logger.error(f"❌ Erro na sincronização intradiária: {e}")
+        finally:
+            JobLease.release(JOB_SINCRONIZACAO_INTRADIARIA)
+
+def manutencao_auditoria(app):
+    """Cria as próximas partições de audit_records e apaga as fora da retenção."""
+    with app.app_context():
+        if not JobLease.acquire(JOB_MANUTENCAO_AUDITORIA, slot_do_disparo(), SCHEDULER_LEASE_SECONDS):
+            return
+
+        try:
+            manter_auditoria()
+        except Exception as e:
+            logger.error(f"❌ Erro na manutenção da auditoria: {e}")
+        finally:
+            JobLease.release(JOB_MANUTENCAO_AUDITORIA)
+
+def manutencao_service_orders(app):
+    """Cria as próximas partições de service_orders, arquiva as antigas e atualiza as estatísticas."""
+    with app.app_context():
+        if not JobLease.acquire(JOB_MANUTENCAO_OS, slot_do_disparo(), SCHEDULER_LEASE_SECONDS):
+            return
+
+        try:
+            manter_service_orders()
+        except Exception as e:
+            logger.error(f"❌ Erro na manutenção de service_orders: {e}")
+        finally:
+            JobLease.release(JOB_MANUTENCAO_OS)
 
 def iniciar_scheduler(app):
     scheduler = BackgroundScheduler(timezone="America/Sao_Paulo")
@@ -47,10 +181,43 @@ def iniciar_scheduler(app):
     scheduler.add_job(
         rotina_diaria_os,
         trigger,
-        id="rotina_diaria_os",
+        id=JOB_ROTINA_DIARIA,
+        replace_existing=True,
+        kwargs={"app": app}
+    )
+
+    if OS_INTRADAY_INTERVAL_MINUTES > 0:
+        # Cron (e não intervalo) para que todos os processos disparem nos mesmos minutos
+        scheduler.add_job(
+            sincronizacao_intradiaria_os,
+            CronTrigger(minute=f"*/{OS_INTRADAY_INTERVAL_MINUTES}"),
+            id=JOB_SINCRONIZACAO_INTRADIARIA,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            kwargs={"app": app}
+        )
+
+    hora_auditoria, minuto_auditoria = map(int, AUDIT_MAINTENANCE_HOUR.split(":"))
+    scheduler.add_job(
+        manutencao_auditoria,
+        CronTrigger(hour=hora_auditoria, minute=minuto_auditoria),
+        id=JOB_MANUTENCAO_AUDITORIA,
+        replace_existing=True,
+        coalesce=True,
+        kwargs={"app": app}
+    )
+
+    hora_manutencao, minuto_manutencao = map(int, OS_MAINTENANCE_HOUR.split(":"))
+    scheduler.add_job(
+        manutencao_service_orders,
+        CronTrigger(hour=hora_manutencao, minute=minuto_manutencao),
+        id=JOB_MANUTENCAO_OS,
         replace_existing=True,
+        coalesce=True,
         kwargs={"app": app}
     )
 
     scheduler.start()
-    logger.info(f"🕒 Scheduler iniciado, rotina diária marcada para {HORARIO_EXECUCAO}")
+    logger.info(f"🕒 Scheduler iniciado, rotina diária marcada para {HORARIO_EXECUCAO}"
+                + (f", sincronização a cada {OS_INTRADAY_INTERVAL_MINUTES} min" if OS_INTRADAY_INTERVAL_MINUTES > 0 else ""))
@@ -1,11 +1,20 @@
 from app.database.connection import db
-from app.models.expert import Expert
 from app.models.customer import Customer
 from app.models.service_order import ServiceOrder
+from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
 from datetime import datetime
+import os
+import time
 
 from app.models.type_service import TypeService
-from tests.busca_OS import buscar_os, buscar_os_por_id, listar_tecnicos
+from app.service.reference_cache import ReferenceCache
+from app.utils.busca_OS import buscar_detalhes_os, buscar_os_paginado, listar_tecnicos
+from app.utils import ingestion_metrics
+from app.utils.audit_writer import AuditWriter, auditoria_ativa
+from app.utils.payload_store import payload_hash
+
+# Quantidade de OS gravadas por upsert/commit
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
 
 def salvar_dados_no_banco(dados_tecnicos, dados_os_detalhadas):
     """
@@ -16,21 +25,31 @@ def salvar_dados_no_banco(dados_tecnicos, dados_os_detalhadas):
         dados_os_detalhadas: Dados detalhados das OS do JSON
     """
     try:
+        # 0. Carregar técnicos e tipos de serviço em memória para toda a execução
+        ReferenceCache.preload()
+
         # 1. Primeiro, salvar os técnicos
         print("💾 Salvando técnicos no banco...")
         tecnicos_salvos = salvar_tecnicos(dados_tecnicos)
         
         # 2. Salvar clientes e ordens de serviço
         print("💾 Salvando clientes e ordens de serviço...")
-        ordens_salvas = salvar_ordens_servico(dados_os_detalhadas, tecnicos_salvos)
+        meses_anteriores = set()
+        ordens_salvas = salvar_ordens_servico(dados_os_detalhadas, tecnicos_salvos,
+                                              meses_anteriores=meses_anteriores)
+        
+        # 3. Atualizar o rollup mensal apenas dos meses afetados (inclusive os que as OS deixaram)
+        meses_atualizados = ServiceOrderMonthlyStats.refresh_for_orders(ordens_salvas, meses_anteriores)
         
         print(f"✅ Dados salvos com sucesso!")
         print(f"📊 Técnicos salvos: {len(tecnicos_salvos)}")
         print(f"📊 Ordens de serviço salvas: {len(ordens_salvas)}")
+        print(f"📊 Meses recalculados: {len(meses_atualizados)}")
         
         return {
             'tecnicos': len(tecnicos_salvos),
-            'ordens_servico': len(ordens_salvas)
+            'ordens_servico': len(ordens_salvas),
+            'meses_atualizados': meses_atualizados
         }
         
     except Exception as e:
@@ -57,51 +76,77 @@ def salvar_tecnicos(dados_tecnicos):
     else:
         lista_tecnicos = dados_tecnicos
     
+    # Usar o nome se disponível, caso contrário usar o username
+    nomes = {}
     for tecnico_data in lista_tecnicos:
-        try:
-            # Usar o nome se disponível, caso contrário usar o username
-            nome = tecnico_data.get('nome') or tecnico_data.get('username', '')
-            
-            if not nome:
-                continue
-                
-            # Verificar se o técnico já existe
-            tecnico_existente = Expert.get_by_name(nome)
-            
-            if tecnico_existente:
-                # Atualizar se necessário
-                tecnicos_salvos[tecnico_data['username']] = tecnico_existente.id
-                continue
-            
-            # Criar novo técnico
-            novo_tecnico = Expert.create(nome=nome)
-            tecnicos_salvos[tecnico_data['username']] = novo_tecnico.id
-            
-            print(f"  👨‍💼 Técnico salvo: {nome} (ID: {novo_tecnico.id})")
-            
-        except Exception as e:
-            print(f"  ⚠️ Erro ao salvar técnico {tecnico_data.get('username')}: {e}")
-            continue
+        nome = tecnico_data.get('nome') or tecnico_data.get('username', '')
+        if nome and tecnico_data.get('username'):
+            nomes[tecnico_data['username']] = nome
+
+    try:
+        # Busca os existentes e cria os novos em bloco
+        ids_por_nome, criados = ReferenceCache.resolve_experts(nomes.values())
+    except Exception as e:
+        # Sem os técnicos, todas as OS seriam gravadas sem responsável nem
+        # auxiliares (e o payload_hash deixaria sobrescrever as corretas)
+        db.session.rollback()
+        print(f"  ❌ Erro ao salvar técnicos, importação interrompida: {e}")
+        raise
+
+    for nome in criados:
+        print(f"  👨‍💼 Técnico salvo: {nome} (ID: {ids_por_nome[nome]})")
+
+    for username, nome in nomes.items():
+        tecnicos_salvos[username] = ids_por_nome[nome]
     
     return tecnicos_salvos
 
-def salvar_ordens_servico(dados_os_detalhadas, tecnicos_salvos):
+def salvar_ordens_servico(dados_os_detalhadas, tecnicos_salvos, tamanho_lote: int = None,
+                          meses_anteriores: set = None):
     """
     Salva clientes e ordens de serviço no banco de dados.
+
+    As ordens são gravadas em lotes de tamanho_lote (padrão INGEST_BATCH_SIZE)
+    com um upsert por lote e um commit por lote. OS cujo payload_hash não mudou
+    desde a última importação não são regravadas.
     
     Args:
         dados_os_detalhadas: Dados detalhados das OS
         tecnicos_salvos: Dicionário com username -> ID dos técnicos
+        tamanho_lote: Quantidade de OS por lote
+        meses_anteriores: Recebe os (ano, mês) de onde OS atualizadas saíram
         
     Returns:
-        list: Lista de IDs das ordens de serviço salvas
+        list: Lista de IDs das ordens de serviço inseridas ou alteradas
     """
     ordens_salvas = []
+    tamanho_lote = tamanho_lote or INGEST_BATCH_SIZE
 
     if not isinstance(dados_os_detalhadas, dict):
         print("❌ Formato inválido para dados de OS detalhadas")
         return ordens_salvas
 
+    itens = list(dados_os_detalhadas.items())
+    for inicio in range(0, len(itens), tamanho_lote):
+        lote = preparar_lote(dict(itens[inicio:inicio + tamanho_lote]), tecnicos_salvos)
+        if lote:
+            ordens_salvas.extend(salvar_lote_ordens(lote, meses_anteriores=meses_anteriores))
+
+    return ordens_salvas
+
+
+def preparar_lote(dados_os_detalhadas, tecnicos_salvos):
+    """
+    Converte um lote de OS da API nos dados de ServiceOrder.upsert_many,
+    criando antes, em bloco, os clientes e tipos de serviço que faltam.
+
+    Returns:
+        list: dados preparados das OS válidas do lote
+    """
+    # Clientes e tipos de serviço do lote resolvidos de uma vez
+    preparar_referencias(dados_os_detalhadas)
+
+    lote = []
     for os_id, os_data in dados_os_detalhadas.items():
         try:
             if not isinstance(os_data, dict):
@@ -117,24 +162,130 @@ def salvar_ordens_servico(dados_os_detalhadas, tecnicos_salvos):
             dados_os = preparar_dados_os(os_data, tecnicos_salvos, cliente_id)
             if not dados_os:
                 continue
+            if not dados_os['type_service_id']:
+                print(f"  ⚠️ OS {os_id} sem tipo de serviço, ignorada")
+                continue
 
-            # 3️⃣ Verificar existência da OS
-            os_existente = ServiceOrder.get_by_os_id(os_id)
-            if os_existente:
-                ServiceOrder.update(os_existente.id, **dados_os)
-                ordens_salvas.append(os_existente.id)
-                print(f"  🔄 OS atualizada: {os_id}")
-            else:
-                nova_os = ServiceOrder.create(**dados_os)
-                ordens_salvas.append(nova_os.id)
-                print(f"  📝 OS salva: {os_id} - Cliente: {os_data.get('cliente', 'N/A')}")
+            # Impressão digital dos dados: OS sem mudanças não são regravadas
+            dados_os['payload_hash'] = payload_hash(dados_os)
+            lote.append(dados_os)
 
         except Exception as e:
-            from app.database import db
             db.session.rollback()
-            print(f"  ❌ Erro ao salvar OS {os_id}: {e}")
+            print(f"  ❌ Erro ao preparar OS {os_id}: {e}")
+
+    return lote
 
-    return ordens_salvas
+
+def salvar_lote_ordens(lote, falhas: dict = None, meses_anteriores: set = None):
+    """
+    Grava um lote de OS preparadas com um único upsert e um commit.
+    Se o lote falhar, é desfeito e regravado uma OS por vez, isolando a que deu erro.
+    As OS que não puderam ser gravadas vão para falhas ({os_id: erro}), se informado.
+    Os meses de onde OS atualizadas saíram (finalização alterada) vão para
+    meses_anteriores, se informado, para que o rollup deles também seja recalculado.
+
+    Returns:
+        list: IDs das ordens gravadas
+    """
+    try:
+        inicio = time.perf_counter()
+        existentes = ServiceOrder.payload_hashes([dados_os['os_id'] for dados_os in lote])
+        meses_lote = set()
+        ids = ServiceOrder.upsert_many(lote, meses_lote)
+        db.session.commit()
+        if meses_anteriores is not None:
+            meses_anteriores.update(meses_lote)
+        auditar_lote(lote, ids, existentes)
+
+        inseridas = sum(1 for os_id in ids if os_id not in existentes)
+        ingestion_metrics.registrar_gravacao(time.perf_counter() - inicio)
+        ingestion_metrics.contar(inseridas=inseridas, atualizadas=len(ids) - inseridas,
+                                 inalteradas=len(lote) - len(ids))
+        print(f"  💾 Lote salvo: {len(ids)} OS gravadas, {len(lote) - len(ids)} sem alteração")
+        return list(ids.values())
+
+    except Exception as e:
+        db.session.rollback()
+        if len(lote) == 1:
+            print(f"  ❌ Erro ao salvar OS {lote[0].get('os_id')}: {getattr(e, 'orig', e)}")
+            ingestion_metrics.contar(falhas=1)
+            ingestion_metrics.registrar_erro(f"OS {lote[0].get('os_id')}: {getattr(e, 'orig', e)}")
+            if falhas is not None:
+                falhas[lote[0].get('os_id')] = str(getattr(e, 'orig', e))
+            return []
+
+        print(f"  ⚠️ Erro ao salvar lote de {len(lote)} OS, gravando individualmente: {getattr(e, 'orig', e)}")
+        ordens_salvas = []
+        for dados_os in lote:
+            ordens_salvas.extend(salvar_lote_ordens([dados_os], falhas, meses_anteriores))
+        return ordens_salvas
+
+
+def auditar_lote(lote, ids, hashes_anteriores):
+    """
+    Auditoria das OS gravadas pelo upsert, que por ser Core não passa pelos
+    listeners do ORM: INSERT para as novas e, para as atualizadas, a troca do
+    payload_hash (os campos alterados não são lidos antes da gravação).
+    Respeita sem_auditoria (AUDIT_SKIP_INGESTION).
+    """
+    if not ids or not auditoria_ativa():
+        return
+
+    hashes_novos = {dados_os['os_id']: dados_os.get('payload_hash') for dados_os in lote}
+    agora = datetime.now()
+    rows = []
+    for os_id, order_id in ids.items():
+        atualizada = os_id in hashes_anteriores
+        rows.append({
+            "table_name": ServiceOrder.__tablename__,
+            "record_id": str(order_id),
+            "field": "payload_hash" if atualizada else "*",
+            "old_value": hashes_anteriores.get(os_id) if atualizada else None,
+            "new_value": hashes_novos.get(os_id) if atualizada else "CREATED",
+            "changed_by": 0,
+            "changed_at": agora,
+            "action": "UPDATE" if atualizada else "INSERT",
+        })
+    AuditWriter.submit(db.engine, rows)
+
+
+def dados_cliente(os_data):
+    """Retorna (contrato, nome, plano) do cliente da OS, ou None se incompleto."""
+    contrato_id = str(os_data.get('contrato_id') or os_data.get('servico_id', ''))
+    cliente_nome = os_data.get('cliente', '')
+
+    if not contrato_id or not cliente_nome:
+        return None
+    return contrato_id, cliente_nome, os_data.get('plano', '')
+
+
+def preparar_referencias(dados_os_detalhadas):
+    """
+    Busca em bloco os clientes e tipos de serviço usados pelas OS e cria os que
+    faltam, deixando-os no ReferenceCache para o processamento de cada OS.
+    """
+    clientes = {}
+    motivos = []
+
+    for os_data in dados_os_detalhadas.values():
+        if not isinstance(os_data, dict):
+            continue
+
+        cliente = dados_cliente(os_data)
+        if cliente:
+            clientes.setdefault(cliente[0], cliente[1:])
+        motivos.append((os_data.get('os_motivo_descricao') or '').strip())
+
+    try:
+        ReferenceCache.resolve_customers(clientes)
+        ReferenceCache.resolve_type_services(motivos)
+    except Exception as e:
+        # As OS continuam resolvendo (e criando) um a um
+        db.session.rollback()
+        print(f"  ⚠️ Erro ao preparar clientes e tipos de serviço: {e}")
+
+    print(f"📇 Referências carregadas: {len(clientes)} clientes, {len(set(motivos) - {''})} tipos de serviço")
 
 
 def salvar_ou_buscar_cliente(os_data):
@@ -148,17 +299,15 @@ def salvar_ou_buscar_cliente(os_data):
         int: ID do cliente
     """
     try:
-        contrato_id = str(os_data.get('contrato_id') or os_data.get('servico_id', ''))
-        cliente_nome = os_data.get('cliente', '')
-        plano = os_data.get('plano', '')
-        
-        if not contrato_id or not cliente_nome:
+        cliente = dados_cliente(os_data)
+        if not cliente:
             return None
+        contrato_id, cliente_nome, plano = cliente
         
         # Verificar se cliente já existe
-        cliente_existente = Customer.get_by_contract(contrato_id)
-        if cliente_existente:
-            return cliente_existente.id
+        cliente_existente_id = ReferenceCache.customer_id(contrato_id)
+        if cliente_existente_id:
+            return cliente_existente_id
         
         # Criar novo cliente
         novo_cliente = Customer.create(
@@ -167,7 +316,7 @@ def salvar_ou_buscar_cliente(os_data):
             id_contrato=contrato_id
         )
         
-        return novo_cliente.id
+        return ReferenceCache.remember_customer(novo_cliente)
         
     except Exception as e:
         print(f"    ⚠️ Erro ao salvar cliente: {e}")
@@ -192,10 +341,12 @@ def preparar_dados_os(os_data, tecnicos_salvos, cliente_id):
         ]
 
         # 🔹 Criar ou buscar TypeService
-        motivo_descricao = os_data.get('os_motivo_descricao', '').strip()
-        type_service = TypeService.get_by_name(motivo_descricao)
-        if not type_service and motivo_descricao:
-            type_service = TypeService.create(name=motivo_descricao)
+        motivo_descricao = (os_data.get('os_motivo_descricao') or '').strip()
+        type_service_id = ReferenceCache.type_service_id(motivo_descricao)
+        if not type_service_id and motivo_descricao:
+            type_service_id, _ = ReferenceCache.remember_type_service(
+                TypeService.create(name=motivo_descricao)
+            )
 
         return {
             'os_id': str(os_data.get('os_id', '')),
@@ -204,7 +355,7 @@ def preparar_dados_os(os_data, tecnicos_salvos, cliente_id):
             'os_data_finalizacao': data_finalizacao,
             'os_conteudo': os_data.get('os_conteudo', ''),
             'os_servicoprestado': os_data.get('os_servicoprestado', ''),
-            'type_service_id': type_service.id if type_service else None,
+            'type_service_id': type_service_id,
             'os_tecnico_responsavel': tecnico_responsavel_id,
             'customer_id': cliente_id,
             'assistants': tecnicos_auxiliares
@@ -258,18 +409,18 @@ def executar_e_salvar_no_banco(token: str, app: str, base_url: str, data: str =
         
         # 2. Buscar OS finalizadas
         print("🔍 Buscando ordens de serviço...")
-        os_dados = buscar_os(token, app, URL_OS, data)
+        os_dados = buscar_os_paginado(token, app, URL_OS, data)
         
         # 3. Extrair IDs e buscar detalhes
-        os_ids = [os["id"] for os in os_dados.get("ordens_servicos", []) if "id" in os]
+        os_ids = [os["id"] for os in os_dados]
         print(f"📦 Total de OS encontradas: {len(os_ids)}")
         
         # 4. Buscar detalhes das OS
-        dados_os_detalhadas = {}
-        for os_id in os_ids:
-            detalhes = buscar_os_por_id(token, app, os_id, base_url)
-            if detalhes:
-                dados_os_detalhadas[str(os_id)] = detalhes
+        dados_os_detalhadas = {
+            os_id: detalhes
+            for os_id, detalhes in buscar_detalhes_os(token, app, os_ids, base_url).items()
+            if detalhes
+        }
         
         # 5. Salvar tudo no banco
         resultado = salvar_dados_no_banco(dados_tecnicos, dados_os_detalhadas)
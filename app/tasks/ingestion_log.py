@@ -0,0 +1,45 @@
+import json
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from app.models.ingestion_run import STATUS_FAILED, STATUS_SUCCESS, IngestionRun
+from app.utils import ingestion_metrics
+from app.utils.audit_writer import AUDIT_SKIP_INGESTION, sem_auditoria
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def registrar_execucao(app, tipo: str):
+    """
+    Coleta as métricas da ingestão executada no bloco (latência da API por
+    endpoint, linhas inseridas/atualizadas/inalteradas, tempo de gravação,
+    erros) e grava uma linha em ingestion_runs ao final, com ou sem erro.
+
+    Com AUDIT_SKIP_INGESTION, as gravações do bloco não geram auditoria.
+    O bloco recebe um dict; o que for guardado em ['resultado'] vai para summary.
+    """
+    execucao = {'resultado': None}
+    iniciada_em = datetime.now()
+    inicio = time.perf_counter()
+    status = STATUS_FAILED
+    auditoria = sem_auditoria() if AUDIT_SKIP_INGESTION else nullcontext()
+
+    with ingestion_metrics.coletar() as coletor, auditoria:
+        try:
+            yield execucao
+            status = STATUS_SUCCESS
+        except Exception as e:
+            coletor.registrar_erro(e)
+            raise
+        finally:
+            try:
+                with app.app_context():
+                    IngestionRun.record(
+                        tipo, status, iniciada_em, time.perf_counter() - inicio, coletor.resumo(),
+                        summary=json.loads(json.dumps(execucao['resultado'], default=str))
+                    )
+            except Exception as e:
+                logger.error(f"❌ Erro ao registrar a execução da ingestão ({tipo}): {e}")
@@ -0,0 +1,55 @@
+import logging
+import os
+from datetime import datetime
+
+from app.database import db
+from app.database.partitions import somar_meses
+from app.models.audit_record import AuditRecord
+
+logger = logging.getLogger(__name__)
+
+# Meses completos de auditoria compacta mantidos além do atual; 0 mantém tudo
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "12"))
+# Partições mensais criadas com antecedência
+AUDIT_PARTITIONS_AHEAD = int(os.getenv("AUDIT_PARTITIONS_AHEAD", "2"))
+
+
+def manter_auditoria(meses_retencao: int = None, meses_a_frente: int = None,
+                     referencia: datetime = None) -> dict:
+    """
+    Manutenção de audit_records: apaga as partições dos meses fora da
+    retenção (DROP TABLE da partição, sem varrer nem gerar linhas mortas) e
+    cria as dos próximos meses e as dos meses que caíram na partição default.
+    Fora do PostgreSQL, apaga as linhas antigas; no PostgreSQL, só as que
+    tenham caído na partição default.
+
+    Com meses_retencao=12 em outubro de 2026, fica de outubro de 2025 em diante.
+
+    Returns:
+        dict: partições criadas/apagadas (ou linhas apagadas), as que falharam e o limite usado
+    """
+    meses_retencao = AUDIT_RETENTION_MONTHS if meses_retencao is None else meses_retencao
+    meses_a_frente = AUDIT_PARTITIONS_AHEAD if meses_a_frente is None else meses_a_frente
+    referencia = referencia or datetime.now()
+    postgres = db.engine.dialect.name == 'postgresql'
+
+    resultado = {'criadas': [], 'falhas': {}, 'apagadas': [], 'linhas_apagadas': 0, 'limite': None}
+
+    # Retenção antes da criação: linhas antigas da default não viram partições
+    if meses_retencao > 0:
+        ano, mes = somar_meses(referencia.year, referencia.month, -meses_retencao)
+        limite = datetime(ano, mes, 1)
+        resultado['limite'] = limite.strftime('%Y-%m-%d')
+        if postgres:
+            resultado['apagadas'] = AuditRecord.drop_partitions_before(ano, mes)
+        # Sem partições (outros bancos) ou o que caiu na partição default
+        resultado['linhas_apagadas'] = AuditRecord.delete_before(limite)
+
+    if postgres:
+        resultado['criadas'], resultado['falhas'] = AuditRecord.create_partitions(meses_a_frente, referencia)
+        for nome, erro in resultado['falhas'].items():
+            logger.error(f"❌ Erro ao criar a partição {nome}: {erro}")
+
+    logger.info(f"🧹 Manutenção da auditoria: {len(resultado['criadas'])} partições criadas, "
+                f"{len(resultado['apagadas'])} apagadas (retenção a partir de {resultado['limite'] or '-'})")
+    return resultado
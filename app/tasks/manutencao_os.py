@@ -0,0 +1,68 @@
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.database.connection import db
+from app.database.partitions import somar_meses
+from app.models.service_order import ServiceOrder
+
+logger = logging.getLogger(__name__)
+
+TABELAS = ('service_orders', 'service_order_assistants')
+
+# Partições mensais de service_orders criadas com antecedência
+OS_PARTITIONS_AHEAD = int(os.getenv("OS_PARTITIONS_AHEAD", "2"))
+# Meses completos mantidos em service_orders além do atual; os anteriores são
+# arquivados (partição desanexada). 0 mantém tudo
+OS_ARCHIVE_MONTHS = int(os.getenv("OS_ARCHIVE_MONTHS", "0"))
+
+
+def manter_service_orders(meses_a_frente: int = None, meses_arquivo: int = None,
+                          referencia: datetime = None) -> dict:
+    """
+    Manutenção periódica de service_orders (PostgreSQL), particionada por mês
+    de os_data_finalizacao: cria as partições dos próximos meses e as dos
+    meses que caíram na partição default, arquiva (DETACH PARTITION) os meses
+    anteriores a meses_arquivo e atualiza as estatísticas (ANALYZE) das
+    tabelas de OS.
+
+    Com meses_arquivo=36 em outubro de 2026, ficam de outubro de 2023 em diante.
+
+    Returns:
+        dict: partições criadas/arquivadas, as que falharam e segundos gastos em cada etapa
+    """
+    if db.engine.dialect.name != 'postgresql':
+        logger.warning("⚠️ Manutenção de service_orders disponível apenas no PostgreSQL")
+        return {}
+
+    meses_a_frente = OS_PARTITIONS_AHEAD if meses_a_frente is None else meses_a_frente
+    meses_arquivo = OS_ARCHIVE_MONTHS if meses_arquivo is None else meses_arquivo
+    referencia = referencia or datetime.now()
+    resultado = {'criadas': [], 'falhas': {}, 'arquivadas': [], 'tempos': {}}
+
+    # Arquivamento antes da criação: OS antigas da default não viram partições
+    if meses_arquivo > 0:
+        inicio = time.perf_counter()
+        ano, mes = somar_meses(referencia.year, referencia.month, -meses_arquivo)
+        resultado['arquivadas'] = ServiceOrder.detach_partitions_before(ano, mes)
+        resultado['tempos']['arquivamento'] = round(time.perf_counter() - inicio, 1)
+
+    inicio = time.perf_counter()
+    resultado['criadas'], resultado['falhas'] = ServiceOrder.create_partitions(meses_a_frente, referencia)
+    resultado['tempos']['particoes'] = round(time.perf_counter() - inicio, 1)
+    for nome, erro in resultado['falhas'].items():
+        logger.error(f"❌ Erro ao criar a partição {nome}: {erro}")
+
+    with db.engine.connect() as conn:
+        conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+        for tabela in TABELAS:
+            inicio = time.perf_counter()
+            conn.execute(text(f"ANALYZE {tabela}"))
+            resultado['tempos'][f'analyze_{tabela}'] = round(time.perf_counter() - inicio, 1)
+
+    logger.info(f"🧹 Manutenção de service_orders: {len(resultado['criadas'])} partições criadas, "
+                f"{len(resultado['arquivadas'])} arquivadas ({resultado['tempos']})")
+    return resultado
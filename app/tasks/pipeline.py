@@ -0,0 +1,238 @@
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+import requests
+from flask import current_app
+
+from app.models.job_lease import renovar_concessao
+from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
+from app.service.reference_cache import ReferenceCache
+from app.tasks.helpers import (INGEST_BATCH_SIZE, parse_datetime, preparar_lote, salvar_lote_ordens,
+                               salvar_tecnicos)
+from app.utils import ingestion_metrics
+from app.utils.busca_OS import OS_FETCH_WORKERS, buscar_os_por_id
+
+logger = logging.getLogger(__name__)
+
+# Capacidade de cada fila entre as etapas, em lotes (limita a memória em uso)
+PIPELINE_QUEUE_BATCHES = int(os.getenv("PIPELINE_QUEUE_BATCHES", "2"))
+
+_FIM = object()
+
+
+class EstatisticaEtapa:
+    """Itens processados e tempo ocupado (somado entre as threads) de uma etapa."""
+
+    def __init__(self, nome: str, workers: int = 1):
+        self.nome = nome
+        self.workers = workers
+        self.itens = 0
+        self.ocupado = 0.0
+        self.fila_maxima = 0
+        self._lock = threading.Lock()
+
+    def registrar(self, itens: int, segundos: float, fila: queue.Queue = None):
+        with self._lock:
+            self.itens += itens
+            self.ocupado += segundos
+            if fila is not None:
+                self.fila_maxima = max(self.fila_maxima, fila.qsize())
+
+    def resumo(self, duracao: float) -> dict:
+        return {
+            'workers': self.workers,
+            'itens': self.itens,
+            'ocupado_s': round(self.ocupado, 2),
+            'itens_por_segundo': round(self.itens / duracao, 2) if duracao else 0,
+            'fila_maxima': self.fila_maxima,
+        }
+
+
+def _colocar(fila: queue.Queue, item, parar: threading.Event) -> bool:
+    """put bloqueante que desiste se o pipeline for interrompido."""
+    while not parar.is_set():
+        try:
+            fila.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _retirar(fila: queue.Queue, parar: threading.Event):
+    """get bloqueante que devolve _FIM se o pipeline for interrompido."""
+    while not parar.is_set():
+        try:
+            return fila.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    return _FIM
+
+
+def ingerir_os(token: str, app_name: str, base_url: str, os_ids: list, dados_tecnicos,
+               fetch_workers: int = None, tamanho_lote: int = None, lock_gravacao=None) -> dict:
+    """
+    Busca, prepara e grava as OS em três etapas simultâneas ligadas por filas limitadas:
+
+    1. busca: fetch_workers threads buscam os detalhes de cada OS na API;
+    2. preparo: uma thread agrupa as respostas em lotes de tamanho_lote e os converte
+       (clientes, tipos de serviço, parse_datetime, preparar_dados_os);
+    3. gravação: a thread chamadora grava cada lote com um upsert e um commit.
+
+    Quando a gravação atrasa, as filas enchem e a busca espera, então a memória
+    fica limitada a poucos lotes, qualquer que seja o tamanho do dia.
+    lock_gravacao (opcional) serializa as escritas no banco entre execuções paralelas.
+    Cada lote gravado renova a concessão da execução (renovar_concessao), se houver;
+    se ela tiver sido perdida, o pipeline para com ConcessaoPerdida.
+    Deve ser chamada dentro do contexto da aplicação.
+
+    Returns:
+        dict: mesmo formato de salvar_dados_no_banco, mais a vazão de cada etapa em 'etapas',
+        as OS que não foram buscadas ou gravadas em 'falhas' ({os_id: {'etapa', 'erro',
+        'finalizacao'}}) e as ignoradas no preparo (sem cliente ou tipo de serviço) em
+        'ignoradas' ({os_id: data de finalização})
+    """
+    app = current_app._get_current_object()
+    fetch_workers = max(fetch_workers or OS_FETCH_WORKERS, 1)
+    tamanho_lote = tamanho_lote or INGEST_BATCH_SIZE
+    lock_gravacao = lock_gravacao or nullcontext()
+
+    with lock_gravacao:
+        ReferenceCache.preload()
+        tecnicos_salvos = salvar_tecnicos(dados_tecnicos)
+
+    ids_pendentes = queue.Queue()
+    for os_id in os_ids:
+        ids_pendentes.put(os_id)
+
+    respostas = queue.Queue(maxsize=tamanho_lote * PIPELINE_QUEUE_BATCHES)
+    lotes = queue.Queue(maxsize=PIPELINE_QUEUE_BATCHES)
+    parar = threading.Event()
+    erros = []
+    falhas = {}
+    ignoradas = {}
+
+    busca = EstatisticaEtapa('busca', fetch_workers)
+    preparo = EstatisticaEtapa('preparo')
+    gravacao = EstatisticaEtapa('gravacao')
+
+    def buscar():
+        try:
+            while not parar.is_set():
+                try:
+                    os_id = ids_pendentes.get_nowait()
+                except queue.Empty:
+                    break
+
+                inicio = time.perf_counter()
+                erro = "resposta inválida da API"
+                try:
+                    dados = buscar_os_por_id(token, app_name, os_id, base_url)
+                except requests.RequestException as e:
+                    logger.error(f"❌ Erro ao buscar OS {os_id}: {e}")
+                    ingestion_metrics.registrar_erro(f"OS {os_id}: {e}")
+                    dados, erro = None, str(e)
+                busca.registrar(1, time.perf_counter() - inicio, respostas)
+
+                if not dados:
+                    falhas[str(os_id)] = {'etapa': 'busca', 'erro': erro, 'finalizacao': None}
+
+                if dados and not _colocar(respostas, (str(os_id), dados), parar):
+                    break
+        finally:
+            _colocar(respostas, _FIM, parar)
+
+    def preparar():
+        with app.app_context():
+            try:
+                pendentes = fetch_workers
+                buffer = {}
+                while pendentes:
+                    item = _retirar(respostas, parar)
+                    if item is _FIM and parar.is_set():
+                        return
+                    if item is _FIM:
+                        pendentes -= 1
+                    else:
+                        buffer[item[0]] = item[1]
+
+                    if buffer and (len(buffer) >= tamanho_lote or not pendentes):
+                        inicio = time.perf_counter()
+                        with lock_gravacao:
+                            lote = preparar_lote(buffer, tecnicos_salvos)
+                        preparo.registrar(len(buffer), time.perf_counter() - inicio, lotes)
+                        preparadas = {dados_os['os_id'] for dados_os in lote}
+                        for os_id, dados in buffer.items():
+                            if os_id not in preparadas:
+                                ignoradas[os_id] = parse_datetime(dados.get('os_data_finalizacao')) \
+                                    if isinstance(dados, dict) else None
+                        buffer = {}
+                        if lote and not _colocar(lotes, lote, parar):
+                            return
+            except Exception as e:
+                erros.append(e)
+                parar.set()
+            finally:
+                _colocar(lotes, _FIM, parar)
+
+    inicio = time.perf_counter()
+    # Todas as etapas rodam em cópias do contexto atual: métricas da execução
+    # (ingestion_metrics) e, no preparo, que grava clientes e tipos de serviço, sem_auditoria
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(buscar,),
+                                name=f"pipeline_busca_{i}", daemon=True)
+               for i in range(fetch_workers)]
+    threads.append(threading.Thread(target=contextvars.copy_context().run, args=(preparar,),
+                                    name="pipeline_preparo", daemon=True))
+    for thread in threads:
+        thread.start()
+
+    ordens_salvas = []
+    meses_anteriores = set()
+    try:
+        while True:
+            lote = _retirar(lotes, parar)
+            if lote is _FIM:
+                break
+            inicio_lote = time.perf_counter()
+            falhas_lote = {}
+            with lock_gravacao:
+                ordens_salvas.extend(salvar_lote_ordens(lote, falhas_lote, meses_anteriores))
+            gravacao.registrar(len(lote), time.perf_counter() - inicio_lote)
+            for dados_os in lote:
+                if dados_os['os_id'] in falhas_lote:
+                    falhas[dados_os['os_id']] = {'etapa': 'gravacao', 'erro': falhas_lote[dados_os['os_id']],
+                                                 'finalizacao': dados_os.get('os_data_finalizacao')}
+            # Ingestão longa: mantém a concessão (ingestao_exclusiva) ou para se ela foi perdida
+            renovar_concessao()
+    except BaseException:
+        parar.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if erros:
+        raise erros[0]
+
+    with lock_gravacao:
+        meses_atualizados = ServiceOrderMonthlyStats.refresh_for_orders(ordens_salvas, meses_anteriores)
+
+    duracao = time.perf_counter() - inicio
+    etapas = {etapa.nome: etapa.resumo(duracao) for etapa in (busca, preparo, gravacao)}
+    logger.info(f"🚰 Pipeline: {len(os_ids)} OS em {duracao:.1f}s — " + ", ".join(
+        f"{nome} {dados['itens_por_segundo']}/s (ocupado {dados['ocupado_s']}s)" for nome, dados in etapas.items()
+    ))
+
+    return {
+        'tecnicos': len(tecnicos_salvos),
+        'ordens_servico': len(ordens_salvas),
+        'meses_atualizados': meses_atualizados,
+        'etapas': etapas,
+        'falhas': falhas,
+        'ignoradas': ignoradas,
+    }
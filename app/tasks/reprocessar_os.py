@@ -0,0 +1,41 @@
+import logging
+import time
+
+from app.tasks.helpers import salvar_dados_no_banco
+from app.tasks.ingestion_log import registrar_execucao
+from app.utils.payload_store import TECNICOS_KEY, get_payload_store
+
+logger = logging.getLogger(__name__)
+
+
+def reprocessar_cache(app, data_inicio: str, data_fim: str, tamanho_lote: int = 1000) -> dict:
+    """
+    Regrava no banco as OS do cache de respostas da API (payload_store)
+    finalizadas entre data_inicio e data_fim, sem nenhuma chamada à API.
+    Útil após mudanças em preparar_dados_os.
+    """
+    store = get_payload_store()
+    if store is None:
+        raise RuntimeError("Cache de respostas desativado (OS_PAYLOAD_CACHE=True para ativar)")
+
+    dados_tecnicos = store.get(TECNICOS_KEY) or []
+    inicio = time.perf_counter()
+    total_os = 0
+    meses = set()
+
+    with registrar_execucao(app, "reprocessamento") as execucao, app.app_context():
+        for lote in store.iter_os(data_inicio, data_fim, tamanho_lote=tamanho_lote):
+            resultado = salvar_dados_no_banco(dados_tecnicos, lote)
+            total_os += resultado.get('ordens_servico', 0)
+            meses.update(resultado.get('meses_atualizados', []))
+
+        segundos = time.perf_counter() - inicio
+        resumo = {
+            'ordens_servico': total_os,
+            'meses_atualizados': sorted(meses),
+            'segundos': round(segundos, 1),
+            'os_por_segundo': round(total_os / segundos, 2) if segundos else 0,
+        }
+        execucao['resultado'] = resumo
+    logger.info(f"♻️ Reprocessamento do cache finalizado: {resumo}")
+    return resumo
@@ -0,0 +1,117 @@
+import logging
+import os
+from datetime import date, datetime, time
+
+from app.models.service_order import ServiceOrder
+from app.models.sync_failure import ETAPA_PREPARO, SyncFailure
+from app.models.sync_watermark import SyncWatermark
+from app.tasks.pipeline import ingerir_os
+from app.utils.busca_OS import buscar_os_paginado, listar_tecnicos
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "ordens_servico"
+# Data inicial da primeira sincronização, quando ainda não há marca d'água (padrão: hoje)
+SYNC_START_DATE = os.getenv("OS_SYNC_START_DATE")
+# Tentativas de buscar/gravar uma OS antes de descartá-la (sync_failures)
+SYNC_MAX_ATTEMPTS = int(os.getenv("OS_SYNC_MAX_ATTEMPTS", "5"))
+
+
+def _posicao(finalizacao: datetime, os_id) -> tuple:
+    return (finalizacao or datetime.min, int(os_id))
+
+
+def posicoes_gravadas(os_ids: list) -> dict:
+    """{os_id: (os_data_finalizacao, os_id)} das OS informadas que já estão no banco."""
+    posicoes = {}
+    ids = [str(os_id) for os_id in os_ids]
+
+    for start in range(0, len(ids), 1000):
+        rows = ServiceOrder.query.with_entities(ServiceOrder.os_id, ServiceOrder.os_data_finalizacao) \
+            .filter(ServiceOrder.os_id.in_(ids[start:start + 1000])).all()
+        for os_id, finalizacao in rows:
+            if os_id.isdigit():
+                posicoes[os_id] = _posicao(finalizacao, os_id)
+
+    return posicoes
+
+
+def sincronizar_os(token: str, app_name: str, base_url: str, data_fim: str = None) -> dict:
+    """
+    Sincronização incremental: lista todas as páginas de OS encerradas desde o
+    dia da marca d'água até data_fim (padrão: hoje) e busca os detalhes apenas
+    das OS que ainda não foram gravadas até a marca d'água, mais as que
+    falharam em execuções anteriores (sync_failures).
+
+    A marca d'água avança até a maior (finalização, id) processada sem lacunas:
+    OS gravadas, sem alteração ou ignoradas no preparo (sem cliente ou tipo de
+    serviço) contam como processadas; uma falha de busca ou gravação segura a
+    marca d'água antes dela até ser gravada ou descartada, após
+    SYNC_MAX_ATTEMPTS tentativas.
+    """
+    watermark = SyncWatermark.get(WATERMARK_NAME)
+    if watermark and watermark.last_finalizacao:
+        data_inicio = watermark.last_finalizacao.date()
+    else:
+        data_inicio = datetime.strptime(SYNC_START_DATE, "%Y-%m-%d").date() if SYNC_START_DATE else date.today()
+    data_fim = data_fim or date.today().strftime("%Y-%m-%d")
+
+    logger.info(f"🔄 Sincronizando OS de {data_inicio} a {data_fim} "
+                f"(marca d'água: {watermark.position if watermark else 'nenhuma'})")
+
+    itens = buscar_os_paginado(token, app_name, f"{base_url}/api/ura/ordemservico/list/",
+                               data_inicio.strftime("%Y-%m-%d"), data_fim)
+    os_ids = [item["id"] for item in itens]
+
+    # Já gravadas até a marca d'água e descartadas não são buscadas de novo
+    limite = watermark.position if watermark else None
+    gravadas = posicoes_gravadas(os_ids) if limite else {}
+    descartadas = SyncFailure.dead_ids(os_ids)
+    novas = [os_id for os_id in os_ids
+             if str(os_id) not in descartadas and not (str(os_id) in gravadas and gravadas[str(os_id)] <= limite)]
+    listadas = {str(os_id) for os_id in novas}
+    novas += [os_id for os_id in SyncFailure.pending_ids() if os_id not in listadas]
+
+    logger.info(f"📦 {len(os_ids)} OS listadas, {len(novas)} novas desde a marca d'água "
+                f"ou a tentar de novo")
+    if not novas:
+        return {'listadas': len(os_ids), 'novas': 0, 'tecnicos': 0, 'ordens_servico': 0, 'meses_atualizados': [],
+                'falhas': 0, 'descartadas': []}
+
+    dados_tecnicos = listar_tecnicos(token, app_name, f"{base_url}/api/ura/tecnicos/")
+    resultado = ingerir_os(token, app_name, base_url, novas, dados_tecnicos)
+    falhas, ignoradas = resultado.pop('falhas'), resultado.pop('ignoradas')
+
+    for os_id in ignoradas:
+        logger.warning(f"⚠️ OS {os_id} ignorada no preparo (sem cliente ou tipo de serviço); descartada")
+    pendentes, descartadas_agora = SyncFailure.record(
+        {**falhas, **{os_id: {'etapa': ETAPA_PREPARO, 'erro': "ignorada no preparo", 'finalizacao': finalizacao}
+                      for os_id, finalizacao in ignoradas.items()}},
+        SYNC_MAX_ATTEMPTS
+    )
+    for falha in pendentes:
+        logger.warning(f"⚠️ OS {falha.os_id}: falha na etapa {falha.stage} "
+                       f"(tentativa {falha.attempts}/{SYNC_MAX_ATTEMPTS}): {falha.last_error}")
+    for falha in descartadas_agora:
+        if falha.stage != ETAPA_PREPARO:
+            logger.error(f"❌ OS {falha.os_id} descartada após {falha.attempts} tentativas "
+                         f"(etapa {falha.stage}): {falha.last_error}")
+
+    processadas = [str(os_id) for os_id in novas if str(os_id) not in falhas and str(os_id) not in ignoradas]
+    SyncFailure.resolve(processadas)
+
+    # Posições processadas: gravadas (ou sem alteração), ignoradas e descartadas;
+    # sem data de finalização conhecida, uma falha pendente segura a marca d'água no início da janela
+    posicoes = list(posicoes_gravadas(processadas).values())
+    posicoes += [_posicao(falha.finalizacao, falha.os_id) for falha in descartadas_agora
+                 if falha.finalizacao and falha.os_id.isdigit()]
+    bloqueios = [_posicao(falha.finalizacao or datetime.combine(data_inicio, time.min),
+                          falha.os_id if falha.os_id.isdigit() else 0) for falha in pendentes]
+    if bloqueios:
+        posicoes = [posicao for posicao in posicoes if posicao < min(bloqueios)]
+        logger.warning(f"⚠️ {len(pendentes)} OS a tentar de novo; marca d'água limitada a antes delas")
+    if posicoes:
+        SyncWatermark.advance(WATERMARK_NAME, *max(posicoes))
+
+    return {'listadas': len(os_ids), 'novas': len(novas), **resultado,
+            'falhas': len(pendentes), 'descartadas': [falha.os_id for falha in descartadas_agora]}
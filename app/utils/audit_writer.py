@@ -0,0 +1,229 @@
+import atexit
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import insert
+
+logger = logging.getLogger(__name__)
+
+# Grava a auditoria em uma thread de fundo em vez de na thread que fez o commit
+AUDIT_ASYNC = os.getenv("AUDIT_ASYNC", "False") == "True"
+# Transações aguardando gravação na fila da thread de fundo; cheia, grava na própria thread
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "1000"))
+# Máximo de linhas juntadas em um único INSERT pela thread de fundo
+AUDIT_BATCH_ROWS = int(os.getenv("AUDIT_BATCH_ROWS", "5000"))
+# Novas tentativas de um INSERT de auditoria que falhou, antes de descartar as linhas
+AUDIT_WRITE_RETRIES = int(os.getenv("AUDIT_WRITE_RETRIES", "3"))
+# Quanto a saída do processo espera (segundos) a fila e o lote em gravação
+AUDIT_FLUSH_TIMEOUT = float(os.getenv("AUDIT_FLUSH_TIMEOUT", "10"))
+# Não audita as gravações feitas pelas rotinas de ingestão (já registradas em ingestion_runs)
+AUDIT_SKIP_INGESTION = os.getenv("AUDIT_SKIP_INGESTION", "False") == "True"
+# "campos": uma linha por campo alterado em audit_logs;
+# "compacto": uma linha por registro alterado em audit_records, com o diff em JSON
+AUDIT_FORMAT = os.getenv("AUDIT_FORMAT", "campos")
+
+_auditoria_ativa = contextvars.ContextVar("auditoria_ativa", default=True)
+
+
+def auditoria_ativa() -> bool:
+    return _auditoria_ativa.get()
+
+
+@contextmanager
+def sem_auditoria():
+    """
+    Desativa a auditoria no contexto atual. Threads iniciadas dentro do bloco
+    só herdam a desativação se rodarem em uma cópia do contexto
+    (contextvars.copy_context().run).
+    """
+    token = _auditoria_ativa.set(False)
+    try:
+        yield
+    finally:
+        _auditoria_ativa.reset(token)
+
+
+def compactar(rows: list) -> list:
+    """
+    Junta as linhas por campo de uma transação em uma linha por registro
+    (formato de audit_records): changes = {campo: [antigo, novo]}. Um campo
+    alterado mais de uma vez fica com o primeiro valor antigo e o último novo.
+    """
+    registros = {}
+    for row in rows:
+        chave = (row["table_name"], row["record_id"], row["action"])
+        registro = registros.get(chave)
+        if registro is None:
+            registro = registros[chave] = {
+                "table_name": row["table_name"],
+                "record_id": row["record_id"],
+                "action": row["action"],
+                "changes": None,
+                "changed_by": row["changed_by"],
+                "changed_at": row["changed_at"],
+            }
+        registro["changed_at"] = row["changed_at"]
+
+        if row["action"] != "UPDATE":
+            continue
+        changes = registro["changes"] = registro["changes"] or {}
+        antigo = changes[row["field"]][0] if row["field"] in changes else row["old_value"]
+        changes[row["field"]] = [antigo, row["new_value"]]
+
+    return list(registros.values())
+
+
+class AuditWriter:
+    """
+    Grava as linhas de auditoria de uma transação já confirmada com um único
+    INSERT de várias linhas, na própria thread ou, com AUDIT_ASYNC, em uma
+    thread de fundo que junta as transações pendentes. Com AUDIT_FORMAT=compacto,
+    grava em audit_records uma linha por registro alterado.
+
+    Um INSERT que falha é repetido AUDIT_WRITE_RETRIES vezes; só então as
+    linhas são descartadas, e contadas em stats(). Com a fila cheia, quem fez
+    o commit grava as próprias linhas. Na saída normal do processo, a fila e o
+    lote em gravação são esperados por até AUDIT_FLUSH_TIMEOUT segundos; um
+    processo morto à força (SIGKILL) perde o que estava na fila.
+    """
+
+    _queue = None
+    _thread = None
+    _lock = threading.Lock()
+
+    _stats_lock = threading.Lock()
+    _stats = {"gravadas": 0, "descartadas": 0, "falhas_insert": 0, "gravacoes_fila_cheia": 0}
+
+    @classmethod
+    def _contar(cls, **quantidades):
+        with cls._stats_lock:
+            for nome, quantidade in quantidades.items():
+                cls._stats[nome] += quantidade
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Linhas gravadas e descartadas, falhas de INSERT e tamanho atual da fila."""
+        with cls._stats_lock:
+            stats = dict(cls._stats)
+        stats["na_fila"] = cls._queue.qsize() if cls._queue is not None else 0
+        return stats
+
+    @classmethod
+    def write(cls, engine, rows: list) -> bool:
+        if AUDIT_FORMAT == "compacto":
+            from app.models.audit_record import AuditRecord
+            tabela = AuditRecord.__table__
+        else:
+            from app.models.audit_log import AuditLog
+            tabela = AuditLog.__table__
+
+        for tentativa in range(AUDIT_WRITE_RETRIES + 1):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(tabela), rows)
+                cls._contar(gravadas=len(rows))
+                return True
+            except Exception as e:
+                cls._contar(falhas_insert=1)
+                erro = e
+                if tentativa < AUDIT_WRITE_RETRIES:
+                    time.sleep(0.5 * 2 ** tentativa)
+
+        cls._contar(descartadas=len(rows))
+        logger.error(f"❌ {len(rows)} registros de auditoria descartados após "
+                     f"{AUDIT_WRITE_RETRIES + 1} tentativas (total descartado: {cls.stats()['descartadas']}): {erro}")
+        return False
+
+    @classmethod
+    def submit(cls, engine, rows: list):
+        if not rows:
+            return
+        if AUDIT_FORMAT == "compacto":
+            # Por transação: lotes da thread de fundo juntam várias transações
+            rows = compactar(rows)
+        if not AUDIT_ASYNC:
+            cls.write(engine, rows)
+            return
+
+        cls._ensure_started()
+        try:
+            cls._queue.put_nowait((engine, rows))
+        except queue.Full:
+            # Fila cheia: quem fez o commit grava, o que segura o ritmo das gravações
+            cls._contar(gravacoes_fila_cheia=1)
+            cls.write(engine, rows)
+
+    @classmethod
+    def _ensure_started(cls):
+        if cls._thread is not None:
+            return
+        with cls._lock:
+            if cls._thread is None:
+                cls._queue = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+                cls._thread = threading.Thread(target=cls._run, name="audit_writer", daemon=True)
+                cls._thread.start()
+                atexit.register(cls.flush)
+
+    @classmethod
+    def _next_batch(cls, block: bool):
+        """
+        Junta as transações pendentes do mesmo banco em um único lote.
+        Retorna (engine, linhas, itens retirados da fila).
+        """
+        engine, rows = cls._queue.get(block=block)
+        rows = list(rows)
+        itens = 1
+        while len(rows) < AUDIT_BATCH_ROWS:
+            try:
+                other_engine, other_rows = cls._queue.get_nowait()
+            except queue.Empty:
+                break
+            if other_engine is engine:
+                rows.extend(other_rows)
+                itens += 1
+            else:
+                try:
+                    cls.write(other_engine, other_rows)
+                finally:
+                    cls._queue.task_done()
+        return engine, rows, itens
+
+    @classmethod
+    def _write_batch(cls, block: bool):
+        engine, rows, itens = cls._next_batch(block=block)
+        try:
+            cls.write(engine, rows)
+        finally:
+            # Só depois de gravado o lote deixa de contar como pendente (ver flush)
+            for _ in range(itens):
+                cls._queue.task_done()
+
+    @classmethod
+    def _run(cls):
+        while True:
+            cls._write_batch(block=True)
+
+    @classmethod
+    def flush(cls, timeout: float = None):
+        """
+        Grava o que ainda estiver na fila e espera o lote que a thread de
+        fundo estiver gravando (chamado na saída do processo).
+        """
+        if cls._queue is None:
+            return
+        while True:
+            try:
+                cls._write_batch(block=False)
+            except queue.Empty:
+                break
+
+        limite = time.monotonic() + (AUDIT_FLUSH_TIMEOUT if timeout is None else timeout)
+        while cls._queue.unfinished_tasks and time.monotonic() < limite:
+            time.sleep(0.05)
+        if cls._queue.unfinished_tasks:
+            logger.error(f"❌ Saída sem gravar {cls._queue.unfinished_tasks} transações de auditoria pendentes")
@@ -1,6 +1,80 @@
 import requests
+import contextvars
 import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+
+from app.utils import ingestion_metrics
+from app.utils.payload_store import TECNICOS_KEY, get_payload_store
+from app.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Quantidade máxima de requisições simultâneas ao buscar detalhes das OS
+OS_FETCH_WORKERS = int(os.getenv("OS_FETCH_WORKERS", "8"))
+# Timeout (segundos) de cada requisição à API
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+
+# Requisições por segundo à API (0 = sem limite)
+HTTP_RATE_LIMIT = float(os.getenv("HTTP_RATE_LIMIT", "0"))
+
+_session = None
+_session_lock = threading.Lock()
+# pool_maxsize do HTTPAdapter montado na sessão compartilhada
+_pool_maxsize = max(OS_FETCH_WORKERS, 1)
+_rate_limiter = TokenBucket(HTTP_RATE_LIMIT) if HTTP_RATE_LIMIT > 0 else None
+
+# ----------------- Sessão HTTP compartilhada ----------------- #
+def get_session() -> requests.Session:
+    """
+    Sessão HTTP compartilhada (keep-alive), com pool de conexões por host
+    dimensionado para OS_FETCH_WORKERS requisições simultâneas.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                _montar_adapter(session, _pool_maxsize)
+                _session = session
+    return _session
+
+def _montar_adapter(session: requests.Session, pool_maxsize: int):
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+def ajustar_pool_conexoes(tamanho: int):
+    """Amplia o pool de conexões por host da sessão compartilhada para `tamanho` conexões simultâneas."""
+    global _pool_maxsize
+    session = get_session()
+    with _session_lock:
+        if tamanho > _pool_maxsize:
+            _montar_adapter(session, tamanho)
+            _pool_maxsize = tamanho
+
+def configurar_limite_requisicoes(por_segundo: float, rajada: float = None):
+    """Define (ou remove, com 0) o limite de requisições por segundo de todas as chamadas à API."""
+    global _rate_limiter
+    _rate_limiter = TokenBucket(por_segundo, rajada) if por_segundo and por_segundo > 0 else None
+
+def _post(url: str, endpoint: str = None, **kwargs):
+    """
+    POST pela sessão compartilhada, respeitando o limite de requisições.
+    A latência é registrada por endpoint nas métricas da ingestão em andamento.
+    """
+    if _rate_limiter is not None:
+        _rate_limiter.acquire()
+    inicio = time.perf_counter()
+    try:
+        return get_session().post(url, timeout=HTTP_TIMEOUT, **kwargs)
+    finally:
+        ingestion_metrics.registrar_latencia(endpoint or url, time.perf_counter() - inicio)
 
 # ----------------- Função genérica para salvar JSON ----------------- #
 def salvar_json(dados, arquivo: str):
@@ -12,26 +86,65 @@ def salvar_json(dados, arquivo: str):
     print(f"✅ Dados salvos em {arquivo}")
 
 # ----------------- Funções para O.S. ----------------- #
-def buscar_os(token: str, app: str, url: str, data: str = None, limit: int = 1000):
+def buscar_os(token: str, app: str, url: str, data: str = None, limit: int = 1000,
+              offset: int = 0, data_fim: str = None):
+    """
+    Busca uma página de OS encerradas entre data e data_fim (padrão: o mesmo dia).
+    Para obter todas as páginas use buscar_os_paginado.
+    """
     if data is None:
         data = datetime.today().strftime("%Y-%m-%d")
     else:
         datetime.strptime(data, "%Y-%m-%d")
 
+    if data_fim is None:
+        data_fim = data
+    else:
+        datetime.strptime(data_fim, "%Y-%m-%d")
+
     payload = {
         "app": app,
         "token": token,
-        "offset": 0,
+        "offset": offset,
         "limit": limit,
         "status": 1,  # 1 = Encerrada
         "data_finalizacao_inicio": data,
-        "data_finalizacao_fim": data
+        "data_finalizacao_fim": data_fim
     }
 
-    response = requests.post(url, data=payload)
+    response = _post(url, endpoint="listagem", data=payload)
     response.raise_for_status()
     return response.json()
 
+def buscar_os_paginado(token: str, app: str, url: str, data: str = None, data_fim: str = None,
+                       limit: int = 1000, max_paginas: int = 1000) -> list:
+    """
+    Percorre todas as páginas (offset += limit) de OS encerradas entre data e
+    data_fim, até uma página vir incompleta.
+
+    Returns:
+        list: todas as OS de "ordens_servicos", sem repetições de id
+    """
+    ordens = {}
+
+    for pagina in range(max_paginas):
+        dados = buscar_os(token, app, url, data, limit=limit, offset=pagina * limit, data_fim=data_fim)
+        itens = dados.get("ordens_servicos", []) or []
+
+        novos = 0
+        for item in itens:
+            if "id" in item and item["id"] not in ordens:
+                ordens[item["id"]] = item
+                novos += 1
+
+        # Página incompleta (última) ou API ignorando o offset (só repetições)
+        if len(itens) < limit or not novos:
+            break
+    else:
+        logger.warning(f"⚠️ Limite de {max_paginas} páginas atingido ao listar OS de {data} a {data_fim}")
+
+    return list(ordens.values())
+
 def executar_os(token: str, app: str, url: str, arquivo: str, data: str = None):
     dados = buscar_os(token, app, url, data)
     salvar_json(dados, arquivo)
@@ -54,7 +167,7 @@ def buscar_ocorrencias(token: str, app: str, url: str, data: str = None, limit:
         "data_finalizacao_fim": data
     }
 
-    response = requests.post(url, data=payload)
+    response = _post(url, endpoint="ocorrencias", data=payload)
     response.raise_for_status()
     return response.json()
 
@@ -69,29 +182,77 @@ def listar_tecnicos(token: str, app: str, url: str):
         "token": token
     }
 
-    response = requests.post(url, data=payload)
+    response = _post(url, endpoint="tecnicos", data=payload)
     response.raise_for_status()
-    return response.json()
+    dados = response.json()
+
+    # Guardado para reprocessar OS do cache sem acessar a API
+    store = get_payload_store()
+    if store is not None:
+        store.put(TECNICOS_KEY, dados)
+    return dados
 
 def executar_tecnicos(token: str, app: str, url: str, arquivo: str):
     dados = listar_tecnicos(token, app, url)
     salvar_json(dados, arquivo)
 
 # ----------------- NOVO: Buscar detalhes por OS_ID ----------------- #
-def buscar_os_por_id(token: str, app: str, os_id: int, base_url: str):
+def buscar_os_por_id(token: str, app: str, os_id: int, base_url: str, usar_cache: bool = True):
+    """
+    Busca os detalhes de uma OS. Com o cache de respostas ativo (payload_store),
+    OS finalizadas há mais de OS_PAYLOAD_FREEZE_DAYS dias são lidas do disco;
+    as demais são buscadas na API e a resposta é gravada no cache.
+    """
+    store = get_payload_store() if usar_cache else None
+    if store is not None:
+        dados = store.get_os(os_id)
+        if dados is not None and store.is_frozen(dados):
+            ingestion_metrics.contar(detalhes_em_cache=1)
+            return dados
+
     url = f"{base_url}/api/os/list/id/{os_id}"
     payload = {
         "app": app,
         "token": token
     }
 
-    response = requests.post(url, json=payload)
+    response = _post(url, endpoint="detalhes", json=payload)
     if response.status_code == 200:
-        return response.json()
+        dados = response.json()
+        if store is not None:
+            store.put_os(os_id, dados)
+        return dados
     else:
         print(f"❌ Erro ao buscar OS {os_id}: {response.status_code}")
+        ingestion_metrics.registrar_erro(f"OS {os_id}: HTTP {response.status_code}")
         return None
 
+def buscar_detalhes_os(token: str, app: str, os_ids: list, base_url: str, max_workers: int = None) -> dict:
+    """
+    Busca os detalhes de várias OS em paralelo, com no máximo max_workers
+    (padrão OS_FETCH_WORKERS) requisições simultâneas sobre a sessão compartilhada.
+
+    Returns:
+        dict: str(os_id) -> detalhes (None quando a busca falhou), na ordem de os_ids
+    """
+    max_workers = max_workers or OS_FETCH_WORKERS
+
+    def buscar(os_id):
+        try:
+            return buscar_os_por_id(token, app, os_id, base_url)
+        except requests.RequestException as e:
+            logger.error(f"❌ Erro ao buscar OS {os_id}: {e}")
+            return None
+
+    if max_workers <= 1 or len(os_ids) <= 1:
+        return {str(os_id): buscar(os_id) for os_id in os_ids}
+
+    # Cada busca roda em uma cópia do contexto (métricas da execução em andamento)
+    contexto = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="busca_os") as executor:
+        detalhes = executor.map(lambda os_id: contexto.copy().run(buscar, os_id), os_ids)
+        return {str(os_id): dados for os_id, dados in zip(os_ids, detalhes)}
+
 def executar_busca_os_ids(token: str, app: str, base_url: str, os_ids: list, arquivo_saida: str):
     resultados = {}
     for os_id in os_ids:
@@ -0,0 +1,134 @@
+import bisect
+import contextvars
+import threading
+from contextlib import contextmanager
+
+# Limites (ms) das faixas do histograma de latência da API
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Quantidade máxima de mensagens de erro guardadas por execução
+MAX_ERROS = 50
+
+
+class HistogramaLatencia:
+    """Contagem de chamadas por faixa de latência, mais total, soma e máximo."""
+
+    def __init__(self):
+        self.faixas = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total = 0
+        self.soma_ms = 0.0
+        self.max_ms = 0.0
+
+    def registrar(self, ms: float):
+        self.faixas[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.total += 1
+        self.soma_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentil(self, p: float):
+        """Limite superior da faixa que contém o percentil p (estimativa)."""
+        if not self.total:
+            return None
+        alvo = p * self.total
+        acumulado = 0
+        for limite, quantidade in zip(LATENCY_BUCKETS_MS + (None,), self.faixas):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return limite if limite is not None else round(self.max_ms, 1)
+        return round(self.max_ms, 1)
+
+    def resumo(self) -> dict:
+        return {
+            'chamadas': self.total,
+            'media_ms': round(self.soma_ms / self.total, 1) if self.total else None,
+            'p50_ms': self.percentil(0.5),
+            'p95_ms': self.percentil(0.95),
+            'max_ms': round(self.max_ms, 1),
+            'faixas_ms': list(LATENCY_BUCKETS_MS),
+            'contagens': list(self.faixas),
+        }
+
+
+class ColetorIngestao:
+    """
+    Métricas de uma execução de ingestão, alimentadas pelas chamadas à API
+    (busca_OS._post) e pela gravação dos lotes (helpers.salvar_lote_ordens),
+    inclusive a partir das threads de busca e preparo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = {}
+        self.contadores = {'inseridas': 0, 'atualizadas': 0, 'inalteradas': 0, 'falhas': 0}
+        self.gravacao_s = 0.0
+        self.erros = []
+        self.total_erros = 0
+
+    def registrar_latencia(self, endpoint: str, segundos: float):
+        with self._lock:
+            self.latencias.setdefault(endpoint, HistogramaLatencia()).registrar(segundos * 1000)
+
+    def contar(self, **quantidades):
+        with self._lock:
+            for nome, quantidade in quantidades.items():
+                self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def registrar_gravacao(self, segundos: float):
+        with self._lock:
+            self.gravacao_s += segundos
+
+    def registrar_erro(self, mensagem: str):
+        with self._lock:
+            self.total_erros += 1
+            if len(self.erros) < MAX_ERROS:
+                self.erros.append(str(mensagem)[:500])
+
+    def resumo(self) -> dict:
+        with self._lock:
+            return {
+                **self.contadores,
+                'gravacao_s': round(self.gravacao_s, 3),
+                'latencias': {endpoint: h.resumo() for endpoint, h in self.latencias.items()},
+                'total_erros': self.total_erros,
+                'erros': list(self.erros),
+            }
+
+
+# Coletor da execução em andamento no contexto atual. Threads auxiliares só o
+# veem se rodarem em uma cópia do contexto (contextvars.copy_context().run);
+# execuções simultâneas (intradiária, diária, backfill) não se misturam.
+_coletor_atual = contextvars.ContextVar("coletor_ingestao", default=None)
+
+
+@contextmanager
+def coletar():
+    """Ativa um ColetorIngestao no contexto atual enquanto durar o bloco."""
+    coletor = ColetorIngestao()
+    token = _coletor_atual.set(coletor)
+    try:
+        yield coletor
+    finally:
+        _coletor_atual.reset(token)
+
+
+def registrar_latencia(endpoint: str, segundos: float):
+    coletor = _coletor_atual.get()
+    if coletor is not None:
+        coletor.registrar_latencia(endpoint, segundos)
+
+
+def contar(**quantidades):
+    coletor = _coletor_atual.get()
+    if coletor is not None:
+        coletor.contar(**quantidades)
+
+
+def registrar_gravacao(segundos: float):
+    coletor = _coletor_atual.get()
+    if coletor is not None:
+        coletor.registrar_gravacao(segundos)
+
+
+def registrar_erro(mensagem: str):
+    coletor = _coletor_atual.get()
+    if coletor is not None:
+        coletor.registrar_erro(mensagem)
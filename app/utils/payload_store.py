@@ -0,0 +1,188 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+# Cache em disco das respostas brutas da API; desligado por padrão
+OS_PAYLOAD_CACHE = os.getenv("OS_PAYLOAD_CACHE", "False") == "True"
+# Arquivo SQLite do cache ("" também o desativa)
+OS_PAYLOAD_CACHE_PATH = os.getenv(
+    "OS_PAYLOAD_CACHE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'instance', 'os_payloads.sqlite3'))
+)
+# OS finalizadas há mais dias que isso não são buscadas de novo na API
+OS_PAYLOAD_FREEZE_DAYS = int(os.getenv("OS_PAYLOAD_FREEZE_DAYS", "7"))
+# Dias de finalização mantidos no cache pela limpeza (limpar-cache-os)
+OS_PAYLOAD_RETENTION_DAYS = int(os.getenv("OS_PAYLOAD_RETENTION_DAYS", "180"))
+
+TECNICOS_KEY = "tecnicos"
+
+
+def payload_hash(dados) -> str:
+    """SHA-256 do JSON normalizado (chaves ordenadas, sem espaços)."""
+    normalizado = json.dumps(dados, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(normalizado.encode('utf-8')).hexdigest()
+
+
+class PayloadStore:
+    """
+    Armazena em SQLite as respostas brutas da API (JSON comprimido com zlib),
+    por chave ("os:<id>" ou "tecnicos"), com o hash do conteúdo e a data de
+    finalização da OS para consultas por período.
+
+    Uma única conexão, compartilhada pelas threads de busca e protegida por
+    uma trava (cada operação é curta); close() a fecha.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        conn = self._conn
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS payloads (
+                key TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                finalizacao TEXT,
+                fetched_at REAL NOT NULL,
+                data BLOB NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_payloads_finalizacao ON payloads (finalizacao)")
+        conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------- Leitura e escrita ----------
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM payloads WHERE key = ?", (key,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def put(self, key: str, dados, finalizacao: str = None) -> str:
+        """Grava a resposta (se o conteúdo mudou) e retorna o hash."""
+        digest = payload_hash(dados)
+        # Compressão fora da trava: só o acesso ao arquivo é serializado
+        data = zlib.compress(json.dumps(dados, ensure_ascii=False, default=str).encode('utf-8'))
+
+        with self._lock:
+            conn = self._conn
+            atual = conn.execute("SELECT hash FROM payloads WHERE key = ?", (key,)).fetchone()
+            if atual and atual[0] == digest:
+                conn.execute("UPDATE payloads SET fetched_at = ? WHERE key = ?", (time.time(), key))
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO payloads (key, hash, finalizacao, fetched_at, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, digest, finalizacao, time.time(), data)
+                )
+            conn.commit()
+        return digest
+
+    # ---------- OS ----------
+
+    @staticmethod
+    def os_key(os_id) -> str:
+        return f"os:{os_id}"
+
+    def get_os(self, os_id):
+        return self.get(self.os_key(os_id))
+
+    def put_os(self, os_id, dados) -> str:
+        finalizacao = dados.get('os_data_finalizacao') if isinstance(dados, dict) else None
+        return self.put(self.os_key(os_id), dados, finalizacao=finalizacao)
+
+    @staticmethod
+    def is_frozen(dados) -> bool:
+        """
+        OS finalizada há mais de OS_PAYLOAD_FREEZE_DAYS dias: a resposta em cache
+        é considerada definitiva e a API não é consultada de novo.
+        """
+        finalizacao = dados.get('os_data_finalizacao') if isinstance(dados, dict) else None
+        if not finalizacao:
+            return False
+        try:
+            data = datetime.fromisoformat(str(finalizacao)[:10])
+        except ValueError:
+            return False
+        return data < datetime.now() - timedelta(days=OS_PAYLOAD_FREEZE_DAYS)
+
+    def iter_os(self, data_inicio: str, data_fim: str, tamanho_lote: int = 1000):
+        """
+        Percorre as OS em cache finalizadas entre data_inicio e data_fim (AAAA-MM-DD,
+        inclusive), em lotes de {os_id: dados}. Cada lote é uma consulta própria
+        (a partir da última chave lida), sem segurar a conexão entre os lotes.
+        """
+        ultima = (data_inicio, '')
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT finalizacao, key, data FROM payloads "
+                    "WHERE key LIKE 'os:%' AND (finalizacao, key) > (?, ?) AND finalizacao < ? "
+                    "ORDER BY finalizacao, key LIMIT ?",
+                    (*ultima, f"{data_fim}~", tamanho_lote)
+                ).fetchall()
+            if not rows:
+                break
+            ultima = rows[-1][:2]
+            yield {key[3:]: json.loads(zlib.decompress(data)) for _, key, data in rows}
+
+    def prune(self, dias: int) -> int:
+        """
+        Apaga as OS finalizadas há mais de `dias` dias e as sem finalização
+        buscadas há mais que isso (a lista de técnicos fica), depois compacta
+        o arquivo (VACUUM) se algo foi apagado.
+
+        Returns:
+            int: respostas apagadas
+        """
+        limite = datetime.now() - timedelta(days=dias)
+        with self._lock:
+            apagadas = self._conn.execute(
+                "DELETE FROM payloads WHERE key LIKE 'os:%' AND "
+                "(finalizacao < ? OR (finalizacao IS NULL AND fetched_at < ?))",
+                (limite.strftime('%Y-%m-%d'), limite.timestamp())
+            ).rowcount
+            self._conn.commit()
+            if apagadas:
+                self._conn.execute("VACUUM")
+        return apagadas
+
+    def stats(self) -> dict:
+        with self._lock:
+            total, tamanho = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM payloads"
+            ).fetchone()
+        return {'path': self.path, 'payloads': total, 'compressed_bytes': tamanho}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_payload_store():
+    """
+    PayloadStore compartilhado, ou None se o cache estiver desligado
+    (OS_PAYLOAD_CACHE diferente de True ou OS_PAYLOAD_CACHE_PATH vazio).
+    """
+    global _store
+    if not OS_PAYLOAD_CACHE or not OS_PAYLOAD_CACHE_PATH:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PayloadStore(OS_PAYLOAD_CACHE_PATH)
+                atexit.register(_store.close)
+    return _store
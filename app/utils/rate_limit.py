@@ -0,0 +1,32 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Limitador de taxa (token bucket) compartilhado entre threads: até
+    `capacidade` requisições em rajada, reabastecido a `taxa` fichas por segundo.
+    """
+
+    def __init__(self, taxa: float, capacidade: float = None):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade or max(taxa, 1))
+        self._fichas = self.capacidade
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reabastecer(self):
+        agora = time.monotonic()
+        self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def acquire(self, fichas: float = 1):
+        """Bloqueia até haver fichas disponíveis e as consome."""
+        while True:
+            with self._lock:
+                self._reabastecer()
+                if self._fichas >= fichas:
+                    self._fichas -= fichas
+                    return
+                espera = (fichas - self._fichas) / self.taxa
+            time.sleep(espera)
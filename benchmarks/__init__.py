@@ -0,0 +1,6 @@
+"""
+Benchmarks do DashboardService com dados sintéticos.
+
+Uso:
+    python -m benchmarks.dashboard_benchmark --sizes 10000 100000 1000000 --output resultado.json
+"""
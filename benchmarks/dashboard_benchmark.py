@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from flask import Flask
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import db
+from app.models import AuditLog  # noqa: F401 (registra a tabela para create_all)
+from app.models.user import User  # noqa: F401
+from app.service.dashboard_cache import DashboardCache
+from app.service.dashboard_service import DashboardService
+from app.service.reference_cache import ReferenceCache
+from benchmarks.synthetic_data import popular_banco
+
+DEFAULT_DATABASE_URL = os.getenv(
+    "BENCH_DATABASE_URL", "sqlite:////tmp/meta_tecnicos_benchmark.sqlite"
+)
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+
+def log(mensagem: str):
+    """Mensagens de progresso vão para stderr, deixando stdout só com o JSON."""
+    print(mensagem, file=sys.stderr)
+
+
+def criar_app(database_url: str) -> Flask:
+    """
+    App mínimo para o benchmark: só o banco, sem scheduler nem listeners de
+    auditoria (create_app inicia a rotina diária fora do modo debug).
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def metodos_dashboard(month: int, year: int) -> dict:
+    """Métodos públicos do DashboardService medidos, na ordem do relatório."""
+    return {
+        'get_total_service_orders': lambda: DashboardService.get_total_service_orders(),
+        'get_total_experts': lambda: DashboardService.get_total_experts(),
+        'get_total_services': lambda: DashboardService.get_total_services(month, year),
+        'get_services_by_expert': lambda: DashboardService.get_services_by_expert(month, year),
+        'get_services_by_category': lambda: DashboardService.get_services_by_category(month, year),
+        'get_services_with_assist': lambda: DashboardService.get_services_with_assist(month, year),
+        'load_month_orders': lambda: DashboardService.load_month_orders(month, year),
+        'get_assistance_network': lambda: DashboardService.get_assistance_network(month, year),
+        'get_assistance_by_service_type': lambda: DashboardService.get_assistance_by_service_type(month, year),
+        'get_repeated_services': lambda: DashboardService.get_repeated_services(month, year),
+        'get_services_by_expert_with_details': lambda: DashboardService.get_services_by_expert_with_details(month, year),
+        'merge_services_with_assistance': lambda: DashboardService.merge_services_with_assistance(
+            DashboardService.get_services_by_expert_with_details(month, year), month, year
+        ),
+        'get_complete_dashboard_data': lambda: DashboardService.get_complete_dashboard_data(month, year),
+    }
+
+
+def medir(func, statements: list, track_memory: bool = True) -> dict:
+    """Executa func uma vez medindo tempo, número de comandos SQL e pico de memória."""
+    db.session.remove()
+    statements[0] = 0
+
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        func()
+    finally:
+        wall = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if track_memory else None
+        if track_memory:
+            tracemalloc.stop()
+
+    return {
+        'wall_ms': round(wall * 1000, 2),
+        'statements': statements[0],
+        'peak_memory_kb': round(peak / 1024, 1) if peak is not None else None,
+    }
+
+
+def executar_tamanho(app: Flask, n_orders: int, month: int, year: int, args) -> dict:
+    """Recria o banco com n_orders ordens e mede cada método (cache frio e quente)."""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        log(f"🧪 Gerando {n_orders} ordens sintéticas...")
+        start = time.perf_counter()
+        dataset = popular_banco(
+            n_orders, month, year,
+            n_months=args.months, n_experts=args.experts,
+            n_customers=args.customers, n_type_services=args.type_services,
+            seed=args.seed,
+        )
+        seed_seconds = time.perf_counter() - start
+        log(f"✅ Dados gerados em {seed_seconds:.1f}s")
+
+        statements = [0]
+
+        def contar(*_):
+            statements[0] += 1
+
+        event.listen(db.engine, 'before_cursor_execute', contar)
+        resultados = {}
+
+        try:
+            for name, func in metodos_dashboard(month, year).items():
+                if args.methods and name not in args.methods:
+                    continue
+
+                DashboardCache.clear()
+                ReferenceCache.invalidate()
+                frio = medir(func, statements, track_memory=not args.no_memory)
+                quente = medir(func, statements, track_memory=False)
+
+                resultados[name] = {**frio, 'warm_wall_ms': quente['wall_ms'],
+                                    'warm_statements': quente['statements']}
+                log(f"  ⏱️ {name}: {frio['wall_ms']} ms, {frio['statements']} SQL, "
+                    f"pico {frio['peak_memory_kb']} KB (quente: {quente['wall_ms']} ms)")
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', contar)
+            db.session.remove()
+
+        return {'dataset': dataset, 'seed_seconds': round(seed_seconds, 2), 'methods': resultados}
+
+
+def comparar(atual: dict, referencia: dict, tolerancia: float) -> list:
+    """
+    Lista as regressões em relação a uma execução anterior: tempo acima da
+    tolerância relativa ou mais comandos SQL no mesmo tamanho e método.
+    """
+    regressoes = []
+    anteriores = {r['dataset']['orders']: r['methods'] for r in referencia.get('results', [])}
+
+    for resultado in atual['results']:
+        n_orders = resultado['dataset']['orders']
+        for name, medida in resultado['methods'].items():
+            antes = anteriores.get(n_orders, {}).get(name)
+            if not antes:
+                continue
+            if medida['wall_ms'] > antes['wall_ms'] * (1 + tolerancia):
+                regressoes.append(f"{name} @ {n_orders}: {antes['wall_ms']} ms -> {medida['wall_ms']} ms")
+            if medida['statements'] > antes['statements']:
+                regressoes.append(f"{name} @ {n_orders}: {antes['statements']} -> {medida['statements']} SQL")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do DashboardService com dados sintéticos.")
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL,
+                        help="Banco descartável usado no benchmark (é apagado a cada tamanho).")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--month', type=int, default=None)
+    parser.add_argument('--year', type=int, default=None)
+    parser.add_argument('--months', type=int, default=6, help="Meses cobertos pelos dados.")
+    parser.add_argument('--experts', type=int, default=40)
+    parser.add_argument('--customers', type=int, default=None)
+    parser.add_argument('--type-services', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--methods', nargs='*', help="Mede apenas estes métodos.")
+    parser.add_argument('--no-memory', action='store_true', help="Desliga o tracemalloc (mais rápido).")
+    parser.add_argument('--output', help="Arquivo JSON de saída (padrão: stdout).")
+    parser.add_argument('--compare', help="JSON de uma execução anterior para detectar regressões.")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Aumento relativo de tempo tolerado na comparação.")
+    args = parser.parse_args(argv)
+
+    now = datetime.now()
+    month = args.month or now.month
+    year = args.year or now.year
+
+    app = criar_app(args.database_url)
+    relatorio = {
+        'generated_at': now.isoformat(timespec='seconds'),
+        'database': args.database_url.split('://', 1)[0],
+        'month': month,
+        'year': year,
+        'results': [executar_tamanho(app, n, month, year, args) for n in args.sizes],
+    }
+
+    saida = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(saida)
+        log(f"📄 Resultado salvo em {args.output}")
+    else:
+        print(saida)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressoes = comparar(relatorio, json.load(f), args.tolerance)
+        for regressao in regressoes:
+            log(f"❌ Regressão: {regressao}")
+        if regressoes:
+            return 1
+        log("✅ Nenhuma regressão encontrada")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
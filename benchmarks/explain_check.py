@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import db
+from app.models.service_order import ServiceOrder
+from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
+from app.service.dashboard_cache import DashboardCache
+from app.service.reference_cache import ReferenceCache
+from benchmarks.dashboard_benchmark import DEFAULT_DATABASE_URL, criar_app, log, metodos_dashboard
+from benchmarks.synthetic_data import popular_banco
+
+# Tabelas grandes: uma varredura sequencial filtrada nelas indica índice faltando
+TABELAS_MONITORADAS = ('service_orders', 'service_order_assistants')
+
+
+def consultas_extras(month: int, year: int) -> dict:
+    """Caminhos de acesso fora do DashboardService que também precisam de índice."""
+    inicio = datetime(year, month, 1)
+    return {
+        'get_retrabalho_by_interval': lambda: ServiceOrder.get_retrabalho_by_interval(
+            1, inicio - timedelta(days=30), inicio + timedelta(days=30)
+        ),
+        'get_by_customer_id': lambda: ServiceOrder.get_by_customer_id(1),
+        # Recalcula o rollup do mês: INSERT ... SELECT sobre service_orders por mês
+        'refresh_month': lambda: ServiceOrderMonthlyStats.refresh_month(year, month),
+    }
+
+
+def consulta_de_leitura(statement: str) -> bool:
+    """SELECT/WITH ou INSERT ... SELECT (que lê service_orders para montar o rollup)."""
+    sql = ' '.join(statement.split()).upper()
+    if sql.startswith(('SELECT', 'WITH')):
+        return True
+    return sql.startswith('INSERT') and ' SELECT ' in sql
+
+
+def capturar_consultas(funcoes: dict) -> list:
+    """Executa cada função e devolve [(método, SQL, parâmetros)] das consultas de leitura emitidas."""
+    capturadas = []
+    atual = [None]
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and consulta_de_leitura(statement):
+            capturadas.append((atual[0], statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capturar)
+    try:
+        for nome, func in funcoes.items():
+            DashboardCache.clear()
+            ReferenceCache.invalidate()
+            db.session.remove()
+            atual[0] = nome
+            func()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capturar)
+        db.session.remove()
+    return capturadas
+
+
+def varreduras_sequenciais(plano: dict, tabelas) -> list:
+    """Nós 'Seq Scan' com filtro sobre as tabelas monitoradas, em todo o plano."""
+    encontradas = []
+    if plano.get('Node Type') == 'Seq Scan' and plano.get('Relation Name') in tabelas and plano.get('Filter'):
+        encontradas.append({
+            'tabela': plano['Relation Name'],
+            'filtro': plano['Filter'],
+            'linhas_estimadas': plano.get('Plan Rows'),
+        })
+    for filho in plano.get('Plans', []):
+        encontradas.extend(varreduras_sequenciais(filho, tabelas))
+    return encontradas
+
+
+def explicar(statement: str, parameters) -> dict:
+    """
+    EXPLAIN (FORMAT JSON) da consulta, com os mesmos parâmetros, pelo driver.
+    Sem ANALYZE nada é executado; mesmo assim a transação é desfeita, o que
+    cobre os INSERT ... SELECT.
+    """
+    conn = db.engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        resultado = cursor.fetchone()[0]
+        plano = resultado if isinstance(resultado, list) else json.loads(resultado)
+        return plano[0]['Plan']
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Falha se alguma consulta do dashboard fizer varredura sequencial filtrada "
+                    "em service_orders/service_order_assistants (PostgreSQL, dados sintéticos)."
+    )
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL,
+                        help="Banco PostgreSQL descartável (é apagado, a menos que use --reuse).")
+    parser.add_argument('--orders', type=int, default=500000)
+    parser.add_argument('--month', type=int, default=None)
+    parser.add_argument('--year', type=int, default=None)
+    parser.add_argument('--months', type=int, default=24,
+                        help="Meses cobertos pelos dados (um mês deve ser pequena parte do total).")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reuse', action='store_true', help="Usa os dados já existentes no banco.")
+    args = parser.parse_args(argv)
+
+    if not args.database_url.startswith('postgresql'):
+        log("❌ O EXPLAIN check precisa de um banco PostgreSQL (--database-url ou BENCH_DATABASE_URL)")
+        return 2
+
+    now = datetime.now()
+    month = args.month or now.month
+    year = args.year or now.year
+
+    app = criar_app(args.database_url)
+    with app.app_context():
+        if not args.reuse:
+            db.drop_all()
+            db.create_all()
+            log(f"🧪 Gerando {args.orders} ordens sintéticas em {args.months} meses...")
+            start = time.perf_counter()
+            popular_banco(args.orders, month, year, n_months=args.months, seed=args.seed)
+            log(f"✅ Dados gerados em {time.perf_counter() - start:.1f}s")
+
+        # Estatísticas atualizadas para o planejador escolher como em produção
+        with db.engine.connect() as conn:
+            conn.execution_options(isolation_level='AUTOCOMMIT').execute(text('ANALYZE'))
+
+        funcoes = {**metodos_dashboard(month, year), **consultas_extras(month, year)}
+        consultas = capturar_consultas(funcoes)
+        log(f"🔎 {len(consultas)} consultas capturadas; analisando planos...")
+
+        falhas = []
+        vistas = set()
+        for metodo, statement, parameters in consultas:
+            chave = (statement, json.dumps(parameters, default=str, sort_keys=True))
+            if chave in vistas:
+                continue
+            vistas.add(chave)
+
+            for varredura in varreduras_sequenciais(explicar(statement, parameters), TABELAS_MONITORADAS):
+                falhas.append({'metodo': metodo, **varredura, 'sql': ' '.join(statement.split())[:300]})
+
+    for falha in falhas:
+        log(f"❌ {falha['metodo']}: Seq Scan em {falha['tabela']} (filtro {falha['filtro']}, "
+            f"~{falha['linhas_estimadas']} linhas)\n    {falha['sql']}")
+    if falhas:
+        return 1
+    log(f"✅ Nenhuma varredura sequencial filtrada em {', '.join(TABELAS_MONITORADAS)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
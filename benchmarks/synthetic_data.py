@@ -0,0 +1,112 @@
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app.database import db
+from app.models.association_tables import service_order_assistants
+from app.models.customer import Customer
+from app.models.expert import Expert
+from app.models.service_order import ServiceOrder
+from app.models.service_order_monthly_stats import ServiceOrderMonthlyStats
+from app.models.type_service import TypeService
+
+# Inclui as categorias bloqueadas do dashboard para exercitar o caminho de "não realizados"
+CATEGORIAS_PADRAO = [
+    "INSTALAÇÃO", "SUPORTE", "TROCA DE EQUIPAMENTO", "MUDANÇA DE ENDEREÇO",
+    "REAGENDAMENTO", "LOCAL FECHADO", "DESISTÊNCIA", "RETIRADA",
+]
+
+
+def month_offset(year: int, month: int, offset: int) -> tuple:
+    """(ano, mês) deslocado offset meses a partir de (year, month)."""
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+
+def popular_banco(n_orders: int, month: int, year: int, n_months: int = 6,
+                  n_experts: int = 40, n_customers: int = None, n_type_services: int = 20,
+                  assist_fanout: tuple = (0.6, 0.3, 0.1), retrabalho_ratio: float = 0.05,
+                  seed: int = 42, batch_size: int = 10000) -> dict:
+    """
+    Preenche o banco (já criado e vazio) com dados sintéticos.
+
+    As ordens são distribuídas uniformemente nos n_months meses que terminam em
+    (month, year). assist_fanout[k] é a probabilidade de uma ordem ter k técnicos
+    auxiliares. Por padrão há um cliente para cada 4 ordens, o que gera
+    reincidências para get_repeated_services.
+    """
+    rnd = random.Random(seed)
+    n_customers = n_customers or max(1, n_orders // 4)
+
+    categorias = (CATEGORIAS_PADRAO + [f"SERVIÇO {i}" for i in range(n_type_services)])[:n_type_services]
+    db.session.execute(insert(TypeService), [{'name': name} for name in categorias])
+
+    db.session.execute(insert(Expert), [
+        {'nome': f"Técnico {i:04d}", 'status': rnd.random() > 0.1}
+        for i in range(n_experts)
+    ])
+
+    for start in range(0, n_customers, batch_size):
+        db.session.execute(insert(Customer), [
+            {'cliente_nome': f"Cliente {i}", 'plano': "Plano 100M", 'id_contrato': str(100000 + i)}
+            for i in range(start, min(start + batch_size, n_customers))
+        ])
+    db.session.commit()
+
+    type_service_ids = [row[0] for row in db.session.query(TypeService.id)]
+    expert_ids = [row[0] for row in db.session.query(Expert.id)]
+    customer_ids = [row[0] for row in db.session.query(Customer.id)]
+
+    first_year, first_month = month_offset(year, month, -(n_months - 1))
+    period_start = datetime(first_year, first_month, 1)
+    next_year, next_month = month_offset(year, month, 1)
+    period_seconds = int((datetime(next_year, next_month, 1) - period_start).total_seconds()) - 1
+
+    fanout_counts = list(range(len(assist_fanout)))
+    total_assists = 0
+
+    for start in range(0, n_orders, batch_size):
+        end = min(start + batch_size, n_orders)
+        orders = []
+        assists = []
+
+        for i in range(start, end):
+            finalizacao = period_start + timedelta(seconds=rnd.randint(0, period_seconds))
+            responsavel = rnd.choice(expert_ids) if rnd.random() > 0.02 else None
+            orders.append({
+                'id': i + 1,
+                'os_id': str(1000000 + i),
+                'os_data_cadastro': finalizacao - timedelta(days=rnd.randint(1, 5)),
+                'os_data_agendamento': finalizacao - timedelta(hours=rnd.randint(1, 48)),
+                'os_data_finalizacao': finalizacao,
+                'os_conteudo': "Cliente sem conexão",
+                'os_servicoprestado': "Troca de conector",
+                'retrabalho': rnd.random() < retrabalho_ratio,
+                'type_service_id': rnd.choice(type_service_ids),
+                'os_tecnico_responsavel': responsavel,
+                'customer_id': rnd.choice(customer_ids),
+            })
+
+            k = rnd.choices(fanout_counts, weights=assist_fanout)[0]
+            candidatos = [e for e in rnd.sample(expert_ids, min(k + 1, len(expert_ids))) if e != responsavel]
+            for expert_id in candidatos[:k]:
+                assists.append({'service_order_id': i + 1, 'expert_id': expert_id})
+
+        db.session.execute(insert(ServiceOrder), orders)
+        if assists:
+            db.session.execute(insert(service_order_assistants), assists)
+        db.session.commit()
+        total_assists += len(assists)
+
+    ServiceOrderMonthlyStats.refresh_months(
+        month_offset(first_year, first_month, i) for i in range(n_months)
+    )
+
+    return {
+        'orders': n_orders,
+        'experts': n_experts,
+        'customers': n_customers,
+        'type_services': len(type_service_ids),
+        'assists': total_assists,
+        'months': n_months,
+        'seed': seed,
+    }
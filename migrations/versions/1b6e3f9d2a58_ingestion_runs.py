@@ -0,0 +1,46 @@
+"""ingestion_runs: métricas de cada execução da ingestão de OS
+
+Revision ID: 1b6e3f9d2a58
+Revises: f2c9d5e1a847
+Create Date: 2026-10-18 16:37:51.208374
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b6e3f9d2a58'
+down_revision = 'f2c9d5e1a847'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ingestion_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=30), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=False),
+        sa.Column('duration_seconds', sa.Float(), nullable=False),
+        sa.Column('rows_inserted', sa.Integer(), nullable=False),
+        sa.Column('rows_updated', sa.Integer(), nullable=False),
+        sa.Column('rows_skipped', sa.Integer(), nullable=False),
+        sa.Column('rows_failed', sa.Integer(), nullable=False),
+        sa.Column('db_write_seconds', sa.Float(), nullable=False),
+        sa.Column('error_count', sa.Integer(), nullable=False),
+        sa.Column('latency', sa.JSON(), nullable=True),
+        sa.Column('errors', sa.JSON(), nullable=True),
+        sa.Column('summary', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_index('ix_ingestion_runs_started_at', 'ingestion_runs', ['started_at'], unique=False,
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_ingestion_runs_started_at', table_name='ingestion_runs')
+    op.drop_table('ingestion_runs')
@@ -0,0 +1,43 @@
+"""service_order_monthly_stats: rollup mensal das ordens de serviço
+
+Revision ID: 3f9a1c7e5b20
+Revises: 
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c7e5b20'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'service_order_monthly_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('expert_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.Column('type_service_id', sa.Integer(), nullable=False),
+        sa.Column('total_count', sa.Integer(), nullable=False),
+        sa.Column('with_assist_count', sa.Integer(), nullable=False),
+        sa.Column('retrabalho_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('year', 'month', 'expert_id', 'role', 'type_service_id',
+                            name='uq_service_order_monthly_stats_key'),
+        if_not_exists=True
+    )
+    op.create_index('ix_service_order_monthly_stats_year_month', 'service_order_monthly_stats',
+                    ['year', 'month'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_service_order_monthly_stats_year_month', table_name='service_order_monthly_stats')
+    op.drop_table('service_order_monthly_stats')
@@ -0,0 +1,39 @@
+"""service_orders: índices das consultas do dashboard, retrabalho e reincidência
+
+Revision ID: 5d7a2c8e4f13
+Revises: 1b6e3f9d2a58
+Create Date: 2026-10-18 17:20:44.861027
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7a2c8e4f13'
+down_revision = '1b6e3f9d2a58'
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ('ix_service_orders_finalizacao', 'service_orders', ['os_data_finalizacao']),
+    ('ix_service_orders_agendamento', 'service_orders', ['os_data_agendamento']),
+    ('ix_service_orders_responsavel_retrabalho_finalizacao', 'service_orders',
+     ['os_tecnico_responsavel', 'retrabalho', 'os_data_finalizacao']),
+    ('ix_service_orders_customer_finalizacao', 'service_orders', ['customer_id', 'os_data_finalizacao']),
+    ('ix_service_orders_type_service', 'service_orders', ['type_service_id']),
+    ('ix_service_order_assistants_expert', 'service_order_assistants', ['expert_id', 'service_order_id']),
+]
+
+
+def upgrade():
+    # CONCURRENTLY não bloqueia a gravação das OS, mas não roda dentro de transação
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDICES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True,
+                            postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDICES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,60 @@
+"""audit_records: auditoria compacta (um registro por linha alterada), particionada por mês
+
+Revision ID: 7c4a2e9b1f63
+Revises: 9e1f4b7c3d26
+Create Date: 2026-10-18 18:42:11.590317
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4a2e9b1f63'
+down_revision = '9e1f4b7c3d26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    op.create_table(
+        'audit_records',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.Column('table_name', sa.String(length=100), nullable=False),
+        sa.Column('record_id', sa.String(length=100), nullable=False),
+        sa.Column('action', sa.String(length=20), nullable=False),
+        sa.Column('changes', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=True),
+        sa.Column('changed_by', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'changed_at'),
+        postgresql_partition_by='RANGE (changed_at)',
+        if_not_exists=True
+    )
+    op.create_index('ix_audit_records_table_record_changed_at', 'audit_records',
+                    ['table_name', 'record_id', 'changed_at'], unique=False, if_not_exists=True)
+
+    if not postgres:
+        return
+
+    # Partição default (nada fica sem destino) e a do mês atual e seguintes;
+    # as próximas são criadas pela manutenção da auditoria
+    op.execute("CREATE TABLE IF NOT EXISTS audit_records_default PARTITION OF audit_records DEFAULT")
+    hoje = datetime.now()
+    for deslocamento in range(3):
+        total = hoje.year * 12 + hoje.month - 1 + deslocamento
+        ano, mes = total // 12, total % 12 + 1
+        fim_ano, fim_mes = (total + 1) // 12, (total + 1) % 12 + 1
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS audit_records_{ano:04d}_{mes:02d} PARTITION OF audit_records "
+            f"FOR VALUES FROM ('{ano:04d}-{mes:02d}-01') TO ('{fim_ano:04d}-{fim_mes:02d}-01')"
+        )
+
+
+def downgrade():
+    op.drop_index('ix_audit_records_table_record_changed_at', table_name='audit_records')
+    # No PostgreSQL, apagar a tabela particionada apaga também as partições
+    op.drop_table('audit_records')
@@ -0,0 +1,26 @@
+"""service_orders: índice por mês de os_data_finalizacao
+
+Revision ID: 8c2d4e6f1a93
+Revises: 3f9a1c7e5b20
+Create Date: 2026-10-18 10:02:17.544871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2d4e6f1a93'
+down_revision = '3f9a1c7e5b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_service_orders_finalizacao_mes', 'service_orders',
+                    [sa.text("date_trunc('month', os_data_finalizacao)")],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_service_orders_finalizacao_mes', table_name='service_orders')
@@ -0,0 +1,32 @@
+"""service_orders: índice BRIN por os_data_finalizacao
+
+Revision ID: 9e1f4b7c3d26
+Revises: 5d7a2c8e4f13
+Create Date: 2026-10-18 17:58:03.274190
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9e1f4b7c3d26'
+down_revision = '5d7a2c8e4f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.create_index('ix_service_orders_finalizacao_brin', 'service_orders', ['os_data_finalizacao'],
+                        unique=False, if_not_exists=True, postgresql_using='brin',
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_service_orders_finalizacao_brin', table_name='service_orders',
+                      if_exists=True, postgresql_concurrently=True)
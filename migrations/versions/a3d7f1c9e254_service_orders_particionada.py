@@ -0,0 +1,194 @@
+"""service_orders: particionada por mês de os_data_finalizacao
+
+A tabela passa a ser PARTITION BY RANGE (os_data_finalizacao), com uma
+partição por mês (service_orders_AAAA_MM) e service_orders_default para OS
+sem finalização ou de meses ainda sem partição. Uma tabela particionada só
+tem chaves únicas que incluem a coluna da partição, então a unicidade de id
+e de os_id fica em service_order_keys (id, os_id), mantida por gatilho, que
+também passa a ser o alvo da chave estrangeira de service_order_assistants.
+
+A migração reescreve a tabela inteira em uma transação: rode com a ingestão
+parada.
+
+Revision ID: a3d7f1c9e254
+Revises: f4a8d2c6e913
+Create Date: 2026-10-18 23:26:40.118352
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d7f1c9e254'
+down_revision = 'f4a8d2c6e913'
+branch_labels = None
+depends_on = None
+
+# Partições mensais criadas à frente do mês atual; as seguintes ficam com a manutenção
+MESES_A_FRENTE = 2
+
+INDICES = [
+    ('ix_service_orders_id', ['id']),
+    ('ix_service_orders_os_id', ['os_id']),
+    ('ix_service_orders_finalizacao', ['os_data_finalizacao']),
+    ('ix_service_orders_agendamento', ['os_data_agendamento']),
+    ('ix_service_orders_responsavel_retrabalho_finalizacao',
+     ['os_tecnico_responsavel', 'retrabalho', 'os_data_finalizacao']),
+    ('ix_service_orders_customer_finalizacao', ['customer_id', 'os_data_finalizacao']),
+    ('ix_service_orders_type_service', ['type_service_id']),
+]
+
+CHAVES_ESTRANGEIRAS = [
+    ('service_orders_type_service_id_fkey', 'type_services', 'type_service_id'),
+    ('service_orders_os_tecnico_responsavel_fkey', 'experts', 'os_tecnico_responsavel'),
+    ('service_orders_customer_id_fkey', 'customers', 'customer_id'),
+]
+
+# Mudança de partição (UPDATE de os_data_finalizacao) é executada como
+# DELETE + INSERT: a chave só sai de service_order_keys se a OS não estiver
+# mais em nenhuma partição (os gatilhos AFTER rodam no fim do comando)
+GATILHO = """
+CREATE OR REPLACE FUNCTION service_order_keys_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        IF NOT EXISTS (SELECT 1 FROM service_orders WHERE id = OLD.id) THEN
+            DELETE FROM service_order_keys WHERE id = OLD.id;
+        END IF;
+        RETURN OLD;
+    END IF;
+
+    INSERT INTO service_order_keys (id, os_id) VALUES (NEW.id, NEW.os_id)
+    ON CONFLICT (id) DO UPDATE SET os_id = EXCLUDED.os_id
+    WHERE service_order_keys.os_id IS DISTINCT FROM EXCLUDED.os_id;
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER service_order_keys_sync
+AFTER INSERT OR UPDATE OF id, os_id OR DELETE ON service_orders
+FOR EACH ROW EXECUTE FUNCTION service_order_keys_sync();
+"""
+
+
+def _fk_assistants(bind, tabela_alvo):
+    return bind.execute(sa.text(
+        "SELECT conname FROM pg_constraint "
+        "WHERE conrelid = 'service_order_assistants'::regclass AND contype = 'f' "
+        "AND confrelid = CAST(:alvo AS regclass)"
+    ), {'alvo': tabela_alvo}).scalar()
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # 1. Chaves únicas globais, alvo da chave estrangeira dos auxiliares
+    op.execute("""
+        CREATE TABLE service_order_keys (
+            id INTEGER PRIMARY KEY,
+            os_id VARCHAR(50) NOT NULL UNIQUE
+        )
+    """)
+    op.execute("INSERT INTO service_order_keys (id, os_id) SELECT id, os_id FROM service_orders")
+
+    fk = _fk_assistants(bind, 'service_orders')
+    if fk:
+        op.execute(f"ALTER TABLE service_order_assistants DROP CONSTRAINT {fk}")
+    op.execute(
+        "ALTER TABLE service_order_assistants ADD CONSTRAINT service_order_assistants_service_order_id_fkey "
+        "FOREIGN KEY (service_order_id) REFERENCES service_order_keys (id)"
+    )
+
+    # 2. A tabela atual sai do caminho; a sequência de id passa para a nova
+    op.execute("ALTER TABLE service_orders RENAME TO service_orders_legacy")
+    for nome, _ in INDICES:
+        op.execute(f"DROP INDEX IF EXISTS {nome}")
+    op.execute("DROP INDEX IF EXISTS ix_service_orders_finalizacao_mes")
+    op.execute("ALTER SEQUENCE service_orders_id_seq OWNED BY NONE")
+
+    op.execute(
+        "CREATE TABLE service_orders (LIKE service_orders_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY RANGE (os_data_finalizacao)"
+    )
+    for nome, tabela, coluna in CHAVES_ESTRANGEIRAS:
+        op.execute(f"ALTER TABLE service_orders ADD CONSTRAINT {nome} "
+                   f"FOREIGN KEY ({coluna}) REFERENCES {tabela} (id)")
+
+    # 3. Partições: default, meses com OS e os próximos
+    op.execute("CREATE TABLE service_orders_default PARTITION OF service_orders DEFAULT")
+    meses = {
+        (int(ano), int(mes)) for ano, mes in bind.execute(sa.text(
+            "SELECT DISTINCT EXTRACT(YEAR FROM os_data_finalizacao), EXTRACT(MONTH FROM os_data_finalizacao) "
+            "FROM service_orders_legacy WHERE os_data_finalizacao IS NOT NULL"
+        ))
+    }
+    hoje = datetime.now()
+    for deslocamento in range(MESES_A_FRENTE + 1):
+        total = hoje.year * 12 + hoje.month - 1 + deslocamento
+        meses.add((total // 12, total % 12 + 1))
+    for ano, mes in sorted(meses):
+        total = ano * 12 + mes
+        fim_ano, fim_mes = total // 12, total % 12 + 1
+        op.execute(
+            f"CREATE TABLE service_orders_{ano:04d}_{mes:02d} PARTITION OF service_orders "
+            f"FOR VALUES FROM ('{ano:04d}-{mes:02d}-01') TO ('{fim_ano:04d}-{fim_mes:02d}-01')"
+        )
+
+    # 4. Linhas primeiro, índices e gatilho depois (as chaves já foram copiadas)
+    op.execute("INSERT INTO service_orders SELECT * FROM service_orders_legacy")
+    for nome, colunas in INDICES:
+        op.create_index(nome, 'service_orders', colunas, unique=False)
+    op.create_index('ix_service_orders_finalizacao_mes', 'service_orders',
+                    [sa.text("date_trunc('month', os_data_finalizacao)")], unique=False)
+    op.execute(GATILHO)
+
+    op.execute("DROP TABLE service_orders_legacy")
+    op.execute("ALTER SEQUENCE service_orders_id_seq OWNED BY service_orders.id")
+    op.execute("ANALYZE service_orders")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # Partições desanexadas pelo arquivamento não voltam: anexe-as antes, se for o caso
+    op.execute("DROP TRIGGER IF EXISTS service_order_keys_sync ON service_orders")
+    op.execute("DROP FUNCTION IF EXISTS service_order_keys_sync()")
+    op.execute("ALTER TABLE service_orders RENAME TO service_orders_particionada")
+    for nome, _ in INDICES:
+        op.execute(f"DROP INDEX IF EXISTS {nome}")
+    op.execute("DROP INDEX IF EXISTS ix_service_orders_finalizacao_mes")
+    op.execute("ALTER SEQUENCE service_orders_id_seq OWNED BY NONE")
+
+    op.execute(
+        "CREATE TABLE service_orders (LIKE service_orders_particionada INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    op.execute("INSERT INTO service_orders SELECT * FROM service_orders_particionada ORDER BY id")
+    op.execute("ALTER TABLE service_orders ADD CONSTRAINT service_orders_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE service_orders ADD CONSTRAINT service_orders_os_id_key UNIQUE (os_id)")
+    for nome, tabela, coluna in CHAVES_ESTRANGEIRAS:
+        op.execute(f"ALTER TABLE service_orders ADD CONSTRAINT {nome} "
+                   f"FOREIGN KEY ({coluna}) REFERENCES {tabela} (id)")
+    for nome, colunas in INDICES[2:]:
+        op.create_index(nome, 'service_orders', colunas, unique=False)
+    op.create_index('ix_service_orders_finalizacao_mes', 'service_orders',
+                    [sa.text("date_trunc('month', os_data_finalizacao)")], unique=False)
+
+    fk = _fk_assistants(bind, 'service_order_keys')
+    if fk:
+        op.execute(f"ALTER TABLE service_order_assistants DROP CONSTRAINT {fk}")
+    op.execute(
+        "ALTER TABLE service_order_assistants ADD CONSTRAINT service_order_assistants_service_order_id_fkey "
+        "FOREIGN KEY (service_order_id) REFERENCES service_orders (id)"
+    )
+
+    # Apagar a tabela particionada apaga também as partições
+    op.execute("DROP TABLE service_orders_particionada")
+    op.execute("DROP TABLE service_order_keys")
+    op.execute("ALTER SEQUENCE service_orders_id_seq OWNED BY service_orders.id")
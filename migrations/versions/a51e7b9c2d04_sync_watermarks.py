@@ -0,0 +1,32 @@
+"""sync_watermarks: marca d'água da sincronização incremental
+
+Revision ID: a51e7b9c2d04
+Revises: 8c2d4e6f1a93
+Create Date: 2026-10-18 13:05:42.117630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a51e7b9c2d04'
+down_revision = '8c2d4e6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sync_watermarks',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('last_finalizacao', sa.DateTime(), nullable=True),
+        sa.Column('last_os_id', sa.BigInteger(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('sync_watermarks')
@@ -0,0 +1,36 @@
+"""service_order_monthly_stats_builds: meses com rollup já montado
+
+Revision ID: b8e3d1f7a294
+Revises: 7c4a2e9b1f63
+Create Date: 2026-10-18 20:14:37.802519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e3d1f7a294'
+down_revision = '7c4a2e9b1f63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'service_order_monthly_stats_builds',
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('built_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('year', 'month'),
+        if_not_exists=True
+    )
+    # Meses que já têm linhas no rollup já foram montados
+    op.execute(
+        "INSERT INTO service_order_monthly_stats_builds (year, month, built_at) "
+        "SELECT year, month, MAX(updated_at) FROM service_order_monthly_stats GROUP BY year, month"
+    )
+
+
+def downgrade():
+    op.drop_table('service_order_monthly_stats_builds')
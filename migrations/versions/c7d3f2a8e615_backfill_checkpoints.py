@@ -0,0 +1,34 @@
+"""backfill_checkpoints: situação de cada dia do backfill histórico
+
+Revision ID: c7d3f2a8e615
+Revises: a51e7b9c2d04
+Create Date: 2026-10-18 14:21:09.804512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d3f2a8e615'
+down_revision = 'a51e7b9c2d04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'backfill_checkpoints',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('os_count', sa.Integer(), nullable=False),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('backfill_checkpoints')
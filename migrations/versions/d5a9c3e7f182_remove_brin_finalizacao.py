@@ -0,0 +1,35 @@
+"""service_orders: remove o índice BRIN por os_data_finalizacao
+
+O btree ix_service_orders_finalizacao, na mesma coluna, é sempre o escolhido
+pelo planejador; o BRIN só encarecia as gravações.
+
+Revision ID: d5a9c3e7f182
+Revises: b8e3d1f7a294
+Create Date: 2026-10-18 21:03:52.417906
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a9c3e7f182'
+down_revision = 'b8e3d1f7a294'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_service_orders_finalizacao_brin', table_name='service_orders',
+                      if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.create_index('ix_service_orders_finalizacao_brin', 'service_orders', ['os_data_finalizacao'],
+                        unique=False, if_not_exists=True, postgresql_using='brin',
+                        postgresql_concurrently=True)
@@ -0,0 +1,26 @@
+"""service_orders.payload_hash: impressão digital dos dados importados
+
+Revision ID: e4b8a1d6c372
+Revises: c7d3f2a8e615
+Create Date: 2026-10-18 15:02:37.418265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b8a1d6c372'
+down_revision = 'c7d3f2a8e615'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('service_orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('payload_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('service_orders', schema=None) as batch_op:
+        batch_op.drop_column('payload_hash')
@@ -0,0 +1,38 @@
+"""sync_failures: OS que a sincronização incremental não buscou ou gravou
+
+Revision ID: e9b2c6d4a731
+Revises: d5a9c3e7f182
+Create Date: 2026-10-18 22:14:36.208451
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b2c6d4a731'
+down_revision = 'd5a9c3e7f182'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sync_failures',
+        sa.Column('os_id', sa.String(length=50), nullable=False),
+        sa.Column('stage', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('finalizacao', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('first_failed_at', sa.DateTime(), nullable=False),
+        sa.Column('last_failed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('os_id'),
+        if_not_exists=True
+    )
+    op.create_index('ix_sync_failures_status', 'sync_failures', ['status'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_sync_failures_status', table_name='sync_failures')
+    op.drop_table('sync_failures')
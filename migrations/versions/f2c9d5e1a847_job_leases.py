@@ -0,0 +1,33 @@
+"""job_leases: concessão de execução dos jobs agendados
+
+Revision ID: f2c9d5e1a847
+Revises: e4b8a1d6c372
+Create Date: 2026-10-18 15:48:12.530914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c9d5e1a847'
+down_revision = 'e4b8a1d6c372'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'job_leases',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('holder', sa.String(length=255), nullable=True),
+        sa.Column('slot', sa.DateTime(), nullable=True),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('job_leases')
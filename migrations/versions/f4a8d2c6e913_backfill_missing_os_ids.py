@@ -0,0 +1,26 @@
+"""backfill_checkpoints: OS que faltaram nos dias processados em parte
+
+Revision ID: f4a8d2c6e913
+Revises: e9b2c6d4a731
+Create Date: 2026-10-18 22:41:07.935214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a8d2c6e913'
+down_revision = 'e9b2c6d4a731'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('backfill_checkpoints', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('missing_os_ids', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('backfill_checkpoints', schema=None) as batch_op:
+        batch_op.drop_column('missing_os_ids')
@@ -1,11 +1,12 @@
 from app import create_app
 from app.tasks.daily_os import iniciar_scheduler
 
-app = create_app()
+# Processo dedicado ao agendador: os workers web rodam com SCHEDULER_ENABLED=False
+app = create_app(scheduler=False)
 
 if __name__ == "__main__":
     iniciar_scheduler(app)
 
     import time
     while True:
-        time.sleep(60)
\ No newline at end of file
+        time.sleep(60)